@@ -1,4 +1,6 @@
 #!/bin/bash
 SCRIPT_DIR="$(dirname "$(realpath "$0")")"
 export PYTHONPATH="$PYTHONPATH:$SCRIPT_DIR/sources"
+# Native PRISM libraries for ANALYSIS_BACKEND = "inprocess"
+export LD_LIBRARY_PATH="$SCRIPT_DIR/prism-4.8.1-linux64-x86/lib${LD_LIBRARY_PATH:+:$LD_LIBRARY_PATH}"
 python run_tests.py
\ No newline at end of file
@@ -1,30 +1,121 @@
+import json
+import math
 import os
 import subprocess
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
 
-from sources.env import PRISM_PATH
+from sources.env import (ANALYSIS_BACKEND, PRISM_BUILD_TIMEOUT, PRISM_CHECK_TIMEOUT, PRISM_AUTOTUNE,
+                         VERDICT_CACHE, VERDICT_INFERENCE)
+from sources.launcher import stream_prism
+from sources.jprism import (get_in_process_prism, check_to_analysis_info, PrismBackendUnavailable,
+                            in_process_available, disable_in_process)
+from sources.autotune import tuned_options
+from sources.verdict_cache import get_verdict_cache, use_verdict_cache, cpi_hash, encoding_fingerprint
+from sources.verdict_store import get_verdict_store, clear_verdict_stores
 
+Thresholds = Dict[str, float]
 
-def generate_multi_rewards_requirement(thresholds: Dict[str, float]) -> str:
+
+def threshold_vector(thresholds: Thresholds) -> List[float]:
+    """
+    Threshold values in the order of the impact_i rewards of the property.
+
+    The encoding numbers the rewards in the sorted order of the impact names
+    (see cpitospin), so the thresholds follow that order.
+    """
+    return [thresholds[name] for name in threshold_names(thresholds)]
+
+def property_threshold(value: float) -> float:
+    """
+    Threshold as written to a property: rounded up to 6 decimals.
+
+    Rounding to nearest could check a bound below the requested one (e.g. a
+    witness's exact impacts), which PRISM may then reject. Float noise from
+    the scaling (2.007 * 1e6 = 2007000.0000000002) is dropped first.
+    """
+    return math.ceil(round(value * 1e6, 3)) / 1e6
+
+def threshold_names(thresholds: Thresholds) -> List[str]:
+    """Impact names in threshold_vector order."""
+    return sorted(thresholds)
+
+def generate_multi_rewards_requirement(thresholds: Union[Thresholds, List[Thresholds]]) -> str:
     """
     Generate a PRISM property for multi-cumulative rewards with thresholds.
     
     Args:
         thresholds: Dictionary mapping impact names to their threshold values
-                   e.g. {"cost": 100, "time": 50}
+                   e.g. {"cost": 100, "time": 50}, or a list of such dictionaries
                           
     Returns:
-        PRISM property checking multiple reward thresholds
+        PRISM property checking multiple reward thresholds; for a list, a
+        properties file with one property per threshold vector
     """
+    if isinstance(thresholds, list):
+        return '\n'.join(generate_multi_rewards_requirement(t) for t in thresholds)
+
     # Generate individual reward bound expressions
     reward_bounds = [
-        f'R{{"impact_{i}"}}<={threshold:0.6f} [C]'
-        for i, threshold in enumerate(sorted(thresholds.values()))
+        f'R{{"impact_{i}"}}<={property_threshold(threshold):0.6f} [C]'
+        for i, threshold in enumerate(threshold_vector(thresholds))
     ]
     
     # Combine into multi() property
     return f'multi({", ".join(reward_bounds)})'
 
+def generate_const_rewards_requirement(num_impacts: int) -> str:
+    """
+    Generate a PRISM properties file whose reward thresholds are undefined constants.
+
+    The thresholds t_0..t_{n-1} are given on the command line with -const,
+    so a whole grid of threshold vectors is checked on a single built model.
+
+    Args:
+        num_impacts: Number of impact rewards
+
+    Returns:
+        PRISM properties file with the constant declarations and the multi() property
+    """
+    constants = [f'const double t_{i};' for i in range(num_impacts)]
+    reward_bounds = [f'R{{"impact_{i}"}}<=t_{i} [C]' for i in range(num_impacts)]
+    return '\n'.join(constants + [f'multi({", ".join(reward_bounds)})'])
+
+def const_sweep(batch: List[Thresholds]) -> Optional[str]:
+    """
+    Express a batch of threshold vectors as a PRISM -const sweep.
+
+    PRISM sweeps the cartesian product of evenly spaced ranges, so this only
+    works when the batch is such a grid (e.g. several values of one impact
+    with the others fixed).
+
+    Args:
+        batch: Threshold vectors
+
+    Returns:
+        The -const argument (e.g. "t_0=0.5:0.25:1.125,t_1=3.0"), or None if the batch is not a grid
+    """
+    vectors = [tuple(property_threshold(v) for v in threshold_vector(t)) for t in batch]
+    if not vectors or len({len(v) for v in vectors}) != 1:
+        return None
+
+    definitions = []
+    grid_size = 1
+    for i in range(len(vectors[0])):
+        values = sorted({v[i] for v in vectors})
+        grid_size *= len(values)
+        if len(values) == 1:
+            definitions.append(f't_{i}={values[0]:0.6f}')
+            continue
+        step = values[1] - values[0]
+        if any(abs((b - a) - step) > 1e-6 for a, b in zip(values, values[1:])):
+            return None
+        # Half a step of slack on the upper end so rounding never drops the last value
+        definitions.append(f't_{i}={values[0]:0.6f}:{step:0.6f}:{values[-1] + step / 2:0.6f}')
+
+    if grid_size != len(set(vectors)):
+        return None
+    return ','.join(definitions)
+
 def parse_line_value(line: str, prefix: str) -> Optional[str]:
     """Extract value after prefix and colon from line."""
     if line.startswith(prefix):
@@ -62,26 +153,292 @@ def parse_states_line(line: str) -> tuple[Optional[int], Optional[int]]:
         pass
     return None, None
 
-def analyze_bounds(model_name: str, thresholds: Dict[str, float]) -> Dict[str, Any]:
+def parse_constants_line(line: str) -> Dict[str, float]:
+    """Parse a 'Property constants: t_0=0.5,t_1=2' line."""
+    constants = {}
+    for assignment in line.split(':', 1)[1].strip().split(','):
+        if '=' in assignment:
+            name, value = assignment.split('=', 1)
+            if (number := safe_float_conversion(value)) is not None:
+                constants[name.strip()] = number
+    return constants
+
+class PrismOutputParser:
+    """
+    Incremental parser of the PRISM log of a run checking one or more properties.
+
+    Lines are fed as PRISM prints them, so the metrics read so far are
+    available even if the run is killed before it ends.
+    """
+
+    def __init__(self):
+        self.model_info: Dict[str, Any] = {}
+        self.timings: Dict[str, Optional[float]] = {}
+        self.states_info: Dict[str, Optional[int]] = {}
+        self.results: List[Optional[bool]] = []
+        self.values: List[Optional[str]] = []
+        self.constants: List[Dict[str, float]] = []
+        self.warnings: list[str] = []
+
+    def feed(self, line: str):
+        line = line.strip()
+
+        # Version and basic info
+        if value := parse_line_value(line, 'Version:'):
+            self.model_info['version'] = value
+        elif value := parse_line_value(line, 'Type:'):
+            self.model_info['type'] = value
+        elif value := parse_line_value(line, 'Modules:'):
+            self.model_info['modules'] = value.split()
+        elif value := parse_line_value(line, 'Variables:'):
+            self.model_info['variables'] = value.split()
+
+        # A new check starts: its verdict stays None if PRISM reports an error instead
+        elif line.startswith('Model checking:'):
+            self.results.append(None)
+            self.values.append(None)
+            self.constants.append({})
+        elif line.startswith('Property constants:') and self.constants:
+            self.constants[-1] = parse_constants_line(line)
+
+        # Timing information (model checking time is summed over the checks)
+        elif 'Time for model construction:' in line:
+            if value := parse_line_value(line, 'Time for model construction:'):
+                self.timings['model_construction'] = safe_float_conversion(value)
+        elif 'Time for model checking:' in line:
+            if value := parse_line_value(line, 'Time for model checking:'):
+                if (seconds := safe_float_conversion(value)) is not None:
+                    self.timings['model_checking'] = (self.timings.get('model_checking') or 0.0) + seconds
+
+        # States information
+        elif line.startswith('States:'):
+            total, initial = parse_states_line(line)
+            self.states_info['total'] = total
+            self.states_info['initial'] = initial
+        elif value := parse_line_value(line, 'Transitions:'):
+            self.states_info['transitions'] = safe_int_conversion(value)
+        elif value := parse_line_value(line, 'Choices:'):
+            self.states_info['choices'] = safe_int_conversion(value)
+
+        # Result
+        elif value := parse_line_value(line, 'Result:'):
+            if not self.results:
+                self.results.append(None)
+                self.values.append(None)
+                self.constants.append({})
+            self.results[-1] = value.lower() == 'true'
+            self.values[-1] = value
+
+        # Warnings
+        elif line.startswith('Warning:'):
+            self.warnings.append(line.split('Warning:', 1)[1].strip())
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dictionary with model_info, timings, states_info, warnings, the verdict
+            of each check in output order ('results'), the raw 'Result:' values
+            ('values', for numeric and Pareto queries) and the property constants
+            of each check ('constants', empty dictionaries without -const)
+        """
+        return {
+            'model_info': self.model_info,
+            'timings': self.timings,
+            'states_info': self.states_info,
+            'results': self.results,
+            'values': self.values,
+            'constants': self.constants,
+            'warnings': self.warnings
+        }
+
+def parse_prism_output(prism_output: str) -> Dict[str, Any]:
+    """Parse a complete PRISM log (see PrismOutputParser.summary)."""
+    parser = PrismOutputParser()
+    for line in prism_output.split('\n'):
+        parser.feed(line)
+    return parser.summary()
+
+def match_sweep_results(batch: List[Thresholds], parsed: Dict[str, Any]) -> List[Optional[bool]]:
+    """Map the verdicts of a -const sweep back to the threshold vectors of the batch."""
+    verdicts: List[Optional[bool]] = []
+    for thresholds in batch:
+        vector = threshold_vector(thresholds)
+        verdict = None
+        for constants, result in zip(parsed['constants'], parsed['results']):
+            if all(abs(constants.get(f't_{i}', float('nan')) - value) <= 1e-6 * max(1.0, abs(value))
+                   for i, value in enumerate(vector)):
+                verdict = result
+                break
+        verdicts.append(verdict)
+    return verdicts
+
+def cached_analysis_key(model_name: str) -> Optional[str]:
+    """Verdict cache key of a model generated from CPIs/<model_name>.cpi (None if there is no such CPI)."""
+    try:
+        with open(os.path.join('CPIs', f'{model_name}.cpi'), 'r') as f:
+            return cpi_hash(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def inferred_analysis(thresholds: Thresholds, verdict: bool, known: List[float]) -> Dict[str, Any]:
+    """Analysis result of a verdict inferred by dominance, without running PRISM."""
+    return {
+        'command': None,
+        'prism_output': None,
+        'model_info': {},
+        'timings': {},
+        'states_info': {},
+        'property': generate_multi_rewards_requirement(thresholds),
+        'result': verdict,
+        'warnings': [],
+        'return_code': 0,
+        'error_output': None,
+        'verdict_source': 'inferred',
+        'inferred_from': known
+    }
+
+def model_verdict_store(model_name: str, cpi_key: Optional[str], use_cache: bool = VERDICT_CACHE):
+    """Dominance store of a model (see verdict_store.get_verdict_store), seeded from the verdict cache."""
+    encoding = encoding_fingerprint()
+    seed = None
+    if use_cache and cpi_key is not None:
+        seed = lambda: get_verdict_cache().verdicts(cpi_key, encoding)
+    return get_verdict_store(model_name, cpi_key and f'{cpi_key}:{encoding}', seed)
+
+def reset_verdicts(cache_path: Optional[str] = None):
+    """Forget the verdicts known in this process and use another verdict cache file (None: the default one)."""
+    use_verdict_cache(cache_path)
+    clear_verdict_stores()
+
+def known_verdict(model_name: str, cpi_key: Optional[str], thresholds: Thresholds) -> Optional[bool]:
+    """Verdict of a threshold vector implied by the verdicts already known for the model (None if unknown)."""
+    store = model_verdict_store(model_name, cpi_key)
+    if store is None:
+        return None
+    inferred = store.infer([property_threshold(v) for v in threshold_vector(thresholds)])
+    return inferred[0] if inferred is not None else None
+
+def analyze_bounds(model_name: str, thresholds: Union[Thresholds, List[Thresholds]],
+                   backend: Optional[str] = None, batch_mode: str = "properties",
+                   build_timeout: Optional[float] = PRISM_BUILD_TIMEOUT,
+                   check_timeout: Optional[float] = PRISM_CHECK_TIMEOUT,
+                   prism_options: Optional[List[str]] = None,
+                   use_cache: bool = VERDICT_CACHE,
+                   infer: bool = VERDICT_INFERENCE,
+                   pctl_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze a model against multi-reward bounds, without running PRISM when the verdict is already known.
+
+    The property is monotone in the thresholds, so a vector that dominates a
+    satisfied one is satisfied and a vector dominated by an unsatisfied one is
+    not (see verdict_store.MonotoneVerdicts). Other verdicts come from the
+    verdict cache, keyed by the canonical form of CPIs/<model_name>.cpi (see
+    verdict_cache.canonical_cpi), so a check is never repeated across watchdog
+    restarts, refine_bounds reruns or isomorphic CPIs. In a batch, only the
+    remaining vectors are sent to PRISM. Failed and timed out checks are
+    neither cached nor used for inference.
+
+    Args:
+        use_cache: Use the verdict cache (default: VERDICT_CACHE from env.py)
+        infer: Infer verdicts by dominance (default: VERDICT_INFERENCE from env.py)
+
+    See run_analysis for the other arguments.
+
+    Returns:
+        The result of run_analysis, with 'verdict_source' ("inferred" or
+        "computed", a list for a batch) and 'cached' (True for a cache hit, the
+        number of cached verdicts for a batch). An inferred verdict names the
+        known vector it follows from in 'inferred_from'.
+    """
+    batch = thresholds if isinstance(thresholds, list) else [thresholds]
+    vectors = [[property_threshold(v) for v in threshold_vector(t)] for t in batch]
+
+    cpi_key = cached_analysis_key(model_name) if use_cache or infer else None
+    encoding = encoding_fingerprint()
+    cache = get_verdict_cache() if use_cache and cpi_key is not None else None
+    store = model_verdict_store(model_name, cpi_key, use_cache) if infer else None
+
+    entries: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+    for i, vector in enumerate(vectors):
+        if store is not None and (inferred := store.infer(vector)) is not None:
+            entries[i] = inferred_analysis(batch[i], *inferred)
+        elif cache is not None and (hit := cache.get(cpi_key, vector, encoding)) is not None:
+            entries[i] = {**hit, 'cached': True, 'verdict_source': 'computed'}
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+
+    if missing:
+        analysis_info = run_analysis(model_name,
+                                     [batch[i] for i in missing] if isinstance(thresholds, list) else thresholds,
+                                     backend, batch_mode, build_timeout, check_timeout, prism_options, pctl_name)
+        analysis_info['verdict_source'] = 'computed'
+        verdicts = analysis_info['result'] if isinstance(thresholds, list) else [analysis_info['result']]
+        for i, verdict in zip(missing, verdicts or [None] * len(missing)):
+            entries[i] = {**analysis_info, 'property': generate_multi_rewards_requirement(batch[i]),
+                          'result': verdict}
+            if 'error' not in analysis_info and verdict is not None:
+                if cache is not None:
+                    cache.put(cpi_key, vectors[i], encoding, entries[i])
+                if store is not None:
+                    store.add(vectors[i], verdict)
+
+    if not isinstance(thresholds, list):
+        return entries[0] if not missing else analysis_info
+
+    combined = {**(analysis_info if missing else entries[0])}
+    combined['result'] = [entry['result'] for entry in entries]
+    combined['verdict_source'] = [entry['verdict_source'] for entry in entries]
+    combined['property'] = generate_multi_rewards_requirement(thresholds)
+    combined['cached'] = sum(1 for entry in entries if entry.get('cached'))
+    combined.pop('inferred_from', None)
+    return combined
+
+def run_analysis(model_name: str, thresholds: Union[Thresholds, List[Thresholds]],
+                 backend: Optional[str] = None, batch_mode: str = "properties",
+                 build_timeout: Optional[float] = PRISM_BUILD_TIMEOUT,
+                 check_timeout: Optional[float] = PRISM_CHECK_TIMEOUT,
+                 prism_options: Optional[List[str]] = None,
+                 pctl_name: Optional[str] = None) -> Dict[str, Any]:
     """
     Analyze a model against multi-reward bounds.
+
+    A list of threshold vectors is checked in a single PRISM run, so the model
+    is built once for the whole batch. With batch_mode "properties" the batch is
+    written as one property per line; with "const" the thresholds are undefined
+    constants swept with -const (only for grids, otherwise "properties" is used).
     
     Args:
         model_name: Name of the model file (without extension)
-        thresholds: Dictionary mapping impact names to threshold values
+        thresholds: Dictionary mapping impact names to threshold values, or a list of them
+        backend: "launcher" or "inprocess" (default: ANALYSIS_BACKEND from env.py); jobs with
+            PRISM options, autotuned options or a time limit always use the launcher
+        batch_mode: "properties" or "const", used when thresholds is a list
+        build_timeout: Seconds allowed to parse and build the model (None: no limit)
+        check_timeout: Seconds allowed per checked property (None: no limit)
+        prism_options: Extra PRISM switches (e.g. memory or engine), after the defaults
+        pctl_name: Name of the property file in models/ (default: model_name); concurrent
+            checks of the same model need distinct names
         
     Returns:
-        Analysis results including full PRISM analysis information
+        Analysis results including full PRISM analysis information. For a batch,
+        'result' is the list of verdicts in the order of the threshold vectors.
+        If a time limit is hit, PRISM is killed and 'timed_out' names the phase;
+        the metrics parsed so far are kept.
     """
     # Ensure models directory exists
     os.makedirs('models', exist_ok=True)
     
     # Define paths
     model_path = os.path.join('models', f'{model_name}.nm')
-    pctl_path = os.path.join('models', f'{model_name}.pctl')
+    pctl_path = os.path.join('models', f'{pctl_name or model_name}.pctl')
+
+    batch = thresholds if isinstance(thresholds, list) else None
+    sweep = const_sweep(batch) if batch and batch_mode == "const" else None
     
     # Generate and write PCTL property
-    property_str = generate_multi_rewards_requirement(thresholds)
+    if sweep:
+        property_str = generate_const_rewards_requirement(len(batch[0]))
+    else:
+        property_str = generate_multi_rewards_requirement(thresholds)
     try:
         with open(pctl_path, 'w') as f:
             f.write(property_str)
@@ -99,10 +456,49 @@ def analyze_bounds(model_name: str, thresholds: Dict[str, float]) -> Dict[str, A
 
     print("pctl_path: ", pctl_path)
     print("model_path: ", model_path)
+
+    # Engine/solver options calibrated for the size class of the model, unless the caller chose the
+    # engine (e.g. the preflight settings); the caller's options come last so they win over the tuning
+    tuning = tuned_options(model_path, options=prism_options) if PRISM_AUTOTUNE else None
+
+    # PRISM switches and time limits only apply to a launched PRISM, so jobs needing them skip the in-process backend
+    launch_only = bool(prism_options or tuning) or build_timeout is not None or check_timeout is not None
+    if (backend or ANALYSIS_BACKEND) == "inprocess" and not launch_only and in_process_available():
+        try:
+            if batch is None:
+                check = get_in_process_prism().check(os.path.abspath(model_path), property_str)
+                return check_to_analysis_info(check, property_str, model_path)
+            # The built model stays in memory, so the batch is checked one property at a time
+            infos = [check_to_analysis_info(get_in_process_prism().check(os.path.abspath(model_path), p), p, model_path)
+                     for p in generate_multi_rewards_requirement(batch).split('\n')]
+            analysis_info = infos[0]
+            analysis_info['timings'] = {
+                'model_construction': infos[0]['timings']['model_construction'],
+                'model_checking': sum(info['timings']['model_checking'] for info in infos)
+            }
+            analysis_info['warnings'] = [w for info in infos for w in info['warnings']]
+            analysis_info['prism_output'] = ''.join(info['prism_output'] for info in infos)
+            analysis_info['property'] = property_str
+            analysis_info['result'] = [info['result'] for info in infos]
+            return analysis_info
+        except PrismBackendUnavailable as e:
+            disable_in_process(str(e))
+            in_process_available()
+        except Exception as e:
+            return {
+                'command': f'inprocess {model_path} {property_str}',
+                'error': str(e),
+                'return_code': -1,
+                'result': None,
+                'model_info': {},
+                'timings': {},
+                'states_info': {},
+                'warnings': [],
+                'property': property_str
+            }
     
     # Run PRISM with the model and property files
-    cmd = [
-        os.path.abspath(PRISM_PATH) if PRISM_PATH else "prism",
+    args = [
         "-cuddmaxmem",
         "10g",
         "-javamaxmem",
@@ -111,81 +507,68 @@ def analyze_bounds(model_name: str, thresholds: Dict[str, float]) -> Dict[str, A
         os.path.abspath(pctl_path),
         "-verbose"
     ]
-    print(cmd)
+    if sweep:
+        args += ["-const", sweep]
+
+    if tuning:
+        args += tuning['options']
+    if prism_options:
+        args += prism_options
+    print(args)
+    cmd = args
     try:
-        result = subprocess.run(cmd, 
-                              capture_output=True, 
-                              text=True, 
-                              check=True)
+        parser = PrismOutputParser()
+        expected_results = len(batch) if batch is not None else 1
+        result = stream_prism(args,
+                              on_line=parser.feed,
+                              build_timeout=build_timeout,
+                              check_timeout=check_timeout,
+                              stop_after_results=expected_results)
+        cmd = result.args
+        if result.returncode != 0 and not result.timed_out:
+            raise subprocess.CalledProcessError(result.returncode, result.args,
+                                                output=result.stdout, stderr=result.stderr)
         
         # Parse PRISM output
         prism_output = result.stdout
-        model_info: Dict[str, Any] = {}
-        timings: Dict[str, Optional[float]] = {}
-        states_info: Dict[str, Optional[int]] = {}
-        result_value: Optional[bool] = None
-        warnings: list[str] = []
-
         print(f'Prism output:\n{prism_output}')
-        
-        for line in prism_output.split('\n'):
-            line = line.strip()
-            
-            # Version and basic info
-            if value := parse_line_value(line, 'Version:'): 
-                model_info['version'] = value
-            elif value := parse_line_value(line, 'Type:'): 
-                model_info['type'] = value
-            elif value := parse_line_value(line, 'Modules:'):
-                model_info['modules'] = value.split()
-            elif value := parse_line_value(line, 'Variables:'):
-                model_info['variables'] = value.split()
-                
-            # Timing information
-            elif 'Time for model construction:' in line:
-                if value := parse_line_value(line, 'Time for model construction:'):
-                    timings['model_construction'] = safe_float_conversion(value)
-            elif 'Time for model checking:' in line:
-                if value := parse_line_value(line, 'Time for model checking:'):
-                    timings['model_checking'] = safe_float_conversion(value)
-                
-            # States information
-            elif line.startswith('States:'):
-                total, initial = parse_states_line(line)
-                states_info['total'] = total
-                states_info['initial'] = initial
-            elif value := parse_line_value(line, 'Transitions:'):
-                states_info['transitions'] = safe_int_conversion(value)
-            elif value := parse_line_value(line, 'Choices:'):
-                states_info['choices'] = safe_int_conversion(value)
-                
-            # Result
-            elif value := parse_line_value(line, 'Result:'):
-                result_value = value.lower() == 'true'
-                
-            # Warnings
-            elif line.startswith('Warning:'):
-                warnings.append(line.split('Warning:', 1)[1].strip())
+        parsed = parser.summary()
+
+        if sweep:
+            result_value = match_sweep_results(batch, parsed)
+        elif batch is not None:
+            result_value = parsed['results'] + [None] * (len(batch) - len(parsed['results']))
+        else:
+            result_value = parsed['results'][-1] if parsed['results'] else None
         
         # Compile complete results
         analysis_info = {
             'command': ' '.join(cmd),
             'prism_output': prism_output,
-            'model_info': model_info,
-            'timings': timings,
-            'states_info': states_info,
+            'model_info': parsed['model_info'],
+            'timings': parsed['timings'],
+            'states_info': parsed['states_info'],
             'property': property_str,
             'result': result_value,
-            'warnings': warnings,
+            'warnings': parsed['warnings'],
             'return_code': result.returncode,
             'error_output': result.stderr if result.stderr else None
         }
+
+        if tuning:
+            analysis_info['tuning'] = tuning
+
+        # Metrics read before the kill are kept; the missing verdicts stay None
+        if result.timed_out:
+            limit = build_timeout if result.timed_out == "build" else check_timeout
+            analysis_info['error'] = f"PRISM {result.timed_out} phase exceeded {limit} seconds"
+            analysis_info['timed_out'] = result.timed_out
         
         return analysis_info
         
     except subprocess.CalledProcessError as e:
         return {
-            'command': ' '.join(cmd),
+            'command': ' '.join(e.cmd),
             'error': str(e),
             'prism_output': e.output if hasattr(e, 'output') else None,
             'return_code': e.returncode,
@@ -208,4 +591,4 @@ def analyze_bounds(model_name: str, thresholds: Dict[str, float]) -> Dict[str, A
             'states_info': {},
             'warnings': [],
             'property': property_str
-        }
\ No newline at end of file
+        }
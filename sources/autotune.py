@@ -0,0 +1,198 @@
+import glob
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from sources.launcher import stream_prism
+
+AUTOTUNE_FILE = "prism_autotune.json"
+ENGINES = ["-mtbdd", "-sparse", "-hybrid", "-explicit"]
+ENGINE_SWITCHES = set(ENGINES) | {"-m", "-s", "-h", "-e"} # PRISM also accepts the one-letter forms
+SOLVER_OPTIONS = [[], ["-gs"], ["-topological"]]
+CANDIDATES = [[engine] + solver for engine in ENGINES for solver in SOLVER_OPTIONS]
+SIZE_CLASSES = [(4, "xs"), (8, "s"), (16, "m"), (32, "l")] # Upper bound on the number of modules
+
+
+def model_size_class(model_path: str) -> str:
+    """
+    Size class of a PRISM model, from its number of modules.
+
+    Every CPI region with a state of its own (task, split, merge, choice,
+    nature, loop) becomes a module, so this tracks the size of the process.
+    """
+    with open(model_path, 'r') as f:
+        modules = len(re.findall(r'^module\s', f.read(), re.MULTILINE))
+    for limit, name in SIZE_CLASSES:
+        if modules <= limit:
+            return name
+    return "xl"
+
+
+def load_tuning(path: str = AUTOTUNE_FILE) -> Dict[str, Dict[str, Any]]:
+    """Best options per size class, as stored by calibrate (empty if not calibrated)."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def sets_engine(options: List[str]) -> bool:
+    """True if PRISM options already choose the engine."""
+    return any(option in ENGINE_SWITCHES for option in options)
+
+
+def tuned_options(model_path: str, path: str = AUTOTUNE_FILE,
+                  options: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Engine/solver options to use for a model.
+
+    Args:
+        model_path: Path to the .nm file
+        path: Calibration file
+        options: PRISM options chosen by the caller; no tuning is applied if they set the engine
+
+    Returns:
+        Dictionary with size_class, options and the speedup measured over the
+        default engine, or None if its size class was never calibrated
+    """
+    if options and sets_engine(options):
+        return None
+    tuning = load_tuning(path)
+    size_class = model_size_class(model_path)
+    if size_class not in tuning:
+        return None
+    return {
+        'size_class': size_class,
+        'options': tuning[size_class]['options'],
+        'speedup': tuning[size_class]['speedup']
+    }
+
+
+def calibration_models(cpi_dir: str = "CPIs", bundle: Optional[List[Dict]] = None,
+                       limit: Optional[int] = None) -> List[str]:
+    """
+    Build the models of the calibration set.
+
+    Args:
+        cpi_dir: Directory with .cpi files, used when no bundle is given
+        bundle: CPI dictionaries of a bundle (as returned by read.read_cpi_bundles)
+        limit: Maximum number of models
+
+    Returns:
+        Names of the generated models (in models/)
+    """
+    from cpi_to_mdp.etl import cpi_to_model
+
+    if bundle is not None:
+        names = []
+        for i, cpi in enumerate(bundle[:limit]):
+            cpi = {k: v for k, v in cpi.items() if k != 'metadata'}
+            name = f"autotune_{i}"
+            with open(os.path.join(cpi_dir, f"{name}.cpi"), 'w') as f:
+                json.dump(cpi, f)
+            names.append(name)
+    else:
+        names = [os.path.basename(p)[:-len(".cpi")] for p in sorted(glob.glob(os.path.join(cpi_dir, "*.cpi")))]
+        names = names[:limit]
+
+    return [name for name in names if cpi_to_model(name) is not None]
+
+
+def time_options(model_name: str, property_str: str, options: List[str],
+                 timeout: Optional[float]) -> Optional[Dict[str, Any]]:
+    """Run one property with the given options; None if PRISM fails, times out or gives no verdict."""
+    from sources.analysis import PrismOutputParser
+
+    parser = PrismOutputParser()
+    args = ["-cuddmaxmem", "10g", "-javamaxmem", "2g",
+            os.path.abspath(os.path.join('models', f'{model_name}.nm')),
+            "-pf", property_str] + options
+    start = time.time()
+    result = stream_prism(args, on_line=parser.feed, build_timeout=timeout, check_timeout=timeout,
+                          stop_after_results=1)
+    elapsed = time.time() - start
+    if result.timed_out or result.returncode != 0 or not parser.results or parser.results[-1] is None:
+        return None
+    return {'time': elapsed, 'result': parser.results[-1]}
+
+
+def calibrate(models: List[str], candidates: List[List[str]] = CANDIDATES, repeats: int = 3,
+              timeout: Optional[float] = 600, path: str = AUTOTUNE_FILE) -> Dict[str, Dict[str, Any]]:
+    """
+    Benchmark engine and solver options and store the best choice per model-size class.
+
+    Each model is checked against its sampled expected impacts (the first
+    threshold vector of refine_bounds) with the default engine and with every
+    candidate. A candidate is kept for a size class only if it succeeds on all
+    its models with the same verdict as the default; the fastest total wins.
+
+    Args:
+        models: Model names (in models/ and CPIs/), e.g. from calibration_models
+        candidates: Option lists to try
+        repeats: Runs per model and candidate (the minimum time is kept)
+        timeout: Seconds allowed per phase of a run
+        path: JSON file where the tuning is stored (merged with existing classes)
+
+    Returns:
+        The stored tuning
+    """
+    from sources.analysis import generate_multi_rewards_requirement
+    from sampler import sample_expected_impact
+
+    totals: Dict[str, Dict[str, Optional[float]]] = {}
+    counts: Dict[str, int] = {}
+
+    for model_name in models:
+        with open(os.path.join('CPIs', f'{model_name}.cpi'), 'r') as f:
+            thresholds = sample_expected_impact(json.load(f))
+        if not thresholds:
+            continue
+        property_str = generate_multi_rewards_requirement(thresholds)
+        size_class = model_size_class(os.path.join('models', f'{model_name}.nm'))
+        class_totals = totals.setdefault(size_class, {})
+        counts[size_class] = counts.get(size_class, 0) + 1
+
+        # Warm-up run, so that JVM or nailgun server startup is not charged to the default engine
+        time_options(model_name, property_str, [], timeout)
+
+        baseline = None
+        for options in [[]] + candidates:
+            key = ' '.join(options)
+            runs = [time_options(model_name, property_str, options, timeout) for _ in range(repeats)]
+            if any(run is None for run in runs) or (baseline is not None and runs[0]['result'] != baseline):
+                class_totals[key] = None
+                print(f"{model_name} [{size_class}] {key or 'default'}: failed")
+                continue
+            if not options:
+                baseline = runs[0]['result']
+            best = min(run['time'] for run in runs)
+            if key not in class_totals or class_totals[key] is not None:
+                class_totals[key] = class_totals.get(key, 0.0) + best
+            print(f"{model_name} [{size_class}] {key or 'default'}: {best:.3f}s")
+
+    tuning = load_tuning(path)
+    for size_class, class_totals in totals.items():
+        default_time = class_totals.get('')
+        valid = {key: t for key, t in class_totals.items() if t is not None}
+        if default_time is None or not valid:
+            continue
+        best_key = min(valid, key=valid.get)
+        tuning[size_class] = {
+            'options': best_key.split(),
+            'speedup': default_time / valid[best_key] if valid[best_key] > 0 else 1.0,
+            'time': valid[best_key],
+            'default_time': default_time,
+            'models': counts[size_class]
+        }
+        print(f"[{size_class}] best: {best_key or 'default'} ({tuning[size_class]['speedup']:.2f}x)")
+
+    with open(path, 'w') as f:
+        json.dump(tuning, f, indent=2)
+    return tuning
+
+
+if __name__ == "__main__":
+    calibrate(calibration_models())
@@ -45,10 +45,18 @@ def run_benchmarks():
             vte TIMESTAMP,
             initial_bounds TEXT,
             final_bounds TEXT,
+            pareto_front TEXT,
+            witness TEXT,
+            sequential_rounds INTEGER,
             error TEXT,
             PRIMARY KEY (x, y, w)
         )
     ''')
+    # Databases created by older versions lack the later columns
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(experiments)')]
+    for column, column_type in (('pareto_front', 'TEXT'), ('witness', 'TEXT'), ('sequential_rounds', 'INTEGER')):
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE experiments ADD COLUMN {column} {column_type}')
     conn.commit()
 
     print(str(datetime.now()) + " Starting benchmark...")
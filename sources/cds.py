@@ -0,0 +1,277 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+ARCHIVE_DIR = ".prism_cds"
+DEFAULT_JAVAMAXMEM = "1g" # Same defaults as bin/prism
+DEFAULT_JAVASTACK = "4m"
+
+# Native PRISM library and the variable the launcher script exports it with, per platform
+if sys.platform == "darwin":
+    NATIVE_LIBRARY, LIBRARY_PATH_VAR = "libprism.dylib", "DYLD_LIBRARY_PATH"
+elif sys.platform == "win32":
+    NATIVE_LIBRARY, LIBRARY_PATH_VAR = "prism.dll", "PATH"
+else:
+    NATIVE_LIBRARY, LIBRARY_PATH_VAR = "libprism.so", "LD_LIBRARY_PATH"
+
+
+def prism_home(prism_exec: str) -> Optional[str]:
+    """
+    PRISM installation behind a launcher script.
+
+    bin/prism records its installation as PRISM_DIR="..."; a launcher without
+    that line is assumed to sit in the bin directory of the installation.
+
+    Returns:
+        The installation directory, or None if the launcher cannot be found
+    """
+    path = os.path.realpath(prism_exec)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            match = re.search(r'^PRISM_DIR="?([^"\n]+)"?\s*$', f.read(64 * 1024), re.MULTILINE)
+    except OSError:
+        match = None
+    if match and os.path.isdir(match.group(1)):
+        return os.path.abspath(match.group(1))
+    return os.path.dirname(os.path.dirname(path))
+
+
+def prism_classpath(prism_dir: str) -> List[str]:
+    """
+    Classpath of the PRISM launcher, restricted to archives.
+
+    bin/prism also puts PRISM_DIR itself on the classpath (for GUI images), but
+    CDS refuses non-empty directories, so only the jars are used here. pepa.zip
+    is left out: the prism.jar manifest already adds it, and listing it twice
+    makes the runtime classpath check of the archive fail.
+    """
+    lib_dir = os.path.join(prism_dir, "lib")
+    jars = sorted(j for j in glob.glob(os.path.join(lib_dir, "*.jar")) if os.path.basename(j) != "prism.jar")
+    return [os.path.join(lib_dir, "prism.jar")] + jars
+
+
+def classpath_fingerprint(classpath: List[str]) -> str:
+    """Fingerprint of the classpath: changes whenever a jar is replaced or modified."""
+    h = hashlib.sha256()
+    for path in classpath:
+        if os.path.exists(path):
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+class CDSLauncher:
+    """
+    Launch PRISM with an AppCDS class-data-sharing archive.
+
+    The archive is built from the classes loaded by a real PRISM run: the first
+    job is run with -XX:DumpLoadedClassList, then the archive is dumped with
+    -Xshare:dump. It is rebuilt automatically when prism.jar or a lib/*.jar changes.
+    Java is launched directly (as bin/prism does) because the archive must be
+    created and used with exactly the same classpath.
+    """
+
+    def __init__(self, prism_dir: Optional[str], archive_dir: str = ARCHIVE_DIR):
+        self.prism_dir = os.path.abspath(prism_dir or ".")
+        self.lib_dir = os.path.join(self.prism_dir, "lib")
+        self.archive_dir = os.path.abspath(archive_dir)
+        self.archive_path = os.path.join(self.archive_dir, "prism.jsa")
+        self.class_list_path = os.path.join(self.archive_dir, "prism.classlist")
+        self.stamp_path = os.path.join(self.archive_dir, "prism.stamp.json")
+        self.java = os.environ.get("PRISM_JAVA", "java")
+        self.classpath = prism_classpath(self.prism_dir)
+        # Without the jars and native libraries (e.g. a wrapper launcher) PRISM is launched by its script instead
+        self.available = (prism_dir is not None
+                          and os.path.exists(self.classpath[0])
+                          and os.path.exists(os.path.join(self.lib_dir, NATIVE_LIBRARY)))
+        self.lock = threading.Lock()
+
+    def java_command(self, args: List[str], jvm_options: Optional[List[str]] = None) -> List[str]:
+        """
+        Build the java command line for PRISM arguments.
+
+        The launcher-only switches -javamaxmem and -javastack are turned into
+        -Xmx and -Xss, as bin/prism does.
+        """
+        javamaxmem = os.environ.get("PRISM_JAVAMAXMEM", DEFAULT_JAVAMAXMEM)
+        javastack = os.environ.get("PRISM_JAVASTACKSIZE", DEFAULT_JAVASTACK)
+        prism_args = []
+        i = 0
+        while i < len(args):
+            if args[i] in ("-javamaxmem", "--javamaxmem") and i + 1 < len(args):
+                javamaxmem = args[i + 1]
+                i += 2
+            elif args[i] in ("-javastack", "--javastack") and i + 1 < len(args):
+                javastack = args[i + 1]
+                i += 2
+            else:
+                prism_args.append(args[i])
+                i += 1
+
+        return ([self.java, f"-Xmx{javamaxmem}", f"-Xss{javastack}"]
+                + (jvm_options or [])
+                + ["-Djava.awt.headless=true",
+                   f"-Djava.library.path={self.lib_dir}",
+                   "-classpath", os.pathsep.join(self.classpath),
+                   "prism.PrismCL"]
+                + prism_args)
+
+    def env(self) -> Dict[str, str]:
+        env = os.environ.copy()
+        env["PRISM_DIR"] = self.prism_dir
+        env[LIBRARY_PATH_VAR] = os.pathsep.join(filter(None, [self.lib_dir, env.get(LIBRARY_PATH_VAR)]))
+        return env
+
+    def is_current(self) -> bool:
+        """True if the archive exists and was built from the current jars."""
+        if not os.path.exists(self.archive_path):
+            return False
+        try:
+            with open(self.stamp_path, 'r') as f:
+                stamp = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        return stamp.get("fingerprint") == classpath_fingerprint(self.classpath)
+
+    def _dump_archive(self) -> bool:
+        result = subprocess.run(self.java_command([], ["-Xshare:dump",
+                                                       f"-XX:SharedClassListFile={self.class_list_path}",
+                                                       f"-XX:SharedArchiveFile={self.archive_path}"]),
+                                capture_output=True,
+                                text=True,
+                                env=self.env())
+        if result.returncode != 0 or not os.path.exists(self.archive_path):
+            print(f"Could not create the CDS archive: {result.stdout[-500:]}{result.stderr[-500:]}")
+            return False
+
+        with open(self.stamp_path, 'w') as f:
+            json.dump({
+                'fingerprint': classpath_fingerprint(self.classpath),
+                'created': time.time()
+            }, f, indent=2)
+        return True
+
+    def command(self, args: List[str]) -> Tuple[Optional[List[str]], bool]:
+        """
+        Java command for a PRISM job.
+
+        If the archive is missing or stale, the job itself becomes the training
+        run: it records the classes PRISM really loads, and finish_training()
+        must be called once it is done. Callers hold self.lock around a training run.
+
+        Returns:
+            The command (None if the CDS launcher cannot be used) and whether it is a training run
+        """
+        if not self.available:
+            return None, False
+        if self.is_current():
+            return self.java_command(args, [f"-XX:SharedArchiveFile={self.archive_path}", "-Xshare:auto"]), False
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        for path in (self.archive_path, self.stamp_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return self.java_command(args, [f"-XX:DumpLoadedClassList={self.class_list_path}"]), True
+
+    def finish_training(self):
+        """Dump the archive from the class list of a training run."""
+        if not self._dump_archive():
+            self.available = False
+
+    def run(self, args: List[str]) -> Optional[subprocess.CompletedProcess]:
+        """
+        Run a PRISM job, (re)building the archive first if it is missing or stale.
+
+        Returns:
+            The completed job, or None if the CDS launcher cannot be used
+        """
+        with self.lock:
+            cmd, training = self.command(args)
+            if cmd is None:
+                return None
+            if training:
+                try:
+                    result = subprocess.run(cmd, capture_output=True, text=True, env=self.env())
+                except OSError:
+                    self.available = False
+                    return None
+                self.finish_training()
+                return result
+
+        return subprocess.run(cmd, capture_output=True, text=True, env=self.env())
+
+
+_cds_launcher: Optional[CDSLauncher] = None
+
+
+def get_cds_launcher(prism_exec: str) -> CDSLauncher:
+    """CDS launcher for the installation behind the configured PRISM launcher."""
+    global _cds_launcher
+    prism_dir = prism_home(prism_exec)
+    if _cds_launcher is None or _cds_launcher.prism_dir != os.path.abspath(prism_dir or "."):
+        _cds_launcher = CDSLauncher(prism_dir)
+    return _cds_launcher
+
+
+def benchmark_startup(models_dir: str = "models", prism_exec: str = "prism", repeats: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Compare PRISM startup latency with and without the CDS archive.
+
+    Each model in models_dir is parsed (no property is checked, so the time is
+    dominated by JVM startup and class loading) with the plain launcher and
+    with the CDS launcher.
+
+    Args:
+        models_dir: Directory with the .nm files to load
+        prism_exec: The plain prism launcher
+        repeats: Launches per model and mode
+
+    Returns:
+        Dictionary mapping model name to mean plain/cds seconds and speedup
+    """
+    launcher = get_cds_launcher(prism_exec)
+    if not launcher.available:
+        print(f"CDS is not available for {prism_exec}: no PRISM installation found behind it")
+        return {}
+    results = {}
+
+    for model_path in sorted(glob.glob(os.path.join(models_dir, "*.nm"))):
+        model_path = os.path.abspath(model_path)
+        # Make sure the archive exists so the first CDS launch is not a training run
+        launcher.run([model_path])
+
+        plain, cds = [], []
+        for _ in range(repeats):
+            start = time.time()
+            subprocess.run([prism_exec, model_path], capture_output=True)
+            plain.append(time.time() - start)
+
+            start = time.time()
+            launcher.run([model_path])
+            cds.append(time.time() - start)
+
+        name = os.path.basename(model_path)[:-len(".nm")]
+        results[name] = {
+            'plain': statistics.mean(plain),
+            'cds': statistics.mean(cds),
+            'speedup': statistics.mean(plain) / statistics.mean(cds)
+        }
+        print(f"{name}: plain {results[name]['plain']:.3f}s, cds {results[name]['cds']:.3f}s, "
+              f"speedup {results[name]['speedup']:.2f}x")
+
+    return results
+
+
+if __name__ == "__main__":
+    from launcher import prism_executable
+    benchmark_startup(prism_exec=prism_executable())
@@ -0,0 +1,44 @@
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+
+class RefinementCheckpoint:
+    """
+    Refinement state of one experiment, saved in the benchmark database.
+
+    refine_bounds saves its intervals, best bounds and known verdicts after
+    every query, so an experiment killed by the watchdog resumes where it
+    stopped instead of repeating its PRISM runs. Checkpoints live in their own
+    table, keyed by the canonical CPI hash (see verdict_cache.cpi_hash): they
+    survive clean_stuck_rows, which deletes the unfinished experiment rows.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, key: str):
+        self.conn = conn
+        self.key = key
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS refinement_checkpoints (
+                cpi_hash TEXT PRIMARY KEY,
+                state TEXT,
+                updated REAL
+            )
+        ''')
+        conn.commit()
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Saved state, or None if there is none."""
+        row = self.conn.execute('SELECT state FROM refinement_checkpoints WHERE cpi_hash=?', (self.key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def save(self, state: Dict[str, Any]):
+        """Replace the saved state (committed at once, so it survives a kill)."""
+        self.conn.execute('INSERT OR REPLACE INTO refinement_checkpoints (cpi_hash, state, updated) VALUES (?, ?, ?)',
+                          (self.key, json.dumps(state, default=str), time.time()))
+        self.conn.commit()
+
+    def clear(self):
+        """Remove the saved state, once the refinement is complete."""
+        self.conn.execute('DELETE FROM refinement_checkpoints WHERE cpi_hash=?', (self.key,))
+        self.conn.commit()
@@ -1,5 +1,11 @@
+from collections import Counter
+
 import graphviz
-from cpi_to_mdp.translation import SPINtoPRISM, TransitionType
+from cpi_to_mdp.translation import SPINtoPRISM, Transition, TransitionType
+
+# Transitions that fire whenever their input places met their durations
+DETERMINISTIC_TYPES = (TransitionType.SINGLE, TransitionType.TASK,
+                       TransitionType.PARALLEL_SPLIT, TransitionType.PARALLEL_MERGE)
 
 
 class CPIToSPINConverter:
@@ -7,15 +13,17 @@ class CPIToSPINConverter:
     Converts CPI (Control Process Interface) format to SPIN model format.
     
     Efficient translation following BPMN+CPI pattern:
-    - Each region adds at most 2 places (entry and exit)
-    - Sequences add no intermediate places (direct connection)
+    - Each region gets its entry and exit places from its parent
+    - Sequences add 1 intermediate place, parallel regions 4, choices, natures and loops 2
     - Task input places get the task duration, all others have duration 0
+    (reduce_spin_model removes most of the places of duration 0)
     """
     
     def __init__(self):
         self.spin_model = SPINtoPRISM()
         self.place_counter = 0
         self.transition_counter = 0
+        self.pinned_places = set()
         
     def get_next_place_name(self, prefix="p"):
         """Generate next place name"""
@@ -37,6 +45,7 @@ class CPIToSPINConverter:
         self.place_counter = 0
         self.transition_counter = 0
         self.spin_model = SPINtoPRISM()
+        self.pinned_places = set()
         
         # Create initial place (duration 0)
         start_place = self.get_next_place_name("start")
@@ -115,8 +124,9 @@ class CPIToSPINConverter:
 
         Pattern: input --[split]--> branch1 --[merge]--> output
                                  \\--> branch2 ----/
-        Adds 2 places (one for each branch end)
+        Adds 4 places (the start and end of each branch)
         """
+        places_before = set(self.spin_model.places)
         split_name = self.get_next_transition_name(f"split{par_region['id']}")
         merge_name = self.get_next_transition_name(f"merge{par_region['id']}")
         
@@ -153,6 +163,11 @@ class CPIToSPINConverter:
             [first_end, second_end],
             [output_place]
         )
+
+        # Choices running alongside natures: keep the rounds in which the branches decide (see reduce_spin_model)
+        types = cpi_region_types(par_region)
+        if 'choice' in types and ('nature' in types or 'loop' in types):
+            self.pinned_places |= set(self.spin_model.places) - places_before
     
     def _convert_choice(self, choice_region, input_place, output_place):
         """Convert a choice region (non-deterministic choice)
@@ -255,6 +270,93 @@ class CPIToSPINConverter:
             probability=loop_region['probability']  # probability of repeating
         )
 
+    def reduce_spin_model(self) -> SPINtoPRISM:
+        """
+        Remove places of duration 0 from the last converted model, where the behaviour is unchanged.
+
+        A token entering a place of duration 0 moves on one activation round
+        later, in the same time step. Two reductions drop that round:
+        - A SINGLE transition (loop entry) whose input place has duration 0
+          and no other consumer is removed, and its input place is replaced
+          by its output place.
+        - A place of duration 0 between two deterministic transitions (task,
+          single, split, merge), its only producer and consumer, is removed
+          and the two transitions fused, when the consumer has no other input
+          or the producer no other output. The fused transition fires when
+          the consumer would have, in the same time step. At most one of
+          them may be a task, whose impacts the fused transition keeps.
+        Choices and natures never fuse, so they branch in the same states.
+
+        Dropping rounds moves the later choices and natures of a branch to
+        earlier rounds of the same time step. This only matters when another
+        branch of a parallel region can run a nature in between, whose
+        outcome a choice might then no longer see: the places created inside
+        parallel regions with both choices and natures (or loops) are kept.
+
+        Returns:
+            The reduced model (also the converter's spin_model)
+        """
+        model = self.spin_model
+        reduced = True
+        while reduced:
+            reduced = False
+            for place_name in model.get_sorted_places():
+                place = model.places[place_name]
+                if place.duration != 0 or place_name in self.pinned_places:
+                    continue
+                producers = [t for t in model.transitions if place_name in t.output_places]
+                consumers = [t for t in model.transitions if place_name in t.input_places]
+                if len(consumers) != 1:
+                    continue
+                if (consumers[0].type == TransitionType.SINGLE and
+                        consumers[0].output_places[0] not in self.pinned_places):
+                    self._bypass_single(consumers[0], producers)
+                    reduced = True
+                    break
+                if (len(producers) == 1 and not place.is_initial and
+                        self._fuse_transitions(producers[0], consumers[0], place_name)):
+                    reduced = True
+                    break
+        return model
+
+    def _bypass_single(self, single, producers):
+        """Remove a SINGLE transition, replacing its input place by its output place"""
+        model = self.spin_model
+        p_in, p_out = single.input_places[0], single.output_places[0]
+        for producer in producers:
+            producer.output_places = [p_out if p == p_in else p for p in producer.output_places]
+        if model.places[p_in].is_initial:
+            model.places[p_out].is_initial = True
+            model.initial_place = p_out
+        model.transitions.remove(single)
+        del model.places[p_in]
+
+    def _fuse_transitions(self, producer, consumer, place_name):
+        """Fuse the only producer and consumer of a place into one transition, if allowed (see reduce_spin_model)"""
+        if (producer is consumer or producer.type not in DETERMINISTIC_TYPES or
+                consumer.type not in DETERMINISTIC_TYPES or
+                (producer.type == TransitionType.TASK and consumer.type == TransitionType.TASK) or
+                (consumer.input_places != [place_name] and producer.output_places != [place_name])):
+            return False
+        model = self.spin_model
+        inputs = producer.input_places + [p for p in consumer.input_places if p != place_name]
+        outputs = [p for p in producer.output_places if p != place_name] + consumer.output_places
+        task = consumer if consumer.type == TransitionType.TASK else producer
+        if task.type == TransitionType.TASK:
+            type_ = TransitionType.TASK
+        elif len(outputs) > 1:
+            type_ = TransitionType.PARALLEL_SPLIT
+        elif len(inputs) > 1:
+            type_ = TransitionType.PARALLEL_MERGE
+        else:
+            type_ = TransitionType.SINGLE
+        fused = Transition(task.name, type_, inputs, outputs,
+                           impact_vector=list(task.impact_vector) if type_ == TransitionType.TASK else [])
+        model.transitions[model.transitions.index(producer)] = fused
+        model.transitions.remove(consumer)
+        del model.places[place_name]
+        return True
+
 
 
 
@@ -419,6 +521,15 @@ def analyze_cpi_structure(region, depth=0):
         analyze_cpi_structure(region['false'], depth + 2)
 
 
+# Region types in CPI
+def cpi_region_types(region):
+    """Types of the region and all its subregions"""
+    types = {region['type']}
+    for key in ('head', 'tail', 'first_split', 'second_split', 'true', 'false', 'child'):
+        if key in region:
+            types |= cpi_region_types(region[key])
+    return types
+
 # Count regions in CPI
 def count_cpi_regions(region):
     count = 1
@@ -452,3 +563,125 @@ def count_cpi_tasks(region):
     return count
 
 
+
+
+# Upper bound on the markings of the SPIN encoding: token positions and place clocks
+def count_spin_markings(region):
+    """
+    Configurations of the places of a region while its token is inside it.
+
+    The entry place belongs to the region, the exit place to its successor.
+    A task waits on its entry place for duration+1 clock values; the branches
+    of a parallel region run independently (each also waiting at its end
+    place), so they multiply; choice and nature branches are alternatives, so
+    they add. A loop body reaches the same configurations on every iteration,
+    so a loop adds its entry and decision places instead of scaling.
+    """
+    if region['type'] == 'task':
+        return region['duration'] + 1
+    if region['type'] == 'sequence':
+        return count_spin_markings(region['head']) + count_spin_markings(region['tail'])
+    if region['type'] == 'parallel':
+        return 1 + (count_spin_markings(region['first_split']) + 1) * (count_spin_markings(region['second_split']) + 1)
+    if region['type'] in ['choice', 'nature']:
+        return 1 + count_spin_markings(region['true']) + count_spin_markings(region['false'])
+    if region['type'] == 'loop':
+        return 2 + count_spin_markings(region['child'])
+    raise ValueError(f"Unknown region type: {region['type']}")
+
+# Upper bound on the joint region states of the legacy encoding (process_to_mdp)
+def count_legacy_configurations(region):
+    """
+    Joint states of the region modules of a subtree from its start to its completion.
+
+    Every region goes through started (2), running (3) and completing (4);
+    a task runs for duration-1 steps in state 3. Before its start a child is
+    open (1), after its completion it is completed (5), and the branch not
+    taken by a choice or nature is disabled (0).
+    """
+    if region['type'] == 'task':
+        return max(region['duration'], 1) + 1
+    if region['type'] == 'sequence':
+        return count_legacy_configurations(region['head']) + count_legacy_configurations(region['tail']) + 4
+    if region['type'] == 'parallel':
+        return (count_legacy_configurations(region['first_split']) + 2) * (count_legacy_configurations(region['second_split']) + 2) + 2
+    if region['type'] in ['choice', 'nature']:
+        return 2 * (count_legacy_configurations(region['true']) + count_legacy_configurations(region['false'])) + 6
+    raise ValueError(f"The legacy encoding does not support {region['type']} regions")
+
+def spin_timeline(region):
+    """
+    Configurations of a region per clock value since its token entered it, and its possible exit times.
+
+    Without loops the clock orders the configurations: a task only holds its
+    token for clock values 0..duration, and a parallel branch that finished
+    waits at its end place, so the configurations of a parallel region at a
+    clock value are the products of its branches at that value. This bounds
+    count_spin_markings much more tightly when parallel branches are long.
+
+    Returns:
+        (Counter of clock value to configurations, set of exit times), or None if the region contains a loop
+    """
+    if region['type'] == 'task':
+        return Counter(range(region['duration'] + 1)), {region['duration']}
+    if region['type'] == 'loop':
+        return None
+    if region['type'] == 'sequence':
+        head, tail = spin_timeline(region['head']), spin_timeline(region['tail'])
+        if head is None or tail is None:
+            return None
+        profile = Counter(head[0])
+        for exit_time in head[1]:
+            profile.update({clock + exit_time: count for clock, count in tail[0].items()})
+        return profile, {first + second for first in head[1] for second in tail[1]}
+    if region['type'] in ['choice', 'nature']:
+        first, second = spin_timeline(region['true']), spin_timeline(region['false'])
+        if first is None or second is None:
+            return None
+        return Counter({0: 1}) + first[0] + second[0], first[1] | second[1]
+    if region['type'] == 'parallel':
+        first, second = spin_timeline(region['first_split']), spin_timeline(region['second_split'])
+        if first is None or second is None:
+            return None
+        def branch(timeline, clock):
+            # Still running, or waiting at the end place once it may have finished
+            return timeline[0][clock] + (clock >= min(timeline[1]))
+        end = max(max(first[1]), max(second[1]))
+        profile = Counter({clock: branch(first, clock) * branch(second, clock) for clock in range(end + 1)})
+        profile[0] += 1
+        return profile, {max(a, b) for a in first[1] for b in second[1]}
+    raise ValueError(f"Unknown region type: {region['type']}")
+
+def estimate_state_space(cpi_dict, encoding="lean"):
+    """
+    Upper bound on the reachable states of the PRISM model of a CPI, without building it.
+
+    Lean encoding (what etl.cpi_to_model writes): the net after
+    reduce_spin_model with a synchronous tick. Each marking is followed by
+    at most one activation and one firing state per transition, plus the
+    stage changes. The markings are bounded by spin_timeline when the CPI has
+    no loops, by count_spin_markings otherwise.
+    Verbose encoding (generate_prism_model()): the unreduced net, whose
+    manager also sweeps every place (clock update, then reset).
+    Legacy encoding: open and completed regions are implicit, so the root's
+    configurations plus its open and completed states are the bound.
+
+    Args:
+        cpi_dict: CPI dictionary
+        encoding: "lean", "verbose" (translation.SPINtoPRISM) or "legacy" (process_to_mdp.cpi_to_mdp)
+
+    Returns:
+        Upper bound on the number of states
+    """
+    if encoding == "legacy":
+        return count_legacy_configurations(cpi_dict) + 2
+
+    converter = CPIToSPINConverter()
+    spin_model = converter.convert_cpi_to_spin(cpi_dict)
+    markings = count_spin_markings(cpi_dict)
+    if encoding == "verbose":
+        return (markings + 1) * (2 * len(spin_model.transitions) + 2 * len(spin_model.places) + 4) # End place
+    timeline = spin_timeline(cpi_dict)
+    if timeline is not None:
+        markings = min(markings, sum(timeline[0].values()))
+    return (markings + 1) * (2 * len(converter.reduce_spin_model().transitions) + 4) # End place
@@ -4,13 +4,15 @@ from cpi_to_mdp.cpitospin import CPIToSPINConverter
 from cpi_to_mdp.process_to_mdp import cpi_to_mdp
 
 
-def cpi_to_model(filename):
+def cpi_to_model(filename, lean=True):
     """
     Converts a CPI file to a PRISM model and saves it in the models subfolder.
     
     Args:
         filename (str): Name of the CPI file (with or without .cpi extension)
-        include_rewards (bool): Whether to include reward structures in the output (default: True)
+        lean (bool): Emit only what model checking needs, without labels, the STAGE 3/1 microsteps or
+            the places of duration 0 that CPIToSPINConverter.reduce_spin_model removes (default: True);
+            False writes the verbose debug model read by the notebook (see SPINtoPRISM.generate_prism_model)
         
     Returns:
         str: Path to the generated model file, or None if there was an error
@@ -33,12 +35,15 @@ def cpi_to_model(filename):
             cpi_dict = json.load(f)
 
         try:
-            prism_model = cpi_to_mdp(cpi_dict)
+            prism_model = cpi_to_mdp(cpi_dict, with_labels=not lean)
         except ValueError as e:
             #print(f"Loops detected in CPI file {input_path}: {str(e)}")
             
-            spin_model = CPIToSPINConverter().convert_cpi_to_spin(cpi_dict)
-            prism_model = spin_model.generate_prism_model()
+            converter = CPIToSPINConverter()
+            spin_model = converter.convert_cpi_to_spin(cpi_dict)
+            if lean:
+                spin_model = converter.reduce_spin_model()
+            prism_model = spin_model.generate_prism_model(lean=lean, synchronous_tick=lean)
 
         with open(output_path, 'w') as f:
             f.write(prism_model)
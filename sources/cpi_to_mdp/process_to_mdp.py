@@ -10,12 +10,13 @@ from parent_info import get_parent_info
 from rewards_generators import generate_rewards, integrate_rewards_to_mdp
 
 
-def cpi_to_mdp(root_dict):
+def cpi_to_mdp(root_dict, with_labels=True):
     """
     Convert a CPI (Configurable Process Instance) dictionary to an MDP (Markov Decision Process) model.
     
     Args:
         root_dict (dict): The root CPI dictionary containing the process structure
+        with_labels (bool): Repeat every formula as a label, for the simulator (property checks need none)
         
     Returns:
         str: The PRISM model as a string in .nm format
@@ -112,6 +113,10 @@ def cpi_to_mdp(root_dict):
         modules.extend(generate_module(region, root_dict, regions))
         modules.append("")
     
+    if not with_labels:
+        mdp_content = '\n'.join(formulas + modules)
+        return integrate_rewards_to_mdp(mdp_content, generate_rewards(root_dict))
+
     # Generate labels
     labels = ["\n// Labels for formulas"]
     
@@ -59,8 +59,37 @@ class SPINtoPRISM:
         """Get transitions sorted lexicographically by name"""
         return sorted(self.transitions, key=lambda t: t.name)
         
-    def generate_prism_variables(self) -> str:
-        """Generate PRISM global variables for places"""
+    def compact(self) -> 'SPINtoPRISM':
+        """
+        Copy of the model with short place and transition names (p0, p1, ..., t0, t1, ...).
+
+        The names are numbered in sorted order and zero-padded, so every
+        sorted sweep of the encoding visits the places and transitions in the
+        same order as in the original model.
+        """
+        places = self.get_sorted_places()
+        transitions = self.get_sorted_transitions()
+        place_names = {name: f"p{i:0{len(str(len(places)))}d}" for i, name in enumerate(places)}
+        transition_width = len(str(len(transitions)))
+        model = SPINtoPRISM()
+        for name in places:
+            place = self.places[name]
+            model.add_place(place_names[name], place.duration, place.is_initial)
+        for i, transition in enumerate(transitions):
+            model.add_transition(f"t{i:0{transition_width}d}", transition.type,
+                                 [place_names[p] for p in transition.input_places],
+                                 [place_names[p] for p in transition.output_places],
+                                 transition.probability, list(transition.impact_vector))
+        return model
+
+    def generate_prism_variables(self, synchronous_tick: bool = False, maximal_step: bool = False) -> str:
+        """
+        Generate PRISM global variables for places.
+
+        Args:
+            synchronous_tick: Without the _updated flags (see generate_manager_module)
+            maximal_step: With the pending flags of choices and natures (see generate_maximal_step_commands)
+        """
         lines = ["mdp \n"]
         lines.append("// Global variables for places")
         
@@ -74,7 +103,17 @@ class SPINtoPRISM:
             place = self.places[place_name]
             init_value = 0 if place.is_initial else -1
             lines.append(f"global {place_name}_value : [-1..{place.duration}] init {init_value};")
+
+        if maximal_step:
+            lines.append("")
+            lines.append("// Pending choice and nature variables")
+            for transition in self.get_sorted_transitions():
+                if transition.type in (TransitionType.CHOICE, TransitionType.NATURE):
+                    lines.append(f"global {transition.name}_state : [0..1] init 0;")
         
+        if synchronous_tick:
+            return "\n".join(lines)
+
         lines.append("")
         
         # All place_updated variables
@@ -111,6 +150,55 @@ class SPINtoPRISM:
         
         return "\n".join(lines)
 
+    def generate_grouped_reward_structures(self) -> str:
+        """
+        Generate PRISM reward structures for impacts, one item per distinct value.
+
+        A task fires (generate_transition_modules) in the STAGE 0 states where
+        it is the first idle transition and its input place met its duration,
+        and that command is the only one enabled there. Rewarding the
+        unlabeled transitions of those states is equivalent to rewarding the
+        fire_ action, and the conditions are mutually exclusive, so tasks with
+        the same impact share one item. (Multi-objective queries need
+        transition rewards, so these are not state rewards.)
+        """
+        lines = []
+        for i in range(self.get_impact_dimensions()):
+            lines.append(f'rewards "impact_{i}"')
+            groups: Dict[float, List[str]] = {}
+            for transition in self.get_sorted_transitions():
+                if (transition.type == TransitionType.TASK and
+                    i < len(transition.impact_vector) and
+                    transition.impact_vector[i] != 0):
+                    groups.setdefault(transition.impact_vector[i], []).append(
+                        f"psi_idle_{transition.name} & is_active_{transition.name}")
+            for value, conditions in groups.items():
+                lines.append(f"  [] STAGE=0 & ({' | '.join(conditions)}) : {value};")
+            lines.append("endrewards")
+            lines.append("")
+        return "\n".join(lines)
+
+    def generate_step_reward_structures(self) -> str:
+        """
+        Generate PRISM reward structures for impacts of the maximal step encoding.
+
+        The tasks fire in the STAGE 0 command of generate_maximal_step_commands,
+        the only one enabled where they are active; several tasks can fire
+        together, and PRISM adds up the items that hold, so each task has its
+        own item.
+        """
+        lines = []
+        for i in range(self.get_impact_dimensions()):
+            lines.append(f'rewards "impact_{i}"')
+            for transition in self.get_sorted_transitions():
+                if (transition.type == TransitionType.TASK and
+                    i < len(transition.impact_vector) and
+                    transition.impact_vector[i] != 0):
+                    lines.append(f"  [] STAGE=0 & !psi_step & is_active_{transition.name} : {transition.impact_vector[i]};")
+            lines.append("endrewards")
+            lines.append("")
+        return "\n".join(lines)
+
     def get_impact_dimensions(self) -> int:
         """Get the number of impact dimensions from transitions"""
         max_dims = 0
@@ -119,37 +207,56 @@ class SPINtoPRISM:
                 max_dims = max(max_dims, len(transition.impact_vector))
         return max_dims
 
-    def generate_manager_module(self) -> str:
-        """Generate the manager module"""
+    def generate_manager_module(self, synchronous_tick: bool = False, maximal_step: bool = False) -> str:
+        """
+        Generate the manager module.
+
+        Args:
+            synchronous_tick: Advance all the places of a time step in one command, instead of
+                sweeping them one by one through STAGE 3 and resetting their _updated flags
+                through STAGE 1. The sweep makes no choice and collects no reward, so both
+                encodings have the same rewards and verdicts
+            maximal_step: Fire the active transitions in one command (see generate_maximal_step_commands)
+        """
         lines = ["module manager"]
         
         # Stage transitions
-        lines.append("  // Stage 0 -> 3: Can do step")
-        lines.append("  [] STAGE=0 & psi_step -> (STAGE'=3);")
+        if synchronous_tick:
+            updates = [f"({name}_value'=({name}_value>=0 & {name}_value<{self.places[name].duration}) ? {name}_value+1 : {name}_value)"
+                       for name in self.get_sorted_places() if self.places[name].duration > 0]
+            lines.append("  // Stage 0: Step, every place with a token advances")
+            lines.append(f"  [] STAGE=0 & psi_step -> {' & '.join(updates) or 'true'};")
+        else:
+            lines.append("  // Stage 0 -> 3: Can do step")
+            lines.append("  [] STAGE=0 & psi_step -> (STAGE'=3);")
         
-        lines.append("  // Stage 0 -> 2: Terminated")
-        lines.append("  [] STAGE=0 & !psi_step & psi_noone_idle & !psi_atleastone_active -> (STAGE'=2);")
+        if maximal_step:
+            lines += self.generate_maximal_step_commands()
+        else:
+            lines.append("  // Stage 0 -> 2: Terminated")
+            lines.append("  [] STAGE=0 & !psi_step & psi_noone_idle & !psi_atleastone_active -> (STAGE'=2);")
         
-        lines.append("  // Stage 0 -> 4: Fire transitions (FIXED: added psi_noone_idle)")
-        lines.append("  [] STAGE=0 & !psi_step & psi_noone_idle & psi_atleastone_active -> (STAGE'=4);")
+            lines.append("  // Stage 0 -> 4: Fire transitions (FIXED: added psi_noone_idle)")
+            lines.append("  [] STAGE=0 & !psi_step & psi_noone_idle & psi_atleastone_active -> (STAGE'=4);")
         
         # Stage 3: Update places
-        for place_name in self.get_sorted_places():
+        for place_name in ([] if synchronous_tick else self.get_sorted_places()):
             place = self.places[place_name]
             lines.append(f"  // Update {place_name}")
             lines.append(f"  [] STAGE=3 & step_updated_{place_name} & {place_name}_value=-1 -> ({place_name}_updated'=1);")
             lines.append(f"  [] STAGE=3 & step_updated_{place_name} & {place_name}_value>=0 & {place_name}_value<{place.duration} -> ({place_name}_value'={place_name}_value+1) & ({place_name}_updated'=1);")
             lines.append(f"  [] STAGE=3 & step_updated_{place_name} & {place_name}_value={place.duration} -> ({place_name}_updated'=1);")
             
-        lines.append("  // Stage 3 -> 1: All updated")
-        lines.append("  [] STAGE=3 & psi_all_step_updated -> (STAGE'=1);")
+        if not synchronous_tick:
+            lines.append("  // Stage 3 -> 1: All updated")
+            lines.append("  [] STAGE=3 & psi_all_step_updated -> (STAGE'=1);")
         
-        # Stage 1: Reset updated flags
-        for place_name in self.get_sorted_places():
-            lines.append(f"  [] STAGE=1 & step_not_updated_{place_name} -> ({place_name}_updated'=0);")
+            # Stage 1: Reset updated flags
+            for place_name in self.get_sorted_places():
+                lines.append(f"  [] STAGE=1 & step_not_updated_{place_name} -> ({place_name}_updated'=0);")
             
-        lines.append("  // Stage 1 -> 0: All reset")
-        lines.append("  [] STAGE=1 & psi_all_step_not_updated -> (STAGE'=0);")
+            lines.append("  // Stage 1 -> 0: All reset")
+            lines.append("  [] STAGE=1 & psi_all_step_not_updated -> (STAGE'=0);")
         
         # Stage 4 -> 5: All non-nature transitions processed
         # Check if nature is present
@@ -159,7 +266,9 @@ class SPINtoPRISM:
                 natures_exists = True
                 break
 
-        if natures_exists:
+        if maximal_step:
+            pass # Stage changes in generate_maximal_step_commands
+        elif natures_exists:
             lines.append("  [] STAGE=4 & psi_all_idle_but_nature -> (STAGE'=5);")
             lines.append("  [] STAGE=5 & psi_all_idle_nature -> (STAGE'=0);")
         else:
@@ -168,11 +277,94 @@ class SPINtoPRISM:
         lines.append("endmodule")
         return "\n".join(lines)
     
-    def generate_transition_modules(self) -> str:
-        """Generate modules for transitions"""
+    def generate_maximal_step_commands(self) -> List[str]:
+        """
+        Manager commands firing all the active transitions of STAGE 0 at once.
+
+        The SPIN encoding decides the activation of the transitions one by one
+        in STAGE 0 and fires them one by one in STAGES 4 and 5. Here a single
+        command consumes and produces the tokens of every active task, single,
+        split and merge, and marks the active choices and natures as pending;
+        these still fire one by one in STAGE 4 (choices) and STAGE 5 (natures),
+        in name order, before the next activation. So the choices of a round
+        are made before the outcomes of its natures, and the transitions they
+        enable wait for the next round, as in the SPIN encoding.
+
+        Firing at once requires that no two transitions share an input place
+        (the nets of CPIToSPINConverter never do).
+
+        Returns:
+            The command lines (the reward items are in generate_step_reward_structures)
+
+        Raises:
+            ValueError: If two transitions share an input place
+        """
+        transitions = self.get_sorted_transitions()
+        consumers: Dict[str, Transition] = {}
+        for transition in transitions:
+            for p_in in transition.input_places:
+                if p_in in consumers:
+                    raise ValueError(f"Transitions {consumers[p_in].name} and {transition.name} conflict on place {p_in}")
+                consumers[p_in] = transition
+        choices = [t.name for t in transitions if t.type == TransitionType.CHOICE]
+        natures = [t.name for t in transitions if t.type == TransitionType.NATURE]
+        producers: Dict[str, List[str]] = {}
+        for transition in transitions:
+            if transition.name not in choices + natures:
+                for p_out in transition.output_places:
+                    producers.setdefault(p_out, []).append(transition.name)
+
+        def any_active(names: List[str]) -> str:
+            condition = " | ".join(f"is_active_{name}" for name in names)
+            return f"({condition})" if len(names) > 1 else condition
+
+        updates = []
+        for place_name in self.get_sorted_places():
+            consumer = consumers.get(place_name)
+            consumed = consumer is not None and consumer.name not in choices + natures
+            value = f"is_active_{consumer.name} ? -1 : {place_name}_value" if consumed else f"{place_name}_value"
+            if place_name in producers:
+                value = f"{any_active(producers[place_name])} ? 0 : " + (f"({value})" if consumed else value)
+            if value != f"{place_name}_value":
+                updates.append(f"({place_name}_value'={value})")
+        for name in choices + natures:
+            updates.append(f"({name}_state'=is_active_{name} ? 1 : 0)")
+        next_stage = "0"
+        if natures:
+            next_stage = f"{any_active(natures)} ? 5 : {next_stage}"
+        if choices:
+            next_stage = f"{any_active(choices)} ? 4 : " + (f"({next_stage})" if natures else next_stage)
+        if next_stage != "0":
+            updates.insert(0, f"(STAGE'={next_stage})")
+
+        lines = ["  // Stage 0 -> 2: Terminated"]
+        lines.append("  [] STAGE=0 & !psi_step & !psi_atleastone_active -> (STAGE'=2);")
+        lines.append("  // Stage 0: Fire every active transition, choices and natures become pending")
+        lines.append(f"  [] STAGE=0 & !psi_step & psi_atleastone_active -> {' & '.join(updates)};")
+        if choices:
+            lines.append("  // Stage 4 -> 5 or 0: All pending choices fired")
+            after_choices = "psi_all_idle_nature ? 0 : 5" if natures else "0"
+            lines.append(f"  [] STAGE=4 & psi_all_idle_but_nature -> (STAGE'={after_choices});")
+        if natures:
+            lines.append("  // Stage 5 -> 0: All pending natures fired")
+            lines.append("  [] STAGE=5 & psi_all_idle_nature -> (STAGE'=0);")
+        return lines
+
+    def generate_transition_modules(self, fire_actions: bool = True, maximal_step: bool = False) -> str:
+        """
+        Generate modules for transitions.
+
+        Args:
+            fire_actions: Label the firing decision of tasks, for action rewards
+            maximal_step: Only the firing of pending choices and natures (see generate_maximal_step_commands)
+        """
         lines = []
         
         for transition in self.get_sorted_transitions():
+            if maximal_step:
+                if transition.type in (TransitionType.CHOICE, TransitionType.NATURE):
+                    lines += self.pending_firing_module(transition)
+                continue
             lines.append(f"module {transition.name}")
             lines.append(f"  {transition.name}_state : [-1..1] init 0;")
             
@@ -188,7 +380,7 @@ class SPINtoPRISM:
             all_duration_met = " & ".join(duration_conditions)
             
             # Rule 1: LABEL HERE for TASK transitions (decision to fire)
-            if transition.type == TransitionType.TASK:
+            if transition.type == TransitionType.TASK and fire_actions:
                 action_label = f"[fire_{transition.name}]"
             else:
                 action_label = "[]"
@@ -204,22 +396,15 @@ class SPINtoPRISM:
                 lines.append(f"  [] STAGE=4 & psi_first_but_nature_not_idle_{transition.name} & {transition.name}_state=-1 -> ({transition.name}_state'=0);")
                 
                 # Fire transition based on type - NO LABELS (mechanical execution)
-                if transition.type == TransitionType.SINGLE or transition.type == TransitionType.TASK:
-                    p_in = transition.input_places[0]
-                    p_out = transition.output_places[0]
-                    lines.append(f"  [] STAGE=4 & psi_first_but_nature_not_idle_{transition.name} & {transition.name}_state=1 -> ({transition.name}_state'=0) & ({p_in}_value'=-1) & ({p_out}_value'=0);")
+                if transition.type != TransitionType.CHOICE:
+                    # Single, task, split and merge: consume every input, mark every output
+                    # (any number of them, see CPIToSPINConverter.reduce_spin_model)
+                    updates = [f"({p_in}_value'=-1)" for p_in in transition.input_places]
+                    updates += [f"({p_out}_value'=0)" for p_out in transition.output_places]
+                    lines.append(f"  [] STAGE=4 & psi_first_but_nature_not_idle_{transition.name} & {transition.name}_state=1 -> ({transition.name}_state'=0) & {' & '.join(updates)};")
                     
-                elif transition.type == TransitionType.PARALLEL_SPLIT:
-                    p_in = transition.input_places[0]
-                    p_out1, p_out2 = transition.output_places
-                    lines.append(f"  [] STAGE=4 & psi_first_but_nature_not_idle_{transition.name} & {transition.name}_state=1 -> ({transition.name}_state'=0) & ({p_in}_value'=-1) & ({p_out1}_value'=0) & ({p_out2}_value'=0);")
-                    
-                elif transition.type == TransitionType.PARALLEL_MERGE:
-                    p_in1, p_in2 = transition.input_places
-                    p_out = transition.output_places[0]
-                    lines.append(f"  [] STAGE=4 & psi_first_but_nature_not_idle_{transition.name} & {transition.name}_state=1 -> ({transition.name}_state'=0) & ({p_in1}_value'=-1) & ({p_in2}_value'=-1) & ({p_out}_value'=0);")
-                    
-                elif transition.type == TransitionType.CHOICE:
+                else:
+                    # Choice: one command per branch
                     p_in = transition.input_places[0]
                     p_true, p_false = transition.output_places
                     lines.append(f"  [] STAGE=4 & psi_first_but_nature_not_idle_{transition.name} & {transition.name}_state=1 -> ({transition.name}_state'=0) & ({p_in}_value'=-1) & ({p_true}_value'=0);")
@@ -240,13 +425,66 @@ class SPINtoPRISM:
             lines.append("")
             
         return "\n".join(lines)
-        
-    def generate_formulas(self) -> str:
-        """Generate PRISM formulas and labels"""
+
+    @staticmethod
+    def pending_firing_module(transition: Transition) -> List[str]:
+        """Module firing a pending choice (STAGE 4) or nature (STAGE 5) of the maximal step encoding"""
+        p_in = transition.input_places[0]
+        p_true, p_false = transition.output_places
+        name = transition.name
+        if transition.type == TransitionType.CHOICE:
+            guard = f"STAGE=4 & psi_first_but_nature_not_idle_{name}"
+            return [f"module {name}",
+                    f"  [] {guard} -> ({name}_state'=0) & ({p_in}_value'=-1) & ({p_true}_value'=0);",
+                    f"  [] {guard} -> ({name}_state'=0) & ({p_in}_value'=-1) & ({p_false}_value'=0);",
+                    "endmodule", ""]
+        prob = transition.probability
+        return [f"module {name}",
+                f"  [] STAGE=5 & psi_first_nature_not_idle_{name} -> {prob}: ({name}_state'=0) & ({p_true}_value'=0) & ({p_in}_value'=-1) + {1-prob}: ({name}_state'=0) & ({p_false}_value'=0) & ({p_in}_value'=-1);",
+                "endmodule", ""]
+        
+    @staticmethod
+    def ordered_formulas(name: str, items: List[str], current: str, done: str) -> Tuple[List[str], str]:
+        """
+        Formulas selecting the first item of an ordered sweep that is not done yet.
+
+        name_<item> holds when current holds for the item and done holds for
+        every earlier one.
+
+        Args:
+            name: Prefix of the selecting formulas
+            items: Item names, in sweep order
+            current, done: Conditions on an item, with {} in place of its name
+
+        Returns:
+            The formula lines, and the condition that every item is done
+        """
+        lines = []
+        for i, item in enumerate(items):
+            prefix = " & ".join(done.format(earlier) for earlier in items[:i])
+            condition = current.format(item) + (f" & {prefix}" if prefix else "")
+            lines.append(f"formula {name}_{item} = {condition};")
+        return lines, " & ".join(done.format(item) for item in items) or "true"
+
+    def generate_formulas(self, labels: bool = True, synchronous_tick: bool = False,
+                          maximal_step: bool = False) -> str:
+        """
+        Generate PRISM formulas and labels.
+
+        Args:
+            labels: Add a label for every formula, stage, transition state and place state
+                (used by the simulator; property checks need none)
+            synchronous_tick: Leave out the formulas and labels of the _updated flags
+                (see generate_manager_module)
+            maximal_step: Leave out the activation order of the transitions, and order only the
+                pending choices and natures (see generate_maximal_step_commands)
+        """
         lines = ["// Formulas"]
-        
+        places = self.get_sorted_places()
+        transitions = self.get_sorted_transitions()
+
         # is_active formulas for each transition
-        for transition in self.get_sorted_transitions():
+        for transition in transitions:
             conditions = []
             for p_in in transition.input_places:
                 place = self.places[p_in]
@@ -255,85 +493,64 @@ class SPINtoPRISM:
         
         # psi_at_least_one_remaining_duration: at least one place has a token but hasn't met its duration
         remaining_duration_conditions = []
-        for place_name in self.get_sorted_places():
+        for place_name in places:
             place = self.places[place_name]
             remaining_duration_conditions.append(f"({place_name}_value >= 0 & {place_name}_value < {place.duration})")
         lines.append(f"formula psi_at_least_one_remaining_duration = {' | '.join(remaining_duration_conditions)};")
         
         # psi_step formula (MODIFIED): no transitions active AND at least one place can advance
-        not_active_conditions = [f"!is_active_{t.name}" for t in self.get_sorted_transitions()]
+        not_active_conditions = [f"!is_active_{t.name}" for t in transitions]
         lines.append(f"formula psi_step = ({' & '.join(not_active_conditions)}) & psi_at_least_one_remaining_duration;")
         
-        # Step update formulas for places
-        for i, place_name in enumerate(self.get_sorted_places()):
-            if i == 0:
-                lines.append(f"formula step_updated_{place_name} = {place_name}_updated=0;")
-            else:
-                prev_conditions = [f"{p}_updated=1" for p in self.get_sorted_places()[:i]]
-                lines.append(f"formula step_updated_{place_name} = {place_name}_updated=0 & {' & '.join(prev_conditions)};")
-                
-        # All step updated formula
-        all_updated = [f"{p}_updated=1" for p in self.get_sorted_places()]
-        lines.append(f"formula psi_all_step_updated = {' & '.join(all_updated)};")
-        
-        # Step not updated formulas
-        for i, place_name in enumerate(self.get_sorted_places()):
-            if i == 0:
-                lines.append(f"formula step_not_updated_{place_name} = {place_name}_updated=1;")
-            else:
-                prev_conditions = [f"{p}_updated=0" for p in self.get_sorted_places()[:i]]
-                lines.append(f"formula step_not_updated_{place_name} = {place_name}_updated=1 & {' & '.join(prev_conditions)};")
-                
-        # All step not updated formula
-        all_not_updated = [f"{p}_updated=0" for p in self.get_sorted_places()]
-        lines.append(f"formula psi_all_step_not_updated = {' & '.join(all_not_updated)};")
+        if not synchronous_tick:
+            # Step update formulas for places
+            formulas, all_updated = self.ordered_formulas("step_updated", places, "{}_updated=0", "{}_updated=1")
+            lines += formulas
+            lines.append(f"formula psi_all_step_updated = {all_updated};")
+        
+            # Step not updated formulas
+            formulas, all_not_updated = self.ordered_formulas("step_not_updated", places,
+                                                              "{}_updated=1", "{}_updated=0")
+            lines += formulas
+            lines.append(f"formula psi_all_step_not_updated = {all_not_updated};")
         
         # FIXED: Generate psi_idle formulas with proper ordering (psi_first_idle pattern)
-        all_transitions = self.get_sorted_transitions()
-        for i, transition in enumerate(all_transitions):
-            if i == 0:
-                lines.append(f"formula psi_idle_{transition.name} = !psi_step & {transition.name}_state=0;")
-            else:
-                prev_conditions = [f"{t.name}_state!=0" for t in all_transitions[:i]]
-                lines.append(f"formula psi_idle_{transition.name} = !psi_step & {transition.name}_state=0 & {' & '.join(prev_conditions)};")
+        formulas, noone_idle = self.ordered_formulas("psi_idle", [t.name for t in transitions],
+                                                     "!psi_step & {}_state=0", "{}_state!=0")
+        if not maximal_step:
+            lines += formulas
         
-        # Transition ordering formulas
-        non_nature_transitions = [t for t in self.get_sorted_transitions() if t.type != TransitionType.NATURE]
-        nature_transitions = [t for t in self.get_sorted_transitions() if t.type == TransitionType.NATURE]
+        # Transition ordering formulas (only the pending choices have a state in the maximal step encoding)
+        non_nature_transitions = [t for t in transitions if t.type != TransitionType.NATURE and
+                                  (not maximal_step or t.type == TransitionType.CHOICE)]
+        nature_transitions = [t for t in transitions if t.type == TransitionType.NATURE]
         
         # Ordering formulas for non-nature transitions        
-        for i, transition in enumerate(non_nature_transitions):
-            if i == 0:
-                lines.append(f"formula psi_first_but_nature_not_idle_{transition.name} = {transition.name}_state!=0;")
-            else:
-                prev_conditions = [f"{t.name}_state=0" for t in non_nature_transitions[:i]]
-                lines.append(f"formula psi_first_but_nature_not_idle_{transition.name} = {transition.name}_state!=0 & {' & '.join(prev_conditions)};")
+        formulas, all_idle_but_nature = self.ordered_formulas(
+            "psi_first_but_nature_not_idle", [t.name for t in non_nature_transitions], "{}_state!=0", "{}_state=0")
+        lines += formulas
                 
         # Ordering formulas for nature transitions
-        for i, transition in enumerate(nature_transitions):
-            if i == 0:
-                lines.append(f"formula psi_first_nature_not_idle_{transition.name} = {transition.name}_state!=0;")
-            else:
-                prev_conditions = [f"{t.name}_state=0" for t in nature_transitions[:i]]
-                lines.append(f"formula psi_first_nature_not_idle_{transition.name} = {transition.name}_state!=0 & {' & '.join(prev_conditions)};")
+        formulas, all_idle_nature = self.ordered_formulas(
+            "psi_first_nature_not_idle", [t.name for t in nature_transitions], "{}_state!=0", "{}_state=0")
+        lines += formulas
         
         # All idle formulas
         if non_nature_transitions:
-            all_idle_but_nature = [f"{t.name}_state=0" for t in non_nature_transitions]
-            lines.append(f"formula psi_all_idle_but_nature = {' & '.join(all_idle_but_nature)};")
+            lines.append(f"formula psi_all_idle_but_nature = {all_idle_but_nature};")
             
         if nature_transitions:
-            all_idle_nature = [f"{t.name}_state=0" for t in nature_transitions]
-            lines.append(f"formula psi_all_idle_nature = {' & '.join(all_idle_nature)};")
+            lines.append(f"formula psi_all_idle_nature = {all_idle_nature};")
         
         # Other helper formulas
-        all_states_not_idle = []
-        for transition in self.get_sorted_transitions():
-            all_states_not_idle.append(f"{transition.name}_state!=0")
-        if all_states_not_idle:
-            lines.append(f"formula psi_noone_idle = {' & '.join(all_states_not_idle)};")
-            lines.append(f"formula psi_atleastone_active = {' | '.join([f'is_active_{t.name}' for t in self.get_sorted_transitions()])};")
+        if transitions and not maximal_step:
+            lines.append(f"formula psi_noone_idle = {noone_idle};")
+        if transitions:
+            lines.append(f"formula psi_atleastone_active = {' | '.join([f'is_active_{t.name}' for t in transitions])};")
         
+        if not labels:
+            return "\n".join(lines)
+
         # ADD STATE LABELS
         lines.append("")
         lines.append("// State Labels for Simulator")
@@ -341,13 +558,15 @@ class SPINtoPRISM:
         # Labels for ALL psi formulas
         lines.append('label "psi_step" = psi_step;')
         lines.append('label "psi_at_least_one_remaining_duration" = psi_at_least_one_remaining_duration;')
-        lines.append('label "psi_all_step_updated" = psi_all_step_updated;')
-        lines.append('label "psi_all_step_not_updated" = psi_all_step_not_updated;')
-        lines.append('label "psi_noone_idle" = psi_noone_idle;')
+        if not synchronous_tick:
+            lines.append('label "psi_all_step_updated" = psi_all_step_updated;')
+            lines.append('label "psi_all_step_not_updated" = psi_all_step_not_updated;')
+        if not maximal_step:
+            lines.append('label "psi_noone_idle" = psi_noone_idle;')
         lines.append('label "psi_atleastone_active" = psi_atleastone_active;')
         
         # Labels for psi_idle formulas
-        for transition in self.get_sorted_transitions():
+        for transition in ([] if maximal_step else transitions):
             lines.append(f'label "psi_idle_{transition.name}" = psi_idle_{transition.name};')
         
         # Labels for psi_first_but_nature_not_idle formulas
@@ -365,12 +584,12 @@ class SPINtoPRISM:
             lines.append('label "psi_all_idle_nature" = psi_all_idle_nature;')
         
         # Labels for step_updated formulas
-        for place_name in self.get_sorted_places():
+        for place_name in ([] if synchronous_tick else places):
             lines.append(f'label "step_updated_{place_name}" = step_updated_{place_name};')
             lines.append(f'label "step_not_updated_{place_name}" = step_not_updated_{place_name};')
         
         # Labels for is_active formulas
-        for transition in self.get_sorted_transitions():
+        for transition in transitions:
             lines.append(f'label "is_active_{transition.name}" = is_active_{transition.name};')
         
         # Labels for stages
@@ -382,34 +601,65 @@ class SPINtoPRISM:
         lines.append('label "stage_5" = STAGE=5;')
         
         # Labels for transition states
-        for transition in self.get_sorted_transitions():
+        for transition in transitions:
+            if maximal_step and transition.type not in (TransitionType.CHOICE, TransitionType.NATURE):
+                continue
             lines.append(f'label "state_{transition.name}_ready" = {transition.name}_state=1;')
             lines.append(f'label "state_{transition.name}_disabled" = {transition.name}_state=-1;')
             lines.append(f'label "state_{transition.name}_idle" = {transition.name}_state=0;')
         
         # Labels for place states
-        for place_name in self.get_sorted_places():
+        for place_name in places:
             place = self.places[place_name]
             lines.append(f'label "place_{place_name}_empty" = {place_name}_value=-1;')
             lines.append(f'label "place_{place_name}_has_token" = {place_name}_value>=0;')
             lines.append(f'label "place_{place_name}_duration_met" = {place_name}_value>={place.duration};')
             lines.append(f'label "place_{place_name}_can_advance" = {place_name}_value>=0 & {place_name}_value<{place.duration};')
-            lines.append(f'label "place_{place_name}_updated" = {place_name}_updated=1;')
+            if not synchronous_tick:
+                lines.append(f'label "place_{place_name}_updated" = {place_name}_updated=1;')
         
         return "\n".join(lines)
         
-    def generate_prism_model(self) -> str:
-        """Generate complete PRISM model"""
+    def generate_prism_model(self, lean: bool = False, synchronous_tick: bool = False,
+                             maximal_step: bool = False) -> str:
+        """
+        Generate complete PRISM model.
+
+        Args:
+            lean: Emit only what model checking needs: compact names (see compact), no labels and
+                one reward item per impact value (see generate_grouped_reward_structures).
+                The default, verbose output keeps the CPI names, the labels and the [fire_<task>]
+                reward items that the simulator and etl.prism_model rely on
+            synchronous_tick: Advance the places of a time step in one command, without the
+                _updated flags and the STAGE 3/1 microsteps (see generate_manager_module)
+            maximal_step: Fire all the active transitions of a round in one command; only the
+                choices and natures still fire one by one (see generate_maximal_step_commands).
+                The tasks are rewarded on that command (see generate_step_reward_structures)
+        """
+        if lean:
+            model = self.compact()
+            return "\n".join([
+                model.generate_prism_variables(synchronous_tick, maximal_step),
+                "",
+                model.generate_formulas(labels=False, synchronous_tick=synchronous_tick,
+                                        maximal_step=maximal_step),
+                "",
+                model.generate_manager_module(synchronous_tick, maximal_step),
+                "",
+                model.generate_transition_modules(fire_actions=False, maximal_step=maximal_step),
+                "",
+                model.generate_step_reward_structures() if maximal_step else model.generate_grouped_reward_structures()
+            ])
         sections = [
-            self.generate_prism_variables(),
+            self.generate_prism_variables(synchronous_tick, maximal_step),
             "",
-            self.generate_formulas(),
+            self.generate_formulas(synchronous_tick=synchronous_tick, maximal_step=maximal_step),
             "",
-            self.generate_manager_module(),
+            self.generate_manager_module(synchronous_tick, maximal_step),
             "",
-            self.generate_transition_modules(),
+            self.generate_transition_modules(maximal_step=maximal_step),
             "",
-            self.generate_reward_structures() 
+            self.generate_step_reward_structures() if maximal_step else self.generate_reward_structures()
         ]
         return "\n".join(sections)
         
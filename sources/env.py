@@ -1,6 +1,65 @@
-
 #PRISM_PATH = "prism-4.8.1-linux64-x86/bin/prism"
 PRISM_PATH = None # Default to system PATH if PRISM_PATH is not set
 #PRISM_PATH = "prism-4.8.1-mac64-arm/bin/prism"
 
 #PRISM_PATH = 'C:\\Program Files\\prism-4.8.1\\bin\\prism.bat'
+
+# How PRISM is launched: "subprocess" runs bin/prism as is, "nailgun" reuses a pool of warm JVMs
+# (needs bin/ngprism, falls back to "cds"), "cds" starts a fresh JVM with a class-data-sharing archive
+PRISM_BACKEND = "subprocess"
+NAILGUN_POOL_SIZE = 2 # Number of long-lived PRISM servers
+NAILGUN_MAX_JOBS = 100 # Restart a server after this many jobs
+NAILGUN_JAVAMAXMEM = "2g" # Java heap of each server (-javamaxmem cannot be changed per job)
+
+# Backend of analysis.analyze_bounds: "launcher" runs the prism command line (see PRISM_BACKEND),
+# "inprocess" loads prism.jar through JPype and keeps the built model in memory.
+# The in-process backend needs LD_LIBRARY_PATH to contain <PRISM_DIR>/lib when Python starts.
+ANALYSIS_BACKEND = "launcher"
+# Time limits (seconds, None: no limit) of analyze_bounds: model parsing and construction,
+# and each checked property. PRISM is killed as soon as one is exceeded.
+PRISM_BUILD_TIMEOUT = None
+PRISM_CHECK_TIMEOUT = None
+# Apply the engine/solver options chosen by autotune.calibrate for the model-size class
+# (never when the caller's PRISM options already set the engine)
+PRISM_AUTOTUNE = False
+# Persistent cache of analyze_bounds verdicts (.prism_verdicts.sqlite), keyed by the canonical CPI,
+# the threshold vector and the encoding. Entries older than VERDICT_CACHE_MAX_AGE seconds are evicted,
+# then the least recently used beyond VERDICT_CACHE_MAX_ENTRIES (None: no limit)
+VERDICT_CACHE = False
+VERDICT_CACHE_MAX_ENTRIES = 100000
+VERDICT_CACHE_MAX_AGE = 30 * 24 * 3600
+# Answer threshold queries by dominance over the verdicts already known for the model
+# (satisfied vectors imply every larger one, unsatisfied vectors every smaller one)
+VERDICT_INFERENCE = False
+# Search of refinements.refine_bounds: "bisection" checks each threshold vector with PRISM,
+# "pareto" computes the achievable front once and answers the checks from it (up to 2 impacts,
+# the final bounds are still checked with PRISM),
+# "numeric" minimises each impact under the bounds of the others with multi(R{...}min=? ...) queries
+# "ray" searches all impacts at once along the segment from the lower to the upper corner
+REFINEMENT_STRATEGY = "bisection"
+# Initial intervals of refine_bounds: "exact" queries the minimum and maximum of every impact
+# in one PRISM run, "sample" starts from [0, sampled expected impact]
+INITIAL_BOUNDS = "sample"
+# Concurrent midpoint queries per bisection iteration of refine_bounds (1: one impact after the other)
+REFINEMENT_WORKERS = 1
+# Thresholds probed per impact and query of refine_bounds, checked in one PRISM run: 1 bisects,
+# k splits each interval into k+1 parts (0: one probe per CPU core)
+SEARCH_PROBES = 1
+# Convergence targets of refine_bounds: an impact is done once its interval is narrower than the absolute
+# tolerance or the relative one (times its upper bound). With a tolerance or a wall-clock budget (seconds),
+# the impact with the widest relative gap is queried next; None for all three keeps the fixed passes
+REFINEMENT_ABS_TOLERANCE = None
+REFINEMENT_REL_TOLERANCE = None
+REFINEMENT_BUDGET = None
+# After a satisfied bisection check, export a witness strategy and move every upper bound to its exact impacts
+WITNESS_TIGHTENING = False
+# Pre-flight state-space bound (cpitospin.estimate_state_space) used by experiment.single_execution:
+# PRISM options per bound (first matching upper limit), and the bound above which an
+# experiment is recorded as predicted-out-of-time without running PRISM
+PREFLIGHT_SETTINGS = [
+    (10**5, []),
+    (10**7, ["-javamaxmem", "4g", "-sparse"]),
+    (10**9, ["-javamaxmem", "8g", "-cuddmaxmem", "16g", "-sparse"]),
+]
+PREFLIGHT_MAX_STATES = 10**9
+PRISM_DIR = "prism-4.8.1-linux64-x86"
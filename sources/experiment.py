@@ -1,10 +1,23 @@
 import datetime
 import json
 
+from cpi_to_mdp.cpitospin import estimate_state_space
+from sources.env import PREFLIGHT_SETTINGS, PREFLIGHT_MAX_STATES, REFINEMENT_STRATEGY
 from sources.refinements import refine_bounds
+from sources.pareto import pareto_front
+from sources.checkpoint import RefinementCheckpoint
+from sources.verdict_cache import cpi_hash
 from telegram.telegram_bot import send_telegram_message
 
 
+def preflight_options(estimated_states):
+    """PRISM options for the first PREFLIGHT_SETTINGS entry whose limit covers the estimate."""
+    for limit, options in PREFLIGHT_SETTINGS:
+        if estimated_states <= limit:
+            return options
+    return PREFLIGHT_SETTINGS[-1][1]
+
+
 def single_execution(cursor, conn, x, y, w, bundle):
     # Check if the experiment already exists
     cursor.execute(
@@ -52,15 +65,33 @@ def single_execution(cursor, conn, x, y, w, bundle):
     error = ""
     initial_bounds = {}
     final_bounds = {}
-    # Run refinement analysis
-    print(f"\nRunning benchmark for x={x}, y={y}, w={w}")
+    front = None
+    stats = {}
+
+    # Upper bound on the state space, without building the model
+    estimated_states = estimate_state_space(D)
+    print(f"\nEstimated states for x={x}, y={y}, w={w}: at most {estimated_states}")
+
+    if estimated_states > PREFLIGHT_MAX_STATES:
+        error = f"predicted-out-of-time: at most {estimated_states} states (limit {PREFLIGHT_MAX_STATES})"
+        print(error)
+    else:
+        # Run refinement analysis
+        print(f"\nRunning benchmark for x={x}, y={y}, w={w}")
 
-    try:
-        initial_bounds, final_bounds, error = refine_bounds('current_benchmark', 10, verbose=True)
-    except Exception as e:
-        s = f"Error during benchmark x={x}, y={y}, w={w}: {str(e)}"
-        send_telegram_message(s)
-        error = s
+        try:
+            # Resumes the refinement of a run killed by the watchdog (the row itself is deleted by clean_stuck_rows)
+            checkpoint = RefinementCheckpoint(conn, cpi_hash(D))
+            initial_bounds, final_bounds, error = refine_bounds('current_benchmark', 10, verbose=True,
+                                                                prism_options=preflight_options(estimated_states),
+                                                                stats=stats, checkpoint=checkpoint)
+            if REFINEMENT_STRATEGY == "pareto":
+                # Already computed by refine_bounds: the whole front is kept, not only final_bounds
+                front = pareto_front('current_benchmark')['front']
+        except Exception as e:
+            s = f"Error during benchmark x={x}, y={y}, w={w}: {str(e)}"
+            send_telegram_message(s)
+            error = s
 
     # Record end time
     vte = datetime.datetime.now().isoformat()
@@ -69,10 +100,11 @@ def single_execution(cursor, conn, x, y, w, bundle):
     cursor.execute(
         """
 		UPDATE experiments 
-		SET vte = ?, initial_bounds = ?, final_bounds = ?, error = ?
+		SET vte = ?, initial_bounds = ?, final_bounds = ?, pareto_front = ?, witness = ?, sequential_rounds = ?, error = ?
 		WHERE x = ? AND y = ? AND w = ?
 		""",
-        (vte, str(initial_bounds), str(final_bounds), error,
+        (vte, str(initial_bounds), str(final_bounds), json.dumps(front) if front is not None else None,
+         json.dumps(stats['witness']) if stats.get('witness') else None, stats.get('sequential_rounds'), error,
          x, y, w)
     )
     conn.commit()
@@ -0,0 +1,7 @@
+import hashlib
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's content."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
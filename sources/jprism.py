@@ -0,0 +1,248 @@
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+try:
+    import jpype
+except ImportError:
+    jpype = None
+
+from sources.env import PRISM_DIR
+from sources.file_utils import file_hash
+
+MODULES_CACHE_SIZE = 16 # Parsed model files kept in memory
+
+
+class PrismBackendUnavailable(RuntimeError):
+    """The in-process backend cannot run in this Python process."""
+
+
+@dataclass
+class CheckResult:
+    """Structured outcome of one in-process PRISM model check."""
+    result: Any
+    model_hash: str
+    model_type: str
+    modules: List[str]
+    variables: List[str]
+    states: int
+    initial_states: int
+    transitions: int
+    choices: Optional[int]
+    construction_time: Optional[float] # None when the built model was reused
+    checking_time: float
+    version: str
+    log: str = ""
+    warnings: List[str] = field(default_factory=list)
+
+
+def unavailable_reason(lib_dir: str) -> Optional[str]:
+    """Why the in-process backend cannot run in this Python process (None if it can)."""
+    if jpype is None:
+        return "JPype is not installed (pip install JPype1)"
+    # libprism*.so link libdd.so etc. by name: the loader only finds them via LD_LIBRARY_PATH
+    if lib_dir not in os.environ.get("LD_LIBRARY_PATH", "").split(os.pathsep):
+        return f"LD_LIBRARY_PATH must contain {lib_dir} before Python starts"
+    return None
+
+
+# Checked once: the dynamic loader reads LD_LIBRARY_PATH when Python starts
+_unavailable = unavailable_reason(os.path.join(os.path.abspath(PRISM_DIR), "lib"))
+_reported = False
+
+
+def in_process_available() -> bool:
+    """Whether the in-process backend can run; the reason it cannot is printed the first time only."""
+    global _reported
+    if _unavailable is not None and not _reported:
+        print(f"In-process PRISM unavailable ({_unavailable}), using the launcher")
+        _reported = True
+    return _unavailable is None
+
+
+def disable_in_process(reason: str):
+    """Stop using the in-process backend for the rest of the process (e.g. the JVM failed to start)."""
+    global _unavailable
+    _unavailable = reason
+
+
+class InProcessPrism:
+    """
+    PRISM running inside this Python process through JPype.
+
+    Parsed model files are cached by content hash. PRISM keeps a single built
+    model (building a new one frees the previous MTBDDs), so consecutive checks
+    on the same model only run model checking: no new process, no re-parse and
+    no rebuild.
+    """
+
+    def __init__(self, prism_dir: str = PRISM_DIR, cudd_max_mem: str = "10g", java_max_mem: str = "2g"):
+        self.prism_dir = os.path.abspath(prism_dir)
+        self.cudd_max_mem = cudd_max_mem
+        self.java_max_mem = java_max_mem
+        self.lib_dir = os.path.join(self.prism_dir, "lib")
+        self.prism = None
+        self.log_stream = None
+        self.modules_files: "OrderedDict[str, Any]" = OrderedDict()
+        self.current_hash: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the JVM and initialise PRISM.
+
+        Raises:
+            PrismBackendUnavailable: If JPype is missing, or the JVM or PRISM fails to start
+        """
+        if self.prism is not None:
+            return
+        reason = unavailable_reason(self.lib_dir)
+        if reason is not None:
+            raise PrismBackendUnavailable(reason)
+
+        try:
+            if not jpype.isJVMStarted():
+                classpath = [os.path.join(self.lib_dir, "prism.jar"),
+                             os.path.join(self.lib_dir, "pepa.zip")] + glob.glob(os.path.join(self.lib_dir, "*.jar"))
+                jpype.startJVM(f"-Djava.library.path={self.lib_dir}",
+                               f"-Xmx{self.java_max_mem}",
+                               "-Xss4m",
+                               "-Djava.awt.headless=true",
+                               classpath=classpath)
+
+            Prism = jpype.JClass("prism.Prism")
+            self.log_stream = jpype.JClass("java.io.ByteArrayOutputStream")()
+            log = jpype.JClass("prism.PrismPrintStreamLog")(jpype.JClass("java.io.PrintStream")(self.log_stream))
+            prism = Prism(log)
+            prism.setCUDDMaxMem(self.cudd_max_mem)
+            prism.initialise()
+        except Exception as e:
+            # e.g. JVMNotFoundException, a missing prism.jar or a native library that does not load
+            raise PrismBackendUnavailable(f"PRISM could not be started in-process: {e}") from e
+        self.prism = prism
+
+    def _load(self, model_path: str) -> str:
+        """Make model_path the current PRISM model, reusing what is already parsed or built."""
+        model_hash = file_hash(model_path)
+        if model_hash == self.current_hash:
+            return model_hash
+
+        modules_file = self.modules_files.get(model_hash)
+        if modules_file is None:
+            modules_file = self.prism.parseModelFile(jpype.JClass("java.io.File")(model_path))
+            self.modules_files[model_hash] = modules_file
+            if len(self.modules_files) > MODULES_CACHE_SIZE:
+                self.modules_files.popitem(last=False)
+        self.modules_files.move_to_end(model_hash)
+
+        self.prism.loadPRISMModel(modules_file)
+        self.current_hash = model_hash
+        return model_hash
+
+    def check(self, model_path: str, property_str: str) -> CheckResult:
+        """
+        Check one property on a model file.
+
+        Args:
+            model_path: Path to the .nm file
+            property_str: PRISM property
+
+        Returns:
+            CheckResult with the verdict (bool/float/str) and model statistics
+        """
+        with self.lock:
+            self.start()
+            self.log_stream.reset()
+            model_hash = self._load(model_path)
+
+            construction_time = None
+            if not self.prism.modelIsBuilt():
+                start = time.time()
+                self.prism.buildModelIfRequired()
+                construction_time = time.time() - start
+
+            modules_file = self.modules_files[model_hash]
+            properties_file = self.prism.parsePropertiesString(modules_file, property_str)
+            start = time.time()
+            result = self.prism.modelCheck(properties_file, properties_file.getPropertyObject(0))
+            checking_time = time.time() - start
+
+            model = self.prism.getBuiltModel() or self.prism.getBuiltModelExplicit()
+            log = str(self.log_stream.toString())
+
+            return CheckResult(
+                result=to_python(result.getResult()),
+                model_hash=model_hash,
+                model_type=str(modules_file.getModelType()),
+                modules=[str(modules_file.getModuleName(i)) for i in range(modules_file.getNumModules())],
+                variables=[str(modules_file.getVarName(i)) for i in range(modules_file.getNumVars())],
+                states=int(model.getNumStates()),
+                initial_states=int(model.getNumStartStates() if hasattr(model, "getNumStartStates")
+                                   else model.getNumInitialStates()),
+                transitions=int(model.getNumTransitions()),
+                choices=int(model.getNumChoices()) if hasattr(model, "getNumChoices") else None,
+                construction_time=construction_time,
+                checking_time=checking_time,
+                version=str(self.prism.getVersion()),
+                log=log,
+                warnings=[line.split("Warning:", 1)[1].strip()
+                          for line in log.split('\n') if line.startswith("Warning:")]
+            )
+
+
+def to_python(value: Any) -> Any:
+    """Convert a PRISM result object to a Python bool, float or string."""
+    if isinstance(value, (bool, int, float)):
+        return value
+    class_name = str(value.getClass().getName())
+    if class_name == "java.lang.Boolean":
+        return bool(value.booleanValue())
+    if class_name in ("java.lang.Double", "java.lang.Integer"):
+        return float(value.doubleValue())
+    return str(value.toString())
+
+
+_backend: Optional[InProcessPrism] = None
+
+
+def get_in_process_prism() -> InProcessPrism:
+    """Get the process-wide in-process PRISM instance (the JVM can only start once)."""
+    global _backend
+    if _backend is None:
+        _backend = InProcessPrism()
+    return _backend
+
+
+def check_to_analysis_info(check: CheckResult, property_str: str, model_path: str) -> Dict[str, Any]:
+    """Convert a CheckResult to the dictionary returned by analysis.analyze_bounds."""
+    return {
+        'command': f'inprocess {model_path} {property_str}',
+        'prism_output': check.log,
+        'model_info': {
+            'version': check.version,
+            'type': check.model_type,
+            'modules': check.modules,
+            'variables': check.variables
+        },
+        'timings': {
+            'model_construction': check.construction_time,
+            'model_checking': check.checking_time
+        },
+        'states_info': {
+            'total': check.states,
+            'initial': check.initial_states,
+            'transitions': check.transitions,
+            'choices': check.choices
+        },
+        'property': property_str,
+        'result': check.result,
+        'warnings': check.warnings,
+        'return_code': 0,
+        'error_output': None,
+        'model_hash': check.model_hash,
+        'model_reused': check.construction_time is None
+    }
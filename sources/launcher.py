@@ -0,0 +1,285 @@
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, IO, List, Optional, Tuple
+
+from env import PRISM_PATH, PRISM_BACKEND, NAILGUN_POOL_SIZE, NAILGUN_MAX_JOBS, NAILGUN_JAVAMAXMEM
+from nailgun import get_nailgun_pool, OOM_MARKERS
+from cds import get_cds_launcher
+
+# Switches handled by the launcher script when the JVM starts; a warm JVM cannot honour them
+JVM_SWITCHES = ("-javamaxmem", "-javastack", "-javaparams")
+LOG_POLL_INTERVAL = 0.05 # Seconds between reads of a nailgun job log
+MEMORY_UNITS = {"k": 2**10, "m": 2**20, "g": 2**30}
+
+
+def prism_executable() -> str:
+    """Get the PRISM launcher, from PRISM_PATH or the system PATH."""
+    if PRISM_PATH:
+        return os.path.abspath(PRISM_PATH)
+    return shutil.which("prism") or "prism"
+
+
+def strip_jvm_switches(args: List[str]) -> List[str]:
+    """Remove launcher-only switches (and their values) from PRISM arguments."""
+    stripped = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in JVM_SWITCHES:
+            skip = True
+        else:
+            stripped.append(arg)
+    return stripped
+
+
+def memory_bytes(size: str) -> Optional[int]:
+    """Bytes of a java memory size such as "512m" or "4g" (None if it cannot be read)."""
+    size = size.strip().lower()
+    try:
+        if size and size[-1] in MEMORY_UNITS:
+            return int(size[:-1]) * MEMORY_UNITS[size[-1]]
+        return int(size)
+    except ValueError:
+        return None
+
+
+def fits_nailgun(args: List[str]) -> bool:
+    """
+    True if a job can run on a nailgun server.
+
+    The heap of a server is fixed at NAILGUN_JAVAMAXMEM when it starts, so a
+    job asking for more with -javamaxmem needs a JVM of its own.
+    """
+    heaps = [value for switch, value in zip(args, args[1:]) if switch in ("-javamaxmem", "--javamaxmem")]
+    if not heaps:
+        return True
+    # As in bin/prism, the last -javamaxmem wins
+    heap, server_heap = memory_bytes(heaps[-1]), memory_bytes(NAILGUN_JAVAMAXMEM)
+    return heap is not None and server_heap is not None and heap <= server_heap
+
+
+def run_prism(args: List[str], check: bool = False) -> subprocess.CompletedProcess:
+    """
+    Run PRISM with the configured backend.
+
+    With PRISM_BACKEND = "nailgun" the job goes to a warm server of the nailgun
+    pool, unless it needs a larger heap than the servers have. Otherwise, or with
+    PRISM_BACKEND = "cds", a fresh JVM is launched with the AppCDS archive; the
+    plain launcher is the last resort.
+
+    Args:
+        args: PRISM command line arguments (without the executable)
+        check: Raise CalledProcessError on a non-zero exit code, as subprocess.run does
+
+    Returns:
+        CompletedProcess with the PRISM log as stdout
+    """
+    prism_exec = prism_executable()
+    result = None
+
+    if PRISM_BACKEND == "nailgun" and fits_nailgun(args):
+        pool = get_nailgun_pool(prism_exec, NAILGUN_POOL_SIZE, NAILGUN_MAX_JOBS, NAILGUN_JAVAMAXMEM)
+        if pool is not None:
+            result = pool.run(strip_jvm_switches(args))
+
+    if result is None and PRISM_BACKEND in ("nailgun", "cds"):
+        result = get_cds_launcher(prism_exec).run(args)
+
+    if result is None:
+        result = subprocess.run([prism_exec] + args,
+                                capture_output=True,
+                                text=True)
+
+    if check and result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, result.args,
+                                            output=result.stdout, stderr=result.stderr)
+    return result
+
+
+@dataclass
+class StreamedRun:
+    """Outcome of a PRISM run whose output was followed line by line."""
+    args: List[str]
+    returncode: int
+    stdout: str
+    stderr: str
+    timed_out: Optional[str] = None # Phase ("build" or "check") whose time limit was hit
+    stopped_early: bool = False # Killed after the last expected verdict was printed
+
+
+def _read_pipe(pipe: IO[str], lines: "queue.Queue[Optional[str]]"):
+    for line in pipe:
+        lines.put(line)
+    lines.put(None)
+
+
+def _follow_log(log_path: str, process: subprocess.Popen, lines: "queue.Queue[Optional[str]]"):
+    """Forward the lines of a log file written by another process until that process exits."""
+    with open(log_path, 'r') as f:
+        pending = ""
+        while True:
+            chunk = f.read()
+            if chunk:
+                pending += chunk
+                *complete, pending = pending.split('\n')
+                for line in complete:
+                    lines.put(line + '\n')
+            elif process.poll() is not None:
+                pending += f.read()
+                if pending:
+                    lines.put(pending)
+                break
+            else:
+                time.sleep(LOG_POLL_INTERVAL)
+    lines.put(None)
+
+
+def _watch(lines: "queue.Queue[Optional[str]]", sources: int, on_line: Optional[Callable[[str], None]],
+           build_timeout: Optional[float], check_timeout: Optional[float],
+           stop_after_results: Optional[int]) -> Tuple[List[str], Optional[str], bool]:
+    """
+    Consume PRISM output until every source is exhausted, a time limit is hit or enough verdicts are in.
+
+    The build phase lasts until "Time for model construction:" is printed; the
+    check time limit then applies to each property, from the previous verdict
+    to the next "Result:".
+
+    Returns:
+        The lines read, the phase that timed out (or None) and whether the run can be stopped early
+    """
+    output = []
+    phase = "build"
+    results = 0
+    deadline = time.time() + build_timeout if build_timeout else None
+
+    while sources > 0:
+        try:
+            line = lines.get(timeout=None if deadline is None else max(0.0, deadline - time.time()))
+        except queue.Empty:
+            return output, phase, False
+        if line is None:
+            sources -= 1
+            continue
+
+        output.append(line)
+        if on_line is not None:
+            on_line(line)
+
+        stripped = line.strip()
+        if stripped.startswith("Time for model construction:"):
+            phase = "check"
+            deadline = time.time() + check_timeout if check_timeout else None
+        elif stripped.startswith("Result:"):
+            results += 1
+            if stop_after_results is not None and results >= stop_after_results:
+                return output, None, True
+            if phase == "check" and check_timeout:
+                deadline = time.time() + check_timeout
+
+    return output, None, False
+
+
+def _kill_group(process: subprocess.Popen):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def stream_prism(args: List[str], on_line: Optional[Callable[[str], None]] = None,
+                 build_timeout: Optional[float] = None, check_timeout: Optional[float] = None,
+                 stop_after_results: Optional[int] = None) -> StreamedRun:
+    """
+    Run PRISM with the configured backend, following its output as it is printed.
+
+    A fresh PRISM process runs in its own process group, which is killed as
+    soon as a time limit is hit or the last expected verdict is printed. On a
+    nailgun server a timed out job is stopped by killing the server, which the
+    pool then replaces; a job that printed its verdicts is left to finish,
+    since the warm JVM is reused. The nailgun log is only as current as PRISM
+    flushes it, so partial metrics may be missing there. Jobs needing a larger
+    heap than the nailgun servers have get a fresh JVM, as in run_prism.
+
+    Args:
+        args: PRISM command line arguments (without the executable)
+        on_line: Called with every output line as it arrives
+        build_timeout: Seconds allowed for parsing and model construction (None: no limit)
+        check_timeout: Seconds allowed per checked property (None: no limit)
+        stop_after_results: Stop once this many "Result:" lines were printed
+
+    Returns:
+        StreamedRun with the output read so far and how the run ended
+    """
+    prism_exec = prism_executable()
+    lines: "queue.Queue[Optional[str]]" = queue.Queue()
+
+    if PRISM_BACKEND == "nailgun" and fits_nailgun(args):
+        pool = get_nailgun_pool(prism_exec, NAILGUN_POOL_SIZE, NAILGUN_MAX_JOBS, NAILGUN_JAVAMAXMEM)
+        if pool is not None:
+            with pool.lease() as server:
+                if server is not None:
+                    process, log_path = server.start_job(strip_jvm_switches(args))
+                    try:
+                        threading.Thread(target=_follow_log, args=(log_path, process, lines), daemon=True).start()
+                        threading.Thread(target=_read_pipe, args=(process.stdout, lines), daemon=True).start()
+                        output, timed_out, stopped = _watch(lines, 2, on_line, build_timeout, check_timeout,
+                                                            stop_after_results)
+                        if timed_out:
+                            # The job cannot be cancelled inside the JVM: the server is dropped from the pool
+                            process.kill()
+                            server.kill()
+                        process.wait()
+                        stderr = process.stderr.read()
+                    finally:
+                        os.remove(log_path)
+                    if not timed_out and any(marker in ''.join(output) for marker in OOM_MARKERS):
+                        server.restart()
+                    return StreamedRun(process.args, 0 if stopped else process.returncode,
+                                       ''.join(output), stderr, timed_out, stopped)
+
+    cds = get_cds_launcher(prism_exec) if PRISM_BACKEND in ("nailgun", "cds") else None
+    cmd, training, env, locked = None, False, None, False
+    try:
+        if cds is not None:
+            # A training run holds the lock until its archive is dumped; other jobs only while choosing a command
+            cds.lock.acquire()
+            locked = True
+            cmd, training = cds.command(args)
+            if not training:
+                cds.lock.release()
+                locked = False
+            env = cds.env()
+        if cmd is None:
+            cmd, env = [prism_exec] + args, None
+
+        process = subprocess.Popen(cmd,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   text=True,
+                                   env=env,
+                                   start_new_session=True)
+        stderr_lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        threading.Thread(target=_read_pipe, args=(process.stdout, lines), daemon=True).start()
+        threading.Thread(target=_read_pipe, args=(process.stderr, stderr_lines), daemon=True).start()
+        output, timed_out, stopped = _watch(lines, 1, on_line, build_timeout, check_timeout, stop_after_results)
+        if timed_out or stopped:
+            _kill_group(process)
+        process.wait()
+        if training:
+            cds.finish_training()
+    finally:
+        if locked:
+            cds.lock.release()
+
+    stderr = []
+    while (line := stderr_lines.get()) is not None:
+        stderr.append(line)
+    return StreamedRun(cmd, 0 if stopped else process.returncode, ''.join(output), ''.join(stderr),
+                       timed_out, stopped)
@@ -0,0 +1,162 @@
+import glob
+import os
+import re
+import shutil
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from sources.launcher import run_prism
+from sources.file_utils import file_hash
+
+MODEL_STORE_DIR = ".prism_models"
+READY_FILE = "ready" # Written last: a directory without it is an interrupted export
+
+
+def model_dir(model_path: str, store_dir: str = MODEL_STORE_DIR) -> str:
+    """Directory of the exported model, keyed by the content hash of the .nm file."""
+    return os.path.join(store_dir, file_hash(model_path))
+
+
+def read_reward_name(path: str) -> Optional[str]:
+    """Name of the reward structure from the header of a PRISM rewards file."""
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.startswith('#'):
+                break
+            if match := re.match(r'#\s*Reward structure "(.*)"', line):
+                return match.group(1)
+    return None
+
+
+def reward_files(raw_dir: str, extension: str) -> List[str]:
+    """Reward files exported by PRISM, in reward structure order (model1.trew, model2.trew, ...)."""
+    single = os.path.join(raw_dir, f"model.{extension}")
+    if os.path.exists(single):
+        return [single]
+    numbered = glob.glob(os.path.join(raw_dir, f"model*.{extension}"))
+    return sorted(numbered, key=lambda p: int(re.search(rf'model(\d+)\.{extension}$', p).group(1)))
+
+
+def read_matrix_lines(path: str) -> List[List[str]]:
+    """Data lines of an exported matrix/vector file (header comments and the size line removed)."""
+    with open(path, 'r') as f:
+        lines = [line.split() for line in f if line.strip() and not line.startswith('#')]
+    return lines[1:]
+
+
+def convert_transition_rewards(raw_dir: str, out_dir: str) -> List[Optional[str]]:
+    """
+    Rewrite an exported MDP so that all rewards are state rewards.
+
+    PRISM 4.8 can only import state rewards, while the CPI models put impacts on
+    the fire_* actions (transition rewards). Every rewarded choice (s, c) is
+    routed through a new state m that carries the rewards of the choice:
+    s --c--> m (probability 1) and m --0--> the original successors of (s, c).
+    The new states are appended after the original ones, so labels (init,
+    deadlock) keep their indices, and the expected cumulative reward of every
+    strategy is unchanged.
+
+    Args:
+        raw_dir: Directory with model.tra, model.lab and the exported rewards
+        out_dir: Directory where model.tra, model.lab and modelN.srew are written
+
+    Returns:
+        Names of the reward structures, in import order (PRISM numbers them from 1)
+    """
+    tra_lines = read_matrix_lines(os.path.join(raw_dir, "model.tra"))
+    with open(os.path.join(raw_dir, "model.tra"), 'r') as f:
+        num_states = int(next(line for line in f if not line.startswith('#')).split()[0])
+
+    trew_files = reward_files(raw_dir, "trew")
+    srew_files = reward_files(raw_dir, "srew")
+    names = [read_reward_name(path) for path in (trew_files or srew_files)]
+    num_rewards = len(names)
+
+    # Rewards of each (state, choice), one value per reward structure
+    choice_rewards: Dict[Tuple[int, int], List[float]] = {}
+    for r, path in enumerate(trew_files):
+        for fields in read_matrix_lines(path):
+            key = (int(fields[0]), int(fields[1]))
+            choice_rewards.setdefault(key, [0.0] * num_rewards)[r] = float(fields[3])
+    state_rewards: Dict[int, List[float]] = {}
+    for r, path in enumerate(srew_files):
+        for fields in read_matrix_lines(path):
+            state_rewards.setdefault(int(fields[0]), [0.0] * num_rewards)[r] = float(fields[1])
+
+    # Intermediate state of each rewarded choice
+    intermediate = {key: num_states + i for i, key in enumerate(sorted(choice_rewards))}
+
+    transitions = []
+    for fields in tra_lines:
+        s, c, t = int(fields[0]), int(fields[1]), int(fields[2])
+        m = intermediate.get((s, c))
+        if m is None:
+            transitions.append((s, c, t, fields[3]))
+        else:
+            transitions.append((m, 0, t, fields[3]))
+    for (s, c), m in intermediate.items():
+        transitions.append((s, c, m, "1"))
+    transitions.sort(key=lambda tr: (tr[0], tr[1], tr[2]))
+
+    total_states = num_states + len(intermediate)
+    total_choices = len({(s, c) for s, c, _, _ in transitions})
+    with open(os.path.join(out_dir, "model.tra"), 'w') as f:
+        f.write(f"{total_states} {total_choices} {len(transitions)}\n")
+        for s, c, t, p in transitions:
+            f.write(f"{s} {c} {t} {p}\n")
+
+    shutil.copy(os.path.join(raw_dir, "model.lab"), os.path.join(out_dir, "model.lab"))
+
+    rewards = dict(state_rewards)
+    for key, m in intermediate.items():
+        rewards[m] = choice_rewards[key]
+    for r, name in enumerate(names):
+        entries = sorted((s, values[r]) for s, values in rewards.items() if values[r] != 0)
+        with open(os.path.join(out_dir, f"model{r + 1}.srew"), 'w') as f:
+            if name is not None:
+                f.write(f'# Reward structure "{name}"\n# State rewards\n')
+            f.write(f"{total_states} {len(entries)}\n")
+            for s, value in entries:
+                f.write(f"{s} {value!r}\n")
+
+    return names
+
+
+def export_model(model_path: str, store_dir: str = MODEL_STORE_DIR) -> Optional[str]:
+    """
+    Build a PRISM model once and store it for -importmodel.
+
+    The export is keyed by the content hash of the .nm file, so every witness
+    check, and every rerun after a watchdog restart, finds the model already
+    built. Only single-objective queries can use it: PRISM 4.8.1 rejects state
+    rewards in multi() queries and cannot import transition rewards.
+
+    Args:
+        model_path: Path to the .nm file
+        store_dir: Root directory of the exported models
+
+    Returns:
+        Directory of the exported model, or None if the export failed
+    """
+    out_dir = model_dir(model_path, store_dir)
+    if os.path.exists(os.path.join(out_dir, READY_FILE)):
+        return out_dir
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    raw_dir = os.path.join(out_dir, "raw")
+    os.makedirs(raw_dir)
+    try:
+        run_prism(["-cuddmaxmem", "10g", "-javamaxmem", "2g",
+                   os.path.abspath(model_path),
+                   "-exportmodel", os.path.abspath(os.path.join(raw_dir, "model.tra,lab,srew,trew"))],
+                  check=True)
+        convert_transition_rewards(raw_dir, out_dir)
+    except (subprocess.CalledProcessError, OSError, ValueError, StopIteration) as e:
+        print(f"Could not export model {model_path}: {e}")
+        shutil.rmtree(out_dir, ignore_errors=True)
+        return None
+
+    shutil.rmtree(raw_dir)
+    with open(os.path.join(out_dir, READY_FILE), 'w') as f:
+        f.write(os.path.abspath(model_path))
+    return out_dir
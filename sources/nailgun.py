@@ -0,0 +1,353 @@
+import atexit
+import contextlib
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+NGSERVER_CLASS = "com.martiansoftware.nailgun.NGServer"
+OOM_MARKERS = ("OutOfMemoryError", "out of memory")
+
+
+def find_free_port() -> int:
+    """Ask the OS for a free TCP port on localhost."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def java_major_version(prism_exec: str) -> Optional[int]:
+    """
+    Get the major version of the Java runtime used by the PRISM launcher.
+
+    Args:
+        prism_exec: Path to the prism launcher script
+
+    Returns:
+        Major version as integer, or None if it cannot be determined
+    """
+    try:
+        result = subprocess.run([prism_exec, "-javaversion"],
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE,
+                                text=True)
+    except OSError:
+        return None
+
+    # e.g. 'openjdk version "21.0.8" 2025-07-15' or 'java version "1.8.0_392"'
+    try:
+        parts = result.stderr.split('"')[1].split('.')
+        return int(parts[1]) if parts[0] == "1" else int(parts[0])
+    except (ValueError, IndexError):
+        return None
+
+
+class NailgunServer:
+    """
+    A long-lived PRISM JVM running the nailgun server on a local port.
+
+    Jobs are sent with the bundled ngprism client. PRISM writes its log to the
+    server's stdout, so every job is run with -mainlog and the log is read back.
+    """
+
+    def __init__(self, prism_exec: str, ngprism_exec: str, port: int,
+                 javamaxmem: str, java_params: str = ""):
+        self.prism_exec = prism_exec
+        self.ngprism_exec = ngprism_exec
+        self.port = port
+        self.javamaxmem = javamaxmem
+        self.java_params = java_params
+        self.process: Optional[subprocess.Popen] = None
+        self.jobs = 0
+
+    def start(self, tries: int = 20, delay: float = 0.5) -> bool:
+        """Start the server and wait until it answers. Returns True on success."""
+        env = os.environ.copy()
+        env["PRISM_MAINCLASS"] = NGSERVER_CLASS
+        env["PRISM_JAVAMAXMEM"] = self.javamaxmem
+        if self.java_params:
+            env["PRISM_JAVA_PARAMS"] = f'{env.get("PRISM_JAVA_PARAMS", "")} {self.java_params}'.strip()
+
+        self.process = subprocess.Popen([self.prism_exec, f"127.0.0.1:{self.port}"],
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL,
+                                        env=env,
+                                        start_new_session=True)
+        self.jobs = 0
+
+        for _ in range(tries):
+            time.sleep(delay)
+            if self.process.poll() is not None:
+                return False
+            if self.is_healthy():
+                return True
+
+        self.stop()
+        return False
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def is_healthy(self) -> bool:
+        """Check that the JVM is alive and serving PRISM requests."""
+        if not self.is_running():
+            return False
+        try:
+            result = subprocess.run(self._client_cmd(["-version"]),
+                                    capture_output=True,
+                                    text=True,
+                                    timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            subprocess.run(self._client_cmd(["ng-stop"]), capture_output=True, timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def kill(self):
+        """Kill the JVM at once, e.g. to abort a job that exceeded its time limit."""
+        if self.process is None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.process.wait()
+        self.process = None
+
+    def restart(self) -> bool:
+        self.stop()
+        self.port = find_free_port()
+        return self.start()
+
+    def run(self, args: List[str]) -> subprocess.CompletedProcess:
+        """
+        Run one PRISM job on this server.
+
+        Args:
+            args: PRISM command line arguments (without the executable)
+
+        Returns:
+            CompletedProcess whose stdout is the PRISM log of the job
+        """
+        fd, log_path = tempfile.mkstemp(prefix="prism_ng_", suffix=".log")
+        os.close(fd)
+        cmd = self._client_cmd(args + ["-mainlog", log_path])
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            with open(log_path, 'r') as f:
+                output = f.read()
+        finally:
+            os.remove(log_path)
+        self.jobs += 1
+
+        return subprocess.CompletedProcess(cmd, result.returncode, output + result.stdout, result.stderr)
+
+    def start_job(self, args: List[str]) -> Tuple[subprocess.Popen, str]:
+        """
+        Start one PRISM job on this server without waiting for it.
+
+        Returns:
+            The ngprism client process and the path of the PRISM log, which the
+            caller reads while the job runs and removes afterwards
+        """
+        fd, log_path = tempfile.mkstemp(prefix="prism_ng_", suffix=".log")
+        os.close(fd)
+        process = subprocess.Popen(self._client_cmd(args + ["-mainlog", log_path]),
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   text=True)
+        self.jobs += 1
+        return process, log_path
+
+    def _client_cmd(self, args: List[str]) -> List[str]:
+        return [self.ngprism_exec, "--nailgun-port", str(self.port)] + args
+
+
+class NailgunPool:
+    """
+    Pool of PRISM nailgun servers.
+
+    Servers are started lazily on first use, health-checked before each job and
+    restarted after max_jobs jobs, when they die or when PRISM runs out of memory.
+    A server that cannot be started leaves its slot free: no new server is
+    started for START_BACKOFF seconds, doubling after every further failure,
+    and jobs fall back to a fresh JVM meanwhile.
+    """
+
+    START_BACKOFF = 5.0
+    MAX_START_BACKOFF = 300.0
+
+    def __init__(self, prism_exec: str, ngprism_exec: str, size: int,
+                 max_jobs: int, javamaxmem: str):
+        self.prism_exec = prism_exec
+        self.ngprism_exec = ngprism_exec
+        self.size = size
+        self.max_jobs = max_jobs
+        self.javamaxmem = javamaxmem
+        self.java_params = None
+        self.servers: List[NailgunServer] = [] # Leased, idle and starting servers
+        self.idle: List[NailgunServer] = []
+        self.lock = threading.Lock()
+        # Notified whenever a server is returned or a slot is freed
+        self.changed = threading.Condition(self.lock)
+        self.start_failures = 0
+        self.retry_at = 0.0
+
+    def _java_params(self) -> str:
+        # Nailgun installs a SecurityManager, which must be explicitly allowed on Java >= 19
+        if self.java_params is None:
+            version = java_major_version(self.prism_exec)
+            self.java_params = "-Djava.security.manager=allow" if version is not None and version >= 19 else ""
+        return self.java_params
+
+    def _started(self, ok: bool):
+        """Record the outcome of a server (re)start, backing off after failures. Callers hold self.lock."""
+        if ok:
+            self.start_failures = 0
+            self.retry_at = 0.0
+        else:
+            self.start_failures += 1
+            self.retry_at = time.monotonic() + min(self.START_BACKOFF * 2 ** (self.start_failures - 1),
+                                                   self.MAX_START_BACKOFF)
+
+    def _acquire(self) -> Tuple[Optional[NailgunServer], bool]:
+        """
+        Take an idle server, start one in a free slot, or wait until a server is returned or a slot is freed.
+
+        Returns:
+            The server (None while starting servers backs off) and whether it was just started
+        """
+        with self.changed:
+            while True:
+                if self.idle:
+                    return self.idle.pop(), False
+                if len(self.servers) < self.size:
+                    if time.monotonic() < self.retry_at:
+                        return None, False
+                    server = NailgunServer(self.prism_exec, self.ngprism_exec, find_free_port(),
+                                           self.javamaxmem, self._java_params())
+                    # The slot is taken while the JVM starts, outside the lock
+                    self.servers.append(server)
+                    break
+                self.changed.wait()
+
+        started = server.start()
+        with self.changed:
+            self._started(started)
+        if not started:
+            self._discard(server)
+            return None, False
+        return server, True
+
+    def _release(self, server: NailgunServer):
+        if server.is_running():
+            with self.changed:
+                if server in self.servers:
+                    self.idle.append(server)
+                    self.changed.notify()
+                    return
+        self._discard(server)
+
+    @contextlib.contextmanager
+    def lease(self) -> Iterator[Optional[NailgunServer]]:
+        """
+        Borrow a healthy server for one job, waiting for one if all are busy.
+
+        An idle server is health-checked first and restarted if it does not
+        answer or has run max_jobs jobs. Yields None if no server can be
+        started. The server goes back to the pool afterwards, or is discarded
+        if it died, which frees its slot for a new one.
+        """
+        server, fresh = self._acquire()
+        if server is None:
+            yield None
+            return
+
+        try:
+            if not fresh and (server.jobs >= self.max_jobs or not server.is_healthy()):
+                restarted = server.restart()
+                with self.changed:
+                    self._started(restarted)
+                if not restarted:
+                    yield None
+                    return
+            yield server
+        finally:
+            self._release(server)
+
+    def run(self, args: List[str]) -> Optional[subprocess.CompletedProcess]:
+        """
+        Run a PRISM job on an idle server.
+
+        Returns:
+            The completed job, or None if no server could be started
+        """
+        with self.lease() as server:
+            if server is None:
+                return None
+
+            result = server.run(args)
+
+            if any(marker in result.stdout for marker in OOM_MARKERS) or not server.is_running():
+                server.restart()
+            return result
+
+    def _discard(self, server: NailgunServer):
+        with self.changed:
+            if server in self.servers:
+                self.servers.remove(server)
+            if server in self.idle:
+                self.idle.remove(server)
+            self.changed.notify_all()
+        server.stop()
+
+    def shutdown(self):
+        with self.changed:
+            for server in self.servers:
+                server.stop()
+            self.servers = []
+            self.idle = []
+            self.changed.notify_all()
+
+
+_pool: Optional[NailgunPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_nailgun_pool(prism_exec: str, size: int, max_jobs: int, javamaxmem: str) -> Optional[NailgunPool]:
+    """
+    Get the process-wide nailgun pool, creating it on first use.
+
+    Returns:
+        The pool, or None if ngprism is not shipped next to the prism launcher
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            ngprism_exec = os.path.join(os.path.dirname(prism_exec), "ngprism")
+            if not os.path.exists(ngprism_exec):
+                ngprism_exec = shutil.which("ngprism")
+            if ngprism_exec is None:
+                return None
+            _pool = NailgunPool(prism_exec, ngprism_exec, size, max_jobs, javamaxmem)
+            atexit.register(_pool.shutdown)
+        return _pool
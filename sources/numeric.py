@@ -0,0 +1,141 @@
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+from sources.env import PRISM_BUILD_TIMEOUT, PRISM_CHECK_TIMEOUT
+from sources.analysis import PrismOutputParser, safe_float_conversion, property_threshold
+from sources.launcher import stream_prism
+from sources.pareto import count_rewards
+
+
+def generate_numeric_requirement(impact: int, bounds: List[float]) -> str:
+    """
+    Generate the PRISM property whose result is the minimum of one impact under bounds on the others.
+
+    Args:
+        impact: Index of the minimised impact_i reward
+        bounds: Upper bound of every impact, in reward order (the bound of the minimised one is ignored)
+
+    Returns:
+        e.g. multi(R{"impact_0"}min=? [C], R{"impact_1"}<=0.500000 [C])
+    """
+    objectives = [f'R{{"impact_{impact}"}}min=? [C]']
+    # Rounded up, so that a bound PRISM returned as optimal stays achievable
+    objectives += [f'R{{"impact_{i}"}}<={property_threshold(bound):0.6f} [C]'
+                   for i, bound in enumerate(bounds) if i != impact]
+    return f'multi({", ".join(objectives)})'
+
+
+def minimize_impact(model_name: str, impact: int, bounds: List[float],
+                    prism_options: Optional[List[str]] = None,
+                    build_timeout: Optional[float] = PRISM_BUILD_TIMEOUT,
+                    check_timeout: Optional[float] = PRISM_CHECK_TIMEOUT) -> Dict[str, Any]:
+    """
+    Minimum expected value of one impact, subject to the bounds on the others, in one PRISM run.
+
+    Args:
+        model_name: Name of the model file (without extension)
+        impact: Index of the minimised impact_i reward
+        bounds: Upper bound of every impact, in reward order
+        prism_options: Extra PRISM switches (e.g. memory or engine)
+        build_timeout: Seconds allowed to parse and build the model (None: no limit)
+        check_timeout: Seconds allowed for the query (None: no limit)
+
+    Returns:
+        Dictionary with command, property, value (None if the bounds on the
+        other impacts cannot be met together, or on failure), timings,
+        states_info, return_code and, on failure, error
+    """
+    model_path = os.path.join('models', f'{model_name}.nm')
+    property_str = generate_numeric_requirement(impact, bounds)
+    parser = PrismOutputParser()
+    args = ["-cuddmaxmem", "10g", "-javamaxmem", "2g",
+            os.path.abspath(model_path), "-pf", property_str] + (prism_options or [])
+    result = stream_prism(args, on_line=parser.feed, build_timeout=build_timeout, check_timeout=check_timeout,
+                          stop_after_results=1)
+    parsed = parser.summary()
+    info: Dict[str, Any] = {
+        'command': ' '.join(result.args),
+        'property': property_str,
+        'value': None,
+        'timings': parsed['timings'],
+        'states_info': parsed['states_info'],
+        'return_code': result.returncode
+    }
+
+    value = parsed['values'][-1] if parsed['values'] else None
+    if result.timed_out:
+        info['error'] = f"PRISM {result.timed_out} phase exceeded its time limit"
+    elif value is None or (number := safe_float_conversion(value)) is None:
+        info['error'] = f"No value in the PRISM output: {(result.stdout + result.stderr)[-500:]}"
+    elif math.isfinite(number):
+        # PRISM answers NaN when the constraints are infeasible
+        info['value'] = number
+    return info
+
+
+def generate_range_requirements(num_impacts: int) -> List[str]:
+    """
+    Generate the PRISM properties whose results are the minimum then the maximum of every impact.
+
+    The minima are written as multi() since PRISM has no R min [C] operator
+    for MDPs; the maxima are plain R max [C] queries.
+    """
+    return ([f'multi(R{{"impact_{i}"}}min=? [C])' for i in range(num_impacts)]
+            + [f'R{{"impact_{i}"}}max=? [C]' for i in range(num_impacts)])
+
+
+def impact_ranges(model_name: str, prism_options: Optional[List[str]] = None,
+                  build_timeout: Optional[float] = PRISM_BUILD_TIMEOUT,
+                  check_timeout: Optional[float] = PRISM_CHECK_TIMEOUT) -> Dict[str, Any]:
+    """
+    Exact range of the expected value of every impact, over all strategies, in one PRISM run.
+
+    Every threshold below the minimum of an impact is unsatisfiable, and the
+    maxima are satisfiable together (by any strategy), so [min, max] is the
+    tightest interval a search can start from.
+
+    Args:
+        model_name: Name of the model file (without extension)
+        prism_options: Extra PRISM switches (e.g. memory or engine)
+        build_timeout: Seconds allowed to parse and build the model (None: no limit)
+        check_timeout: Seconds allowed per query (None: no limit)
+
+    Returns:
+        Dictionary with command, properties, min and max (values in reward
+        order, None on failure or if an impact is unbounded), timings,
+        states_info, return_code and, on failure, error
+    """
+    model_path = os.path.join('models', f'{model_name}.nm')
+    num_impacts = count_rewards(model_path)
+    properties = generate_range_requirements(num_impacts)
+    props_path = os.path.join('models', f'{model_name}.ranges.props')
+    with open(props_path, 'w') as f:
+        f.write('\n'.join(properties) + '\n')
+
+    parser = PrismOutputParser()
+    args = ["-cuddmaxmem", "10g", "-javamaxmem", "2g",
+            os.path.abspath(model_path), os.path.abspath(props_path)] + (prism_options or [])
+    result = stream_prism(args, on_line=parser.feed, build_timeout=build_timeout, check_timeout=check_timeout,
+                          stop_after_results=len(properties))
+    parsed = parser.summary()
+    info: Dict[str, Any] = {
+        'command': ' '.join(result.args),
+        'properties': properties,
+        'min': None,
+        'max': None,
+        'timings': parsed['timings'],
+        'states_info': parsed['states_info'],
+        'return_code': result.returncode
+    }
+
+    values = [safe_float_conversion(value) for value in parsed['values']]
+    if result.timed_out:
+        info['error'] = f"PRISM {result.timed_out} phase exceeded its time limit"
+    elif num_impacts == 0 or len(values) != len(properties) or any(v is None for v in values):
+        info['error'] = f"Missing values in the PRISM output: {(result.stdout + result.stderr)[-500:]}"
+    elif not all(math.isfinite(v) for v in values):
+        info['error'] = f"Unbounded impact range: {values}"
+    else:
+        info['min'], info['max'] = values[:num_impacts], values[num_impacts:]
+    return info
@@ -0,0 +1,159 @@
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from sources.env import PRISM_BUILD_TIMEOUT, PRISM_CHECK_TIMEOUT
+from sources.analysis import PrismOutputParser, safe_float_conversion
+from sources.launcher import stream_prism
+from sources.file_utils import file_hash
+
+MAX_PARETO_OBJECTIVES = 2 # PRISM only generates Pareto curves for two objectives
+PARETO_EPSILON = 1e-4 # PRISM's -paretoepsilon: how far the computed front may be from the true one
+FRONT_TOLERANCE = PARETO_EPSILON # Relative slack of point-in-polytope tests, matching the front's precision
+
+Point = List[float]
+
+
+def count_rewards(model_path: str) -> int:
+    """Number of impact_i reward structures of a model."""
+    with open(model_path, 'r') as f:
+        return len(re.findall(r'^rewards\s+"impact_\d+"', f.read(), re.MULTILINE))
+
+
+def generate_pareto_requirement(num_impacts: int) -> str:
+    """
+    Generate the PRISM property whose result is the achievable front of the impacts.
+
+    With two impacts this is a Pareto query (the vertices of the lower-left
+    boundary); with one impact it is the minimum expected impact, still
+    written as multi() since PRISM has no R min [C] operator for MDPs.
+    """
+    objectives = [f'R{{"impact_{i}"}}min=? [C]' for i in range(num_impacts)]
+    return f'multi({", ".join(objectives)})'
+
+
+def parse_front(value: str, num_impacts: int) -> Optional[List[Point]]:
+    """Parse the 'Result:' value of a Pareto query ("[(0.4, 0.6), (0.5, 0.3)]") or of a single minimum."""
+    if num_impacts == 1:
+        minimum = safe_float_conversion(value)
+        return None if minimum is None else [[minimum]]
+
+    front = []
+    for point in re.findall(r'\(([^)]*)\)', value):
+        try:
+            front.append([float(coordinate) for coordinate in point.split(',')])
+        except ValueError:
+            return None
+    return sorted(front) if front and all(len(p) == num_impacts for p in front) else None
+
+
+def lower_hull(points: List[Point]) -> List[Point]:
+    """Lower convex hull of 2D points (Andrew's monotone chain), from left to right."""
+    hull: List[Point] = []
+    for p in sorted(points):
+        while len(hull) >= 2 and ((hull[-1][0] - hull[-2][0]) * (p[1] - hull[-2][1])
+                                  - (hull[-1][1] - hull[-2][1]) * (p[0] - hull[-2][0])) <= 0:
+            hull.pop()
+        hull.append(p)
+    return hull
+
+
+def front_contains(front: List[Point], vector: Point, tolerance: float = FRONT_TOLERANCE) -> bool:
+    """
+    True if the threshold vector is achievable.
+
+    The achievable vectors are the convex hull of the front, plus everything
+    above it: a vector is achievable if some mixture of the vertex strategies
+    is below it in every impact. A vector with fewer components than the
+    front only bounds the first impacts (as in generate_multi_rewards_requirement).
+
+    Args:
+        front: Vertices of the front, as returned by pareto_front
+        vector: Threshold vector (analysis.threshold_vector order)
+        tolerance: Relative slack, for the precision of the PRISM solution (by default
+            the -paretoepsilon the front was computed with, so vectors within
+            that distance outside the front count as achievable)
+    """
+    slack = [tolerance * max(1.0, abs(v)) for v in vector]
+    points = [p[:len(vector)] for p in front]
+
+    if len(vector) == 1:
+        return vector[0] + slack[0] >= min(p[0] for p in points)
+    if len(vector) != 2:
+        raise ValueError(f"Fronts of {len(vector)} impacts are not supported")
+
+    x, y = vector[0] + slack[0], vector[1] + slack[1]
+    hull = lower_hull(points)
+    if x < hull[0][0]:
+        return False
+    lowest = min(p[1] for p in hull if p[0] <= x)
+    for (x1, y1), (x2, y2) in zip(hull, hull[1:]):
+        if x1 <= x <= x2 and x2 > x1:
+            lowest = min(lowest, y1 + (y2 - y1) * (x - x1) / (x2 - x1))
+    return y >= lowest
+
+
+def compute_front(model_name: str, prism_options: Optional[List[str]] = None,
+                  build_timeout: Optional[float] = PRISM_BUILD_TIMEOUT,
+                  check_timeout: Optional[float] = PRISM_CHECK_TIMEOUT) -> Dict[str, Any]:
+    """
+    Compute the achievable front of a model in a single PRISM run.
+
+    Args:
+        model_name: Name of the model file (without extension)
+        prism_options: Extra PRISM switches (e.g. memory or engine)
+        build_timeout: Seconds allowed to parse and build the model (None: no limit)
+        check_timeout: Seconds allowed for the Pareto query (None: no limit)
+
+    Returns:
+        Dictionary with command, property, front (None if it could not be
+        computed), timings, states_info, return_code and, on failure, error
+    """
+    model_path = os.path.join('models', f'{model_name}.nm')
+    num_impacts = count_rewards(model_path)
+    property_str = generate_pareto_requirement(num_impacts)
+    info: Dict[str, Any] = {'command': None, 'property': property_str, 'front': None,
+                            'timings': {}, 'states_info': {}, 'return_code': -1}
+
+    if not 1 <= num_impacts <= MAX_PARETO_OBJECTIVES:
+        info['error'] = f"Pareto fronts need 1 to {MAX_PARETO_OBJECTIVES} impacts, the model has {num_impacts}"
+        return info
+
+    parser = PrismOutputParser()
+    args = ["-cuddmaxmem", "10g", "-javamaxmem", "2g",
+            os.path.abspath(model_path), "-pf", property_str,
+            "-paretoepsilon", str(PARETO_EPSILON)] + (prism_options or [])
+    result = stream_prism(args, on_line=parser.feed, build_timeout=build_timeout, check_timeout=check_timeout,
+                          stop_after_results=1)
+    parsed = parser.summary()
+    info.update({
+        'command': ' '.join(result.args),
+        'timings': parsed['timings'],
+        'states_info': parsed['states_info'],
+        'return_code': result.returncode
+    })
+
+    value = parsed['values'][-1] if parsed['values'] else None
+    if result.timed_out:
+        info['error'] = f"PRISM {result.timed_out} phase exceeded its time limit"
+    elif value is None or (front := parse_front(value, num_impacts)) is None:
+        info['error'] = f"No front in the PRISM output: {(result.stdout + result.stderr)[-500:]}"
+    else:
+        info['front'] = front
+    return info
+
+
+_fronts: Dict[str, Dict[str, Any]] = {}
+
+
+def pareto_front(model_name: str, prism_options: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Achievable front of a model (see compute_front), computed once per model content in this process.
+
+    refine_bounds and experiment.single_execution both ask for the front of
+    the same model; only the first call runs PRISM.
+    """
+    key = file_hash(os.path.join('models', f'{model_name}.nm'))
+    if key not in _fronts:
+        _fronts[key] = compute_front(model_name, prism_options)
+    return _fronts[key]
@@ -5,7 +5,7 @@ import json
 import re
 from datetime import datetime
 
-from env import PRISM_PATH
+from launcher import run_prism
 
 
 def get_task_impacts(region):
@@ -50,22 +50,19 @@ def run_prism_analysis(process_name, create_mdp=False):
 
 
     # Run PRISM command
-    cmd = [os.path.abspath(PRISM_PATH) if PRISM_PATH else "prism",
-           os.path.abspath(model_path),
-           "-exporttransdotstates", os.path.abspath(dot_path)]
+    args = [os.path.abspath(model_path),
+            "-exporttransdotstates", os.path.abspath(dot_path)]
 
     if create_mdp:
-        cmd += ["-exportstates", os.path.abspath(states_path),
-                "-exporttrans", os.path.abspath(trans_path)]
+        args += ["-exportstates", os.path.abspath(states_path),
+                 "-exporttrans", os.path.abspath(trans_path)]
 
-    cmd.append("-verbose")
+    args.append("-verbose")
 
 
     try:
-        result = subprocess.run(cmd, 
-                              capture_output=True, 
-                              text=True, 
-                              check=True)
+        result = run_prism(args, check=True)
+        cmd = result.args
         
         output = result.stdout
         
@@ -1,23 +1,112 @@
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 import json
 import os
+import random
+import shutil
+import tempfile
+import time
 from cpi_to_mdp.etl import cpi_to_model
-from sampler import sample_expected_impact
-from analysis import analyze_bounds
+from sources.sampler import sample_expected_impact
+from sources.analysis import cached_analysis_key, model_verdict_store, reset_verdicts
+from sources.pareto import pareto_front, PARETO_EPSILON
+from sources.numeric import minimize_impact, impact_ranges
+from sources.search import SearchState, Tolerance, bisect, converge, search_ray, check
+from sources.checkpoint import RefinementCheckpoint
+from sources.verdict_cache import encoding_fingerprint, VERDICT_CACHE_FILE
+from sources.env import REFINEMENT_STRATEGY, INITIAL_BOUNDS, REFINEMENT_WORKERS, SEARCH_PROBES
+from sources.env import REFINEMENT_ABS_TOLERANCE, REFINEMENT_REL_TOLERANCE, REFINEMENT_BUDGET, VERDICT_INFERENCE
 
-def refine_bounds(process_name: str, num_refinements: int, verbose: bool=False) -> Dict[str, float]:
+STRATEGIES = ("bisection", "pareto", "numeric", "ray")
+INITIALIZATIONS = ("sample", "exact")
+
+def refine_bounds(process_name: str, num_refinements: int, verbose: bool=False,
+                  prism_options: Optional[List[str]]=None, strategy: Optional[str]=None,
+                  stats: Optional[Dict[str, Any]]=None, init: Optional[str]=None,
+                  workers: Optional[int]=None, probes: Optional[int]=None,
+                  abs_tol: Tolerance=None, rel_tol: Tolerance=None,
+                  budget: Optional[float]=None,
+                  checkpoint: Optional[RefinementCheckpoint]=None) -> Dict[str, float]:
     """
     Refine impact bounds through dichotomous search.
+
+    With the "pareto" strategy, the achievable front of the impacts is
+    computed in a single PRISM run (see pareto.pareto_front) and every
+    threshold question of the search is answered from it, without PRISM.
+    The front is approximate, so the final bounds are still checked by
+    PRISM, with the front's -paretoepsilon of slack if needed.
+    Models whose front cannot be computed (more than two impacts) are
+    refined by bisection. The "numeric" strategy replaces the search by
+    optimisation queries (see refine_numeric). The "ray" strategy moves
+    every impact at once (see search.search_ray).
+
+    With WITNESS_TIGHTENING, every satisfied check of the bisection is
+    followed by a witness strategy (see witness.find_witness): when its exact
+    impacts are below the tested bounds, every upper bound jumps to them
+    instead of the midpoint.
+
+    With the "exact" initialization, the search starts from the exact range
+    [min, max] of every impact (numeric.impact_ranges, one PRISM run) instead
+    of [0, sampled bound]; the sampler is the fallback when PRISM fails.
+
+    With more than one worker, the midpoint queries of an iteration are
+    checked concurrently (see search.bisect_concurrently). The nailgun backend
+    runs at most NAILGUN_POOL_SIZE of them at a time.
+
+    With k probes, each query checks k evenly spaced thresholds of one
+    impact in a single PRISM run instead of the midpoint, shrinking its
+    interval by a factor of k+1.
+
+    With a tolerance or a budget, the fixed passes give way to a
+    convergence-driven search (see search.converge): each query goes to the
+    impact with the widest relative gap, until every interval is within its
+    tolerance or the wall-clock budget runs out. The bounds returned are the
+    last satisfied ones either way, and stats['intervals'] holds the
+    remaining gaps.
+
+    With a checkpoint, the state of the bisection and Pareto searches
+    (intervals, best bounds, satisfied and unsatisfied vectors, position in
+    the passes) is saved after every query. A run with the same settings on
+    the same CPI resumes from it, and the checkpoint is cleared once the
+    refinement completes.
     
     Args:
         process_name: Name of the process (without extension)
-        num_refinements: Number of refinement iterations
+        num_refinements: Number of refinement iterations (rounds for "numeric")
+        prism_options: Extra PRISM switches passed to every PRISM run
+        strategy: "bisection", "pareto", "numeric" or "ray" (default: REFINEMENT_STRATEGY from env.py)
+        stats: Filled with the number of PRISM runs ('prism_calls'), of PRISM runs that had to
+            wait for the previous one ('sequential_rounds'), the witness strategy of
+            the final bounds ('witness', None if there is none) and, for a convergence-driven
+            search, the final 'intervals' and why it 'stopped' ("converged", "budget",
+            "iterations" or "error")
+        init: "sample" or "exact" (default: INITIAL_BOUNDS from env.py)
+        workers: Concurrent bisection queries (default: REFINEMENT_WORKERS from env.py)
+        probes: Thresholds probed per query, 0 for one per CPU core (default: SEARCH_PROBES from env.py)
+        abs_tol: Interval width at which an impact is done, one for all or per impact name
+            (default: REFINEMENT_ABS_TOLERANCE from env.py)
+        rel_tol: Same, relative to the upper bound of the impact (default: REFINEMENT_REL_TOLERANCE)
+        budget: Seconds of PRISM work allowed before the bounds reached so far are returned
+            (default: REFINEMENT_BUDGET from env.py)
+        checkpoint: Where the refinement state is saved and resumed from (None: not saved)
         
     Returns:
         Dictionary of refined bounds for each impact
     """
     if num_refinements < 0:
         raise ValueError("Number of refinements must be positive")
+    strategy = strategy or REFINEMENT_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown refinement strategy: {strategy}")
+    init = init or INITIAL_BOUNDS
+    workers = workers or REFINEMENT_WORKERS
+    probes = SEARCH_PROBES if probes is None else probes
+    probes = probes or os.cpu_count() or 1
+    abs_tol = REFINEMENT_ABS_TOLERANCE if abs_tol is None else abs_tol
+    rel_tol = REFINEMENT_REL_TOLERANCE if rel_tol is None else rel_tol
+    budget = REFINEMENT_BUDGET if budget is None else budget
+    deadline = time.monotonic() + budget if budget is not None else None
+    if init not in INITIALIZATIONS:
+        raise ValueError(f"Unknown bounds initialization: {init}")
         
     # Load CPI file
     cpi_path = os.path.join('CPIs', f'{process_name}.cpi')
@@ -30,57 +119,225 @@ def refine_bounds(process_name: str, num_refinements: int, verbose: bool=False)
     # Create MDP model
     cpi_to_model(process_name)
     
-    # Get initial bounds via sampling
-    initial_bounds = sample_expected_impact(cpi_dict)
+    stats = stats if stats is not None else {}
+    stats['prism_calls'] = 0
+    stats['sequential_rounds'] = 0
+    stats['witness'] = None
+
+    # A checkpoint is only resumed by a search with the same settings, on the same encoding
+    targeted = abs_tol is not None or rel_tol is not None or deadline is not None
+    settings = {'strategy': strategy, 'init': init, 'probes': probes, 'workers': workers,
+                'num_refinements': num_refinements, 'targeted': targeted, 'encoding': encoding_fingerprint()}
+    saved = checkpoint.load() if checkpoint is not None and strategy != "numeric" else None
+    if saved is not None and saved.get('settings') != settings:
+        saved = None
+
+    # Get initial bounds via exact range queries or sampling
+    lower_bounds: Dict[str, float] = {}
+    initial_bounds = {}
+    if saved is not None:
+        initial_bounds = saved['initial_bounds']
+    elif init == "exact":
+        lower_bounds, initial_bounds = exact_bounds(process_name, cpi_dict, prism_options)
+        stats['prism_calls'] += 1
+        stats['sequential_rounds'] += 1
+    if not initial_bounds:
+        initial_bounds = sample_expected_impact(cpi_dict)
     if not initial_bounds:
         raise ValueError("No impacts found in the model")
+    if strategy == "numeric":
+        final_bounds, s = refine_numeric(process_name, initial_bounds, num_refinements, prism_options,
+                                         verbose, stats)
+        # Every numeric query depends on the previous one
+        stats['sequential_rounds'] = stats['prism_calls']
+        return initial_bounds, final_bounds, s
         
     # Initialize intervals for each impact
     intervals = {
-        impact_name: [0.0, bound_value]
+        impact_name: [lower_bounds.get(impact_name, 0.0), bound_value]
         for impact_name, bound_value in initial_bounds.items()
     }
     final_bounds = initial_bounds
 
-    # Perform refinements
-    for iteration in range(num_refinements):
-        for current_impact in intervals.keys():
-            # Create test bounds - split current impact, keep others at upper bound
-            test_bounds = {
-                name: intervals[name][1] if name != current_impact 
-                else (intervals[name][0] + intervals[name][1]) / 2
-                for name in intervals
-            }
-            
-            # Test these bounds
-            result = analyze_bounds(process_name, test_bounds)
-            
-            # Update interval based on result
-            if result['result']:  # Property satisfied
-                final_bounds = {
-                    impact_name: interval[1] for impact_name, interval in intervals.items()
-                }
-                intervals[current_impact][1] = (intervals[current_impact][0] + intervals[current_impact][1]) / 2
-            else:  # Property not satisfied
-                intervals[current_impact][0] = (intervals[current_impact][0] + intervals[current_impact][1]) / 2
-    
-            # Print progress
-            print_refinement_progress(iteration, current_impact, intervals, test_bounds, result['result']) if verbose else None
+    # Hashed once: the CPI does not change during the search
+    cpi_key = cached_analysis_key(process_name) if VERDICT_INFERENCE else None
+    start, done = 0, []
+    if saved is not None:
+        intervals, final_bounds = saved['intervals'], saved['final_bounds']
+        start, done = saved['iteration'], saved['done']
+        for key in ('prism_calls', 'sequential_rounds', 'witness'):
+            stats[key] = saved[key]
+        store = model_verdict_store(process_name, cpi_key) if VERDICT_INFERENCE else None
+        for vector in saved['satisfied'] if store is not None else []:
+            store.add(vector, True)
+        for vector in saved['unsatisfied'] if store is not None else []:
+            store.add(vector, False)
+        print(f"Resuming the refinement of {process_name} at iteration {start + 1} ({stats['prism_calls']} PRISM calls done)")
+
+    front = None
+    if strategy == "pareto":
+        front_info = pareto_front(process_name, prism_options)
+        front = front_info['front']
+        stats['prism_calls'] += 1
+        stats['sequential_rounds'] += 1
+        if front is None:
+            print(f"No Pareto front ({front_info.get('error')}), refining by bisection")
+        elif verbose:
+            print("Pareto front:", front)
+
+    state = SearchState(process_name, intervals, final_bounds, stats, num_refinements, probes=probes,
+                        workers=workers, prism_options=prism_options, verbose=verbose, front=front,
+                        lower_bounds=lower_bounds, deadline=deadline, abs_tol=abs_tol, rel_tol=rel_tol,
+                        start=start, done=done, checkpoint=checkpoint, settings=settings,
+                        initial_bounds=initial_bounds, infer=VERDICT_INFERENCE, cpi_key=cpi_key)
+    if targeted:
+        final_bounds = converge(state)
+    elif strategy == "ray":
+        final_bounds = search_ray(state)
+    else:
+        final_bounds = bisect(state)
 
+    stats['intervals'] = {name: list(interval) for name, interval in intervals.items()}
+    result = check(state, final_bounds)
+    if result['result'] is False and front is not None:
+        # The front is only within -paretoepsilon of the true one: the bounds may need that much slack
+        relaxed = {name: value + PARETO_EPSILON * max(1.0, abs(value)) for name, value in final_bounds.items()}
+        relaxed_result = check(state, relaxed)
+        if relaxed_result['result']:
+            final_bounds, result = relaxed, relaxed_result
+    if verbose:
+        print(f"Verdicts: {state.verdict_sources['computed']} computed, {state.verdict_sources['inferred']} inferred")
 
-    result = analyze_bounds(process_name, final_bounds)
+    # Only a witness of the final bounds is kept
+    witness = stats['witness']
+    if witness is not None and any(value > final_bounds[name] + 1e-9 for name, value in witness['bounds'].items()):
+        stats['witness'] = None
 
     s = ""
     if not result['result']: # Solution not found
         s = "No solution found"
 
+    if checkpoint is not None:
+        checkpoint.clear()
     return initial_bounds, final_bounds, s
 
-def print_refinement_progress(iteration: int, impact_name: str, intervals: Dict[str, List[float]],
-                            test_bounds: Dict[str, float], result: bool) -> None:
-    """Helper function to print refinement progress."""
-    print(f"\nIteration {iteration + 1}:")
-    print(f"Testing impact: {impact_name}")
-    print("Current intervals:", {k: [round(v[0], 6), round(v[1], 6)] for k, v in intervals.items()})
-    print("Test bounds:", {k: round(v, 6) for k, v in test_bounds.items()})
-    print("Result:", "Satisfied" if result else "Not satisfied")
\ No newline at end of file
+def impact_names(node: Any) -> List[str]:
+    """Sorted names of the impacts of every task of a CPI (the order of the impact_i rewards)."""
+    names = set()
+    if isinstance(node, dict):
+        if node.get('type') == 'task':
+            names.update(node.get('impacts', {}))
+        for value in node.values():
+            names.update(impact_names(value))
+    elif isinstance(node, list):
+        for item in node:
+            names.update(impact_names(item))
+    return sorted(names)
+
+def exact_bounds(process_name: str, cpi_dict: Dict[str, Any],
+                 prism_options: Optional[List[str]]) -> tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Exact minimum and maximum expected value of every impact (see numeric.impact_ranges).
+
+    Returns:
+        The lower and the upper bounds, both empty if they could not be computed
+    """
+    names = impact_names(cpi_dict)
+    ranges = impact_ranges(process_name, prism_options)
+    if ranges['min'] is None or len(ranges['min']) != len(names):
+        print(f"No exact impact ranges ({ranges.get('error') or 'reward count mismatch'}), sampling initial bounds")
+        return {}, {}
+    return dict(zip(names, ranges['min'])), dict(zip(names, ranges['max']))
+
+def refine_numeric(process_name: str, initial_bounds: Dict[str, float], max_rounds: int,
+                   prism_options: Optional[List[str]], verbose: bool,
+                   stats: Dict[str, Any]) -> tuple[Dict[str, float], str]:
+    """
+    Refine impact bounds with numeric multi-objective queries.
+
+    Each impact in turn is set to its minimum expected value under the
+    current bounds of the others (numeric.minimize_impact), until a round
+    leaves every bound unchanged. The optimal strategy of a query meets all
+    the bounds at once, so the result needs no final check.
+
+    Args:
+        process_name: Name of the process (without extension)
+        initial_bounds: Sampled bounds the search starts from
+        max_rounds: Maximum number of rounds over the impacts
+        prism_options: Extra PRISM switches passed to every PRISM run
+        verbose: Print every query
+        stats: Updated with 'prism_calls' and 'rounds'
+
+    Returns:
+        The refined bounds and "No solution found" if the last query was infeasible ("" otherwise)
+    """
+    # The encoding numbers the impact_i rewards in the sorted order of the impact names
+    names = sorted(initial_bounds)
+    bounds = [initial_bounds[name] for name in names]
+    achievable = False
+    stats['rounds'] = 0
+
+    for round_index in range(max(max_rounds, 1)):
+        stats['rounds'] += 1
+        changed = False
+        for i, name in enumerate(names):
+            info = minimize_impact(process_name, i, bounds, prism_options)
+            stats['prism_calls'] += 1
+            achievable = info['value'] is not None
+            if verbose:
+                print(f"Round {round_index + 1}: min {name} = {info['value']} ({info.get('error') or info['property']})")
+            if not achievable:
+                continue
+            if abs(info['value'] - bounds[i]) > 1e-6 * max(1.0, abs(bounds[i])):
+                changed = True
+            bounds[i] = info['value']
+        # A single impact has no other bound to tighten
+        if not changed or len(names) == 1:
+            break
+
+    print(f"Numeric refinement: {stats['prism_calls']} PRISM calls in {stats['rounds']} rounds")
+    return dict(zip(names, bounds)), "" if achievable else "No solution found"
+
+def compare_strategies(process_name: str, num_refinements: int, strategies: tuple = ("bisection", "numeric"),
+                       seed: int = 0, cold: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Run refine_bounds with several strategies and compare their PRISM calls and wall-clock time.
+
+    The sampler is reseeded before each run, so every strategy starts from the
+    same initial bounds. Verdicts answered by the verdict cache or by
+    dominance are not PRISM calls: with cold, every strategy starts from an
+    empty dominance store and a throwaway verdict cache, so none benefits
+    from the verdicts of another.
+
+    Returns:
+        Dictionary mapping strategy to prism_calls, sequential_rounds, time (seconds),
+        final_bounds and gap (widest remaining interval, relative to its upper bound)
+    """
+    comparison = {}
+    for strategy in strategies:
+        random.seed(seed)
+        stats: Dict[str, Any] = {}
+        cache_dir = tempfile.mkdtemp() if cold else None
+        if cold:
+            reset_verdicts(os.path.join(cache_dir, VERDICT_CACHE_FILE))
+        start = time.time()
+        try:
+            _, final_bounds, s = refine_bounds(process_name, num_refinements, prism_options=None,
+                                               strategy=strategy, stats=stats)
+        finally:
+            if cold:
+                reset_verdicts()
+                shutil.rmtree(cache_dir, ignore_errors=True)
+        comparison[strategy] = {
+            'prism_calls': stats['prism_calls'],
+            'sequential_rounds': stats['sequential_rounds'],
+            'time': time.time() - start,
+            'final_bounds': final_bounds,
+            'gap': max(((upper - lower) / max(abs(upper), 1e-12) for lower, upper in stats['intervals'].values()),
+                       default=0.0) if 'intervals' in stats else None,
+            'error': s
+        }
+    for strategy, row in comparison.items():
+        print(f"{strategy}: {row['prism_calls']} PRISM calls, {row['time']:.2f}s, "
+              f"bounds {{{', '.join(f'{k}: {v:.6f}' for k, v in sorted(row['final_bounds'].items()))}}}")
+    return comparison
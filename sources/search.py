@@ -0,0 +1,424 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Any, Dict, List, Optional, Union
+
+from sources.analysis import analyze_bounds, known_verdict, threshold_vector, threshold_names
+from sources.analysis import model_verdict_store
+from sources.pareto import front_contains
+from sources.witness import find_witness
+from sources.checkpoint import RefinementCheckpoint
+from sources.env import WITNESS_TIGHTENING, PRISM_CHECK_TIMEOUT
+
+Tolerance = Union[float, Dict[str, float], None]
+
+RAY_ROUNDS = 2 # Segments searched by the "ray" strategy: the first one, then the impacts left with slack
+
+
+@dataclass
+class SearchState:
+    """
+    State shared by the search strategies of refine_bounds.
+
+    The strategies shrink the [lower, upper] interval of every impact and
+    return the last satisfied bounds. A resumed search starts at position
+    start of its passes, with the impacts in done already queried there.
+    """
+    process_name: str
+    intervals: Dict[str, List[float]]
+    final_bounds: Dict[str, float] # Satisfied bounds the search starts from
+    stats: Dict[str, Any]
+    num_refinements: int
+    probes: int = 1
+    workers: int = 1
+    prism_options: Optional[List[str]] = None
+    verbose: bool = False
+    front: Optional[List[List[float]]] = None # Pareto front answering the queries instead of PRISM
+    lower_bounds: Dict[str, float] = field(default_factory=dict) # Initial lower bounds (0 if missing)
+    deadline: Optional[float] = None # time.monotonic() at which the budget runs out
+    abs_tol: Tolerance = None
+    rel_tol: Tolerance = None
+    start: int = 0
+    done: List[str] = field(default_factory=list)
+    checkpoint: Optional[RefinementCheckpoint] = None
+    settings: Dict[str, Any] = field(default_factory=dict) # Saved with the checkpoint
+    initial_bounds: Dict[str, float] = field(default_factory=dict)
+    infer: bool = False # Verdicts are inferred by dominance (VERDICT_INFERENCE)
+    cpi_key: Optional[str] = None # cached_analysis_key of the model, when inferring
+    verdict_sources: Dict[str, int] = field(default_factory=lambda: {'inferred': 0, 'computed': 0})
+    calls_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def save(state: SearchState, position: int, done: List[str], best: Dict[str, float]):
+    """Checkpoint the search at a position of its passes (nothing without a checkpoint)."""
+    if state.checkpoint is None:
+        return
+    store = model_verdict_store(state.process_name, state.cpi_key) if state.infer else None
+    state.checkpoint.save({
+        'settings': state.settings,
+        'initial_bounds': state.initial_bounds,
+        'intervals': state.intervals,
+        'final_bounds': best,
+        'iteration': position,
+        'done': done,
+        'satisfied': store.satisfied if store is not None else [],
+        'unsatisfied': store.unsatisfied if store is not None else [],
+        'prism_calls': state.stats['prism_calls'],
+        'sequential_rounds': state.stats['sequential_rounds'],
+        'witness': state.stats['witness']
+    })
+
+
+def probe(state: SearchState, tests: List[Dict[str, float]], pctl_name: Optional[str] = None,
+          budgeted: bool = True, use_front: bool = True) -> tuple[List[Optional[bool]], List[str], bool]:
+    """
+    Verdicts and verdict sources of threshold vectors checked in one PRISM run, and whether PRISM ran.
+
+    A verdict is None when PRISM failed or ran out of the budget.
+    With a Pareto front (and use_front), the verdicts are read from it instead.
+    """
+    if state.front is not None and use_front:
+        return [front_contains(state.front, threshold_vector(t)) for t in tests], ['inferred'] * len(tests), False
+    check_timeout = PRISM_CHECK_TIMEOUT
+    if state.deadline is not None and budgeted:
+        remaining = max(state.deadline - time.monotonic(), 0.0)
+        check_timeout = remaining if check_timeout is None else min(check_timeout, remaining)
+    analysis_info = analyze_bounds(state.process_name, tests if len(tests) > 1 else tests[0],
+                                   check_timeout=check_timeout, prism_options=state.prism_options,
+                                   pctl_name=pctl_name)
+    ran = ran_prism(analysis_info)
+    if ran:
+        with state.calls_lock:
+            state.stats['prism_calls'] += 1
+    verdicts = analysis_info['result'] if len(tests) > 1 else [analysis_info['result']]
+    sources = analysis_info['verdict_source'] if len(tests) > 1 else [analysis_info['verdict_source']]
+    return [v if v is None else bool(v) for v in verdicts or [None] * len(tests)], sources, ran
+
+
+def check(state: SearchState, bounds: Dict[str, float]) -> Dict:
+    """
+    Check bounds with PRISM, e.g. the final ones.
+
+    Not limited by the budget: the final check must not lose the bounds already reached.
+    It always runs PRISM, so the bounds returned never rest on the approximate Pareto front alone.
+    """
+    verdicts, sources, ran = probe(state, [bounds], budgeted=False, use_front=False)
+    state.stats['sequential_rounds'] += ran
+    state.verdict_sources[sources[0]] += 1
+    return {'result': verdicts[0], 'verdict_source': sources[0]}
+
+
+def apply_probes(intervals: Dict[str, List[float]], impact_name: str, tests: List[Dict[str, float]],
+                 verdicts: List[bool]) -> Optional[Dict[str, float]]:
+    """
+    Shrink an interval to the gap between its last unsatisfied and first satisfied probe.
+
+    Returns:
+        The satisfied probe, or None if every probe failed
+    """
+    first = next((j for j, verdict in enumerate(verdicts) if verdict), None)
+    if first is None:
+        intervals[impact_name][0] = tests[-1][impact_name]
+        return None
+    if first > 0:
+        intervals[impact_name][0] = tests[first - 1][impact_name]
+    intervals[impact_name][1] = tests[first][impact_name]
+    return tests[first]
+
+
+def tighten(state: SearchState, test_bounds: Dict[str, float]) -> Optional[Dict[str, float]]:
+    """
+    Close every interval at the exact impacts of a strategy achieving the test bounds.
+
+    The strategy minimises a positively weighted sum of the impacts, so it is
+    Pareto optimal: with the other impacts at their achieved values, no
+    impact can go lower, and the search is over.
+
+    Returns:
+        The achieved impacts, or None if no witness strategy was found
+    """
+    witness = find_witness(state.process_name, threshold_vector(test_bounds), state.prism_options)
+    state.stats['prism_calls'] += 2
+    state.stats['sequential_rounds'] += 2
+    if witness is None or not witness['witnesses']:
+        return None
+    achieved = dict(zip(threshold_names(test_bounds), witness['vector']))
+    for name, value in achieved.items():
+        state.intervals[name] = [value, value]
+    state.stats['witness'] = {**witness, 'bounds': achieved}
+    return achieved
+
+
+def count_sources(state: SearchState, sources: List[str]):
+    for source in sources:
+        state.verdict_sources[source] += 1
+
+
+def bisect(state: SearchState) -> Dict[str, float]:
+    """
+    Passes over the impacts, each query splitting one interval with the others at their upper bound.
+
+    Queries whose verdicts are already known go first in a pass. With more
+    than one worker (and no Pareto front), each pass is run by
+    bisect_concurrently instead.
+
+    Returns:
+        The last satisfied bounds
+    """
+    intervals, final_bounds = state.intervals, state.final_bounds
+    done = state.done
+    for iteration in range(state.start, state.num_refinements):
+        if iteration != state.start:
+            done = []
+        if state.workers > 1 and state.front is None:
+            final_bounds = bisect_concurrently(state, iteration) or final_bounds
+            save(state, iteration + 1, [], final_bounds)
+            continue
+
+        pending = [name for name in intervals if name not in done]
+        while pending:
+            # Intervals closed by a witness need no more checks
+            pending = [name for name in pending if intervals[name][1] - intervals[name][0] > 1e-12]
+            if not pending:
+                break
+            # Queries implied by known verdicts go first: they cost no PRISM call,
+            # and the intervals they shrink make the remaining queries more likely to be implied too
+            current_impact = next((name for name in pending
+                                   if state.infer and state.front is None
+                                   and all(known_verdict(state.process_name, state.cpi_key, test) is not None
+                                           for test in probe_bounds(intervals, name, state.probes))),
+                                  pending[0])
+            pending.remove(current_impact)
+
+            # Split the current impact, keep the others at their upper bound; all probes in one PRISM run
+            tests = probe_bounds(intervals, current_impact, state.probes)
+            verdicts, sources, ran = probe(state, tests)
+            state.stats['sequential_rounds'] += ran
+            count_sources(state, sources)
+
+            upper_bounds = {impact_name: interval[1] for impact_name, interval in intervals.items()}
+            satisfied = apply_probes(intervals, current_impact, tests, verdicts)
+            if satisfied is not None:
+                final_bounds = upper_bounds
+                if WITNESS_TIGHTENING and state.front is None:
+                    final_bounds = tighten(state, satisfied) or final_bounds
+
+            print_refinement_progress(iteration, current_impact, intervals, satisfied or tests[-1],
+                                      satisfied is not None, sources[-1]) if state.verbose else None
+            done.append(current_impact)
+            save(state, iteration, done, final_bounds)
+    return final_bounds
+
+
+def bisect_concurrently(state: SearchState, iteration: int) -> Optional[Dict[str, float]]:
+    """
+    One iteration with the probes of every open interval checked at once.
+
+    Each query splits one interval with the others at their upper bound at
+    the start of the iteration, so the queries are independent; each
+    worker writes its own property file. Results are merged in impact
+    order. Two satisfied queries do not imply that both lowered bounds hold
+    together, so the joint vector is checked; if it fails, only the first
+    satisfied split is kept.
+
+    Returns:
+        The satisfied bounds reached in this iteration, or None
+    """
+    intervals = state.intervals
+    pending = sorted(name for name, interval in intervals.items() if interval[1] - interval[0] > 1e-12)
+    if not pending:
+        return None
+    tests = {name: probe_bounds(intervals, name, state.probes) for name in pending}
+    with ThreadPoolExecutor(max_workers=min(state.workers, len(pending))) as pool:
+        futures = {name: pool.submit(probe, state, tests[name], f"{state.process_name}.{index}")
+                   for index, name in enumerate(pending)}
+        results = {name: future.result() for name, future in futures.items()}
+    state.stats['sequential_rounds'] += any(ran for _, _, ran in results.values())
+
+    satisfied = []
+    for name in pending:
+        verdicts, sources, _ = results[name]
+        count_sources(state, sources)
+        previous_upper = intervals[name][1]
+        if apply_probes(intervals, name, tests[name], verdicts) is not None:
+            satisfied.append((name, previous_upper))
+        print_refinement_progress(iteration, name, intervals, tests[name][-1], any(verdicts),
+                                  sources[-1]) if state.verbose else None
+    if not satisfied:
+        return None
+
+    reached = {name: interval[1] for name, interval in intervals.items()}
+    if len(satisfied) > 1 and not check(state, reached)['result']:
+        for name, previous_upper in satisfied[1:]:
+            intervals[name][1] = previous_upper
+        reached = {name: interval[1] for name, interval in intervals.items()}
+    if WITNESS_TIGHTENING:
+        return tighten(state, reached) or reached
+    return reached
+
+
+def target_width(state: SearchState, impact_name: str) -> float:
+    """Interval width at which an impact is done, from its absolute and relative tolerances."""
+    absolute = state.abs_tol.get(impact_name, 0.0) if isinstance(state.abs_tol, dict) else state.abs_tol or 0.0
+    relative = state.rel_tol.get(impact_name, 0.0) if isinstance(state.rel_tol, dict) else state.rel_tol or 0.0
+    return max(absolute, relative * abs(state.intervals[impact_name][1]), 1e-12)
+
+
+def converge(state: SearchState) -> Dict[str, float]:
+    """
+    Query the impact with the widest relative gap until every interval is within its tolerance.
+
+    At most num_refinements queries per impact are made; an impact that
+    used them up is left as it is. PRISM runs are limited to the remaining
+    budget; an unanswered query ends the search. The impacts queried so far,
+    one entry per query, are checkpointed as done.
+
+    Returns:
+        The last satisfied bounds
+    """
+    intervals, stats = state.intervals, state.stats
+    reached = state.final_bounds
+    history = list(state.done)
+    queries = Counter(history)
+    stats['stopped'] = "iterations"
+    for query in count(state.start):
+        unconverged = [name for name in sorted(intervals)
+                       if intervals[name][1] - intervals[name][0] > target_width(state, name)]
+        if not unconverged:
+            stats['stopped'] = "converged"
+            break
+        unconverged = [name for name in unconverged if queries[name] < state.num_refinements]
+        if not unconverged:
+            break
+        if state.deadline is not None and time.monotonic() >= state.deadline:
+            stats['stopped'] = "budget"
+            break
+        current_impact = max(unconverged, key=lambda name: (intervals[name][1] - intervals[name][0])
+                             / max(abs(intervals[name][1]), 1e-12))
+
+        tests = probe_bounds(intervals, current_impact, state.probes)
+        verdicts, sources, ran = probe(state, tests)
+        stats['sequential_rounds'] += ran
+        if any(verdict is None for verdict in verdicts):
+            stats['stopped'] = ("budget" if state.deadline is not None and time.monotonic() >= state.deadline
+                                else "error")
+            break
+        count_sources(state, sources)
+        queries[current_impact] += 1
+        history.append(current_impact)
+
+        satisfied = apply_probes(intervals, current_impact, tests, verdicts)
+        if satisfied is not None:
+            # The satisfied probe itself: the bounds reached so far, whenever the search stops
+            reached = satisfied
+            if WITNESS_TIGHTENING and state.front is None:
+                reached = tighten(state, satisfied) or reached
+        print_refinement_progress(query, current_impact, intervals, satisfied or tests[-1],
+                                  satisfied is not None, sources[-1]) if state.verbose else None
+        save(state, query + 1, history, reached)
+
+    stats['intervals'] = {name: list(interval) for name, interval in intervals.items()}
+    print(f"Refinement stopped ({stats['stopped']}): "
+          f"{{{', '.join(f'{k}: [{v[0]:.6f}, {v[1]:.6f}]' for k, v in sorted(stats['intervals'].items()))}}}")
+    return reached
+
+
+def search_ray(state: SearchState) -> Dict[str, float]:
+    """
+    Joint search on the segment between the lower and the upper corner of the intervals.
+
+    Every probe moves all impacts at once, so each query shrinks every
+    interval by a factor of k+1: num_refinements queries reach the
+    precision that bisection reaches with num_refinements queries per
+    impact. The boundary point found is only weakly Pareto optimal, so
+    each impact is then checked at its lower end with the others at their
+    upper bound; those that pass are searched again together, from their
+    initial lower bound, in a second round.
+
+    Returns:
+        The last satisfied bounds
+    """
+    intervals, probes, done = state.intervals, state.probes, state.done
+    reached = state.final_bounds
+    # Width every interval reaches along the first segment
+    target = {name: max((upper - lower) / (probes + 1) ** state.num_refinements, 1e-12)
+              for name, (lower, upper) in intervals.items()}
+    first_step = state.start
+    for round_index in range(RAY_ROUNDS):
+        open_impacts = [name for name in sorted(intervals)
+                        if name not in done and intervals[name][1] - intervals[name][0] > target[name]]
+        for step in range(first_step, state.num_refinements):
+            if all(intervals[name][1] - intervals[name][0] <= target[name] for name in open_impacts):
+                break
+            upper_bounds = {name: interval[1] for name, interval in intervals.items()}
+            tests = [{**upper_bounds, **{name: intervals[name][0] + (intervals[name][1] - intervals[name][0])
+                                         * j / (probes + 1) for name in open_impacts}}
+                     for j in range(1, probes + 1)]
+            verdicts, sources, ran = probe(state, tests)
+            state.stats['sequential_rounds'] += ran
+            count_sources(state, sources)
+
+            first = next((j for j, verdict in enumerate(verdicts) if verdict), None)
+            for name in open_impacts:
+                if first != 0:
+                    intervals[name][0] = tests[first - 1 if first is not None else -1][name]
+                if first is not None:
+                    intervals[name][1] = tests[first][name]
+            if first is not None:
+                reached = tests[first]
+                if WITNESS_TIGHTENING:
+                    reached = tighten(state, reached) or reached
+            print_refinement_progress(step, ", ".join(open_impacts), intervals,
+                                      tests[first if first is not None else -1],
+                                      first is not None, sources[-1]) if state.verbose else None
+            save(state, step + 1, done, reached)
+        first_step = 0
+
+        # Impacts that can still go lower on their own
+        slack = []
+        for name in open_impacts:
+            if round_index < RAY_ROUNDS - 1 and intervals[name][1] - intervals[name][0] > 1e-12:
+                lowest = {**{other: interval[1] for other, interval in intervals.items()},
+                          name: intervals[name][0]}
+                verdicts, sources, ran = probe(state, [lowest])
+                state.stats['sequential_rounds'] += ran
+                count_sources(state, sources)
+                if verdicts[0]:
+                    reached = lowest
+                    intervals[name] = [state.lower_bounds.get(name, 0.0), intervals[name][0]]
+                    slack.append(name)
+                    continue
+            done.append(name)
+        save(state, 0, done, reached)
+        if not slack:
+            break
+    return reached
+
+
+def probe_bounds(intervals: Dict[str, List[float]], impact_name: str, probes: int) -> List[Dict[str, float]]:
+    """Test bounds at probes evenly spaced points of one interval, with the others at their upper bound."""
+    lower, upper = intervals[impact_name]
+    return [{**{name: interval[1] for name, interval in intervals.items()},
+             impact_name: lower + (upper - lower) * j / (probes + 1)}
+            for j in range(1, probes + 1)]
+
+
+def ran_prism(analysis_info: Dict[str, Any]) -> bool:
+    """True if analyze_bounds had to run PRISM (a verdict was neither inferred nor cached)."""
+    sources = analysis_info.get('verdict_source')
+    if isinstance(sources, list):
+        return sources.count('computed') > (analysis_info.get('cached') or 0)
+    return sources == 'computed' and not analysis_info.get('cached')
+
+
+def print_refinement_progress(iteration: int, impact_name: str, intervals: Dict[str, List[float]],
+                              test_bounds: Dict[str, float], result: bool, source: Optional[str] = None) -> None:
+    """Helper function to print refinement progress."""
+    print(f"\nIteration {iteration + 1}:")
+    print(f"Testing impact: {impact_name}")
+    print("Current intervals:", {k: [round(v[0], 6), round(v[1], 6)] for k, v in intervals.items()})
+    print("Test bounds:", {k: round(v, 6) for k, v in test_bounds.items()})
+    print("Result:", "Satisfied" if result else "Not satisfied", f"({source})" if source else "")
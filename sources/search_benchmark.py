@@ -0,0 +1,69 @@
+import json
+import os
+import random
+from typing import Any, Dict, Iterable
+
+from refinements import compare_strategies
+
+BENCHMARK_PROCESS = "search_benchmark" # Written to CPIs/ and models/
+NUM_CHOICES = 4 # Choices in sequence, each between two tasks
+
+
+def synthetic_cpi(num_impacts: int, num_choices: int = NUM_CHOICES, seed: int = 0) -> Dict[str, Any]:
+    """
+    CPI of a sequence of choices between two tasks with random impacts.
+
+    Each choice trades some impacts against the others, so the achievable
+    set has a front in every dimension and no strategy dominates.
+    """
+    rng = random.Random(seed)
+    names = [f"impact_{i}" for i in range(num_impacts)]
+    region_id = 0
+
+    def task() -> Dict[str, Any]:
+        nonlocal region_id
+        region_id += 1
+        return {"type": "task", "id": region_id, "duration": 1,
+                "impacts": {name: round(rng.uniform(0.1, 1.0), 2) for name in names}}
+
+    def choice() -> Dict[str, Any]:
+        nonlocal region_id
+        region_id += 1
+        return {"type": "choice", "id": region_id, "true": task(), "false": task()}
+
+    root = choice()
+    for _ in range(num_choices - 1):
+        region_id += 1
+        root = {"type": "sequence", "id": region_id, "head": root, "tail": choice()}
+    return root
+
+
+def benchmark_search(impact_counts: Iterable[int] = range(1, 11), num_refinements: int = 6,
+                     strategies: tuple = ("bisection", "ray"), seed: int = 0) -> Dict[int, Dict[str, Dict[str, Any]]]:
+    """
+    Compare the PRISM calls of refinement strategies on synthetic CPIs with 1 to 10 impacts.
+
+    Every strategy runs from a cold verdict cache (see
+    refinements.compare_strategies) with the same number of refinements, so
+    their final gaps are comparable.
+
+    Returns:
+        Dictionary mapping the number of impacts to the comparison of the strategies
+    """
+    results = {}
+    for num_impacts in impact_counts:
+        with open(os.path.join('CPIs', f'{BENCHMARK_PROCESS}.cpi'), 'w') as f:
+            json.dump(synthetic_cpi(num_impacts, seed=seed), f)
+        results[num_impacts] = compare_strategies(BENCHMARK_PROCESS, num_refinements, strategies, seed, cold=True)
+
+    print(f"\n{'impacts':>7} " + " ".join(f"{strategy + ' calls':>16} {'gap':>8}" for strategy in strategies))
+    for num_impacts, comparison in results.items():
+        print(f"{num_impacts:>7} " + " ".join(
+            f"{comparison[strategy]['prism_calls']:>16} "
+            f"{comparison[strategy]['gap'] if comparison[strategy]['gap'] is not None else float('nan'):>8.4f}"
+            for strategy in strategies))
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_search()
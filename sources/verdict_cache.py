@@ -0,0 +1,219 @@
+import contextlib
+import functools
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sources.env import VERDICT_CACHE_MAX_ENTRIES, VERDICT_CACHE_MAX_AGE
+
+VERDICT_CACHE_FILE = ".prism_verdicts.sqlite"
+ENCODING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cpi_to_mdp")
+
+# Keys that identify a region without changing the process it describes
+IGNORED_KEYS = ("id", "metadata")
+
+
+def canonical_cpi(node: Any) -> Any:
+    """
+    Canonical form of a CPI region tree.
+
+    Region IDs are dropped and the two branches of every parallel region are
+    put in a fixed order, so CPIs that only differ in numbering or in the
+    order of parallel branches (isomorphic models, with the same verdicts)
+    get the same form. Sequences, choices and natures keep their order.
+    """
+    if isinstance(node, list):
+        return [canonical_cpi(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    canonical = {key: canonical_cpi(value) for key, value in node.items() if key not in IGNORED_KEYS}
+    if canonical.get("type") == "parallel":
+        first, second = sorted((canonical["first_split"], canonical["second_split"]),
+                               key=lambda branch: json.dumps(branch, sort_keys=True))
+        canonical["first_split"], canonical["second_split"] = first, second
+    return canonical
+
+
+def cpi_hash(cpi_dict: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical form of a CPI."""
+    return hashlib.sha256(json.dumps(canonical_cpi(cpi_dict), sort_keys=True).encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def encoding_fingerprint() -> str:
+    """
+    Fingerprint of the CPI to PRISM encoding.
+
+    It hashes the sources of cpi_to_mdp, so verdicts (and the state counts
+    stored with them) of an older encoding are never returned.
+    """
+    h = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(ENCODING_DIR, "*.py"))):
+        with open(path, 'rb') as f:
+            h.update(os.path.basename(path).encode() + b"\0" + f.read())
+    return h.hexdigest()[:16]
+
+
+def threshold_key(vector: List[float]) -> str:
+    """Threshold vector as stored in the cache, at the precision written to the property."""
+    # analyze_bounds passes the vectors through analysis.property_threshold first
+    return ','.join(f'{value:0.6f}' for value in vector)
+
+
+class VerdictCache:
+    """
+    Persistent cache of analyze_bounds results, in SQLite.
+
+    Entries are keyed by the canonical CPI hash, the threshold vector and the
+    encoding fingerprint, and evicted by age and, beyond max_entries, least
+    recently used first. Hits and misses are counted in the database, so the
+    hit rate covers every process that shares the file (watchdog restarts,
+    benchmark reruns).
+    """
+
+    def __init__(self, path: str = VERDICT_CACHE_FILE, max_entries: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    cpi_hash TEXT,
+                    thresholds TEXT,
+                    encoding TEXT,
+                    result TEXT,
+                    created REAL,
+                    last_used REAL,
+                    hits INTEGER DEFAULT 0,
+                    PRIMARY KEY (cpi_hash, thresholds, encoding)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS verdicts_last_used ON verdicts (last_used)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER
+                )
+            ''')
+            conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        A short-lived connection per call, so that concurrent workers only lock the file briefly.
+
+        The block runs as one transaction (committed, or rolled back on an error)
+        and the connection is closed when it exits.
+        """
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def get(self, cpi_key: str, vector: List[float], encoding: str) -> Optional[Dict[str, Any]]:
+        """Stored result for a CPI and threshold vector, or None (the lookup is counted as a hit or a miss)."""
+        key = (cpi_key, threshold_key(vector), encoding)
+        with self._connect() as conn:
+            row = conn.execute('SELECT result, created FROM verdicts WHERE cpi_hash=? AND thresholds=? AND encoding=?',
+                               key).fetchone()
+            if row is not None and self.max_age is not None and time.time() - row[1] > self.max_age:
+                conn.execute('DELETE FROM verdicts WHERE cpi_hash=? AND thresholds=? AND encoding=?', key)
+                conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'evictions'")
+                row = None
+            if row is None:
+                conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'misses'")
+                return None
+            conn.execute('UPDATE verdicts SET last_used=?, hits = hits + 1 WHERE cpi_hash=? AND thresholds=? AND encoding=?',
+                         (time.time(),) + key)
+            conn.execute("UPDATE stats SET value = value + 1 WHERE name = 'hits'")
+        return json.loads(row[0])
+
+    def put(self, cpi_key: str, vector: List[float], encoding: str, result: Dict[str, Any]):
+        """Store the result of a check, then apply the eviction policy."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO verdicts (cpi_hash, thresholds, encoding, result, created, last_used) '
+                         'VALUES (?, ?, ?, ?, ?, ?)',
+                         (cpi_key, threshold_key(vector), encoding, json.dumps(result, default=str), now, now))
+        self.evict()
+
+    def verdicts(self, cpi_key: str, encoding: str) -> List[Tuple[List[float], bool]]:
+        """Every stored threshold vector of a CPI with its verdict (not counted as lookups)."""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT thresholds, result FROM verdicts WHERE cpi_hash=? AND encoding=?',
+                                (cpi_key, encoding)).fetchall()
+        entries = []
+        for thresholds, result in rows:
+            verdict = json.loads(result).get('result')
+            if isinstance(verdict, bool):
+                entries.append(([float(v) for v in thresholds.split(',')], verdict))
+        return entries
+
+    def evict(self) -> int:
+        """
+        Remove entries older than max_age, then the least recently used ones beyond max_entries.
+
+        Returns:
+            Number of evicted entries
+        """
+        evicted = 0
+        with self._connect() as conn:
+            if self.max_age is not None:
+                evicted += conn.execute('DELETE FROM verdicts WHERE created < ?',
+                                        (time.time() - self.max_age,)).rowcount
+            if self.max_entries is not None:
+                evicted += conn.execute('''
+                    DELETE FROM verdicts WHERE rowid IN (
+                        SELECT rowid FROM verdicts ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,)).rowcount
+            if evicted:
+                conn.execute("UPDATE stats SET value = value + ? WHERE name = 'evictions'", (evicted,))
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dictionary with hits, misses, hit_rate, evictions, the number of stored entries and the file size
+        """
+        with self._connect() as conn:
+            counters = dict(conn.execute('SELECT name, value FROM stats').fetchall())
+            entries = conn.execute('SELECT COUNT(*) FROM verdicts').fetchone()[0]
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'hit_rate': counters['hits'] / lookups if lookups else 0.0,
+            'evictions': counters['evictions'],
+            'entries': entries,
+            'size_bytes': os.path.getsize(self.path)
+        }
+
+    def clear(self):
+        """Remove every entry and reset the statistics."""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM verdicts')
+            conn.execute('UPDATE stats SET value = 0')
+
+
+_verdict_cache: Optional[VerdictCache] = None
+
+
+def get_verdict_cache() -> VerdictCache:
+    global _verdict_cache
+    if _verdict_cache is None:
+        _verdict_cache = VerdictCache(max_entries=VERDICT_CACHE_MAX_ENTRIES, max_age=VERDICT_CACHE_MAX_AGE)
+    return _verdict_cache
+
+
+def use_verdict_cache(path: Optional[str]):
+    """Switch this process to another cache file (e.g. a throwaway one), or back to the default with None."""
+    global _verdict_cache
+    _verdict_cache = None
+    if path is not None:
+        _verdict_cache = VerdictCache(path, max_entries=VERDICT_CACHE_MAX_ENTRIES, max_age=VERDICT_CACHE_MAX_AGE)
@@ -0,0 +1,103 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sources.file_utils import file_hash
+
+Vector = List[float]
+
+
+def dominates(a: Vector, b: Vector) -> bool:
+    """True if a >= b in every component."""
+    return len(a) == len(b) and all(x >= y for x, y in zip(a, b))
+
+
+class MonotoneVerdicts:
+    """
+    Known verdicts of one model, used to answer threshold queries by dominance.
+
+    The multi-reward property is monotone in the thresholds: if T is
+    satisfiable so is every T' >= T, and if T is unsatisfiable so is every
+    T' <= T. Only the minimal satisfied and the maximal unsatisfied vectors
+    are kept, since the others are implied by them. Concurrent refinement
+    workers share a store, so updates are serialised.
+    """
+
+    def __init__(self):
+        self.satisfied: List[Vector] = []
+        self.unsatisfied: List[Vector] = []
+        self.lock = threading.Lock()
+
+    def infer(self, vector: Vector) -> Optional[Tuple[bool, Vector]]:
+        """
+        Verdict implied by the known vectors.
+
+        Returns:
+            The verdict and the known vector it follows from, or None if it cannot be inferred
+        """
+        for known in self.satisfied:
+            if dominates(vector, known):
+                return True, known
+        for known in self.unsatisfied:
+            if dominates(known, vector):
+                return False, known
+        return None
+
+    def add(self, vector: Vector, verdict: bool):
+        """Record a computed verdict."""
+        vector = list(vector)
+        with self.lock:
+            if verdict:
+                if any(dominates(vector, known) for known in self.satisfied):
+                    return
+                self.satisfied = [known for known in self.satisfied if not dominates(known, vector)] + [vector]
+            else:
+                if any(dominates(known, vector) for known in self.unsatisfied):
+                    return
+                self.unsatisfied = [known for known in self.unsatisfied if not dominates(vector, known)] + [vector]
+
+    def __len__(self) -> int:
+        return len(self.satisfied) + len(self.unsatisfied)
+
+
+_stores: Dict[str, MonotoneVerdicts] = {}
+_stores_lock = threading.Lock()
+
+
+def get_verdict_store(model_name: str, cpi_key: Optional[str] = None,
+                      seed: Optional[Callable[[], List[Tuple[Vector, bool]]]] = None) -> Optional[MonotoneVerdicts]:
+    """
+    Verdict store of a model, shared by every query in this process.
+
+    The store is keyed by the canonical CPI hash when there is one (see
+    verdict_cache.cpi_hash), otherwise by the content hash of the .nm file,
+    so a regenerated model (e.g. current_benchmark) never reuses old verdicts.
+
+    Args:
+        model_name: Name of the model file (without extension)
+        cpi_key: Canonical CPI hash (and encoding) of the model, if known
+        seed: Returns the verdicts a new store starts with (e.g. from the verdict cache)
+
+    Returns:
+        The store, or None if the model cannot be identified
+    """
+    key = cpi_key
+    if key is None:
+        model_path = os.path.join('models', f'{model_name}.nm')
+        if not os.path.exists(model_path):
+            return None
+        key = file_hash(model_path)
+
+    with _stores_lock:
+        if key not in _stores:
+            store = MonotoneVerdicts()
+            for vector, verdict in (seed() if seed is not None else []):
+                store.add(vector, verdict)
+            _stores[key] = store
+        return _stores[key]
+
+
+def clear_verdict_stores():
+    """Forget every store of this process (e.g. to compare searches from a cold start)."""
+    with _stores_lock:
+        _stores.clear()
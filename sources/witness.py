@@ -0,0 +1,155 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from collections import deque
+from typing import Any, Dict, List, Optional, Set
+
+from sources.analysis import parse_prism_output, safe_float_conversion
+from sources.launcher import run_prism
+from sources.model_store import export_model, read_matrix_lines, reward_files
+
+WITNESS_DIR = "witnesses" # Under the export directory of the model
+FINISHED_LABEL = "finished"
+
+
+def read_initial_states(lab_path: str) -> List[int]:
+    """States carrying the "init" label of an exported .lab file."""
+    with open(lab_path, 'r') as f:
+        header = f.readline()
+        match = re.search(r'(\d+)="init"', header)
+        if match is None:
+            return [0]
+        init = match.group(1)
+        return [int(line.split(':')[0]) for line in f if init in line.split(':', 1)[1].split()]
+
+
+def finished_states(tra_lines: List[List[str]], num_states: int, rewarded: Set[int]) -> Set[int]:
+    """
+    States from which no rewarded state can be reached any more.
+
+    The impacts are total rewards, so reaching such a state ends the
+    accumulation: Rmin [F finished] is the minimum of R [C], which the
+    explicit engine cannot compute directly (nor generate a strategy for).
+    """
+    predecessors: Dict[int, List[int]] = {}
+    for fields in tra_lines:
+        predecessors.setdefault(int(fields[2]), []).append(int(fields[0]))
+    reaching = set(rewarded)
+    queue = deque(rewarded)
+    while queue:
+        for s in predecessors.get(queue.popleft(), []):
+            if s not in reaching:
+                reaching.add(s)
+                queue.append(s)
+    return set(range(num_states)) - reaching
+
+
+def write_witness_labels(path: str, initial: List[int], finished: Set[int]):
+    """Write a .lab file with only the init and finished labels."""
+    with open(path, 'w') as f:
+        f.write(f'0="init" 1="{FINISHED_LABEL}"\n')
+        for s in sorted(set(initial) | finished):
+            labels = [str(i) for i, member in enumerate((s in initial, s in finished)) if member]
+            f.write(f"{s}: {' '.join(labels)}\n")
+
+
+def read_state_rewards(path: str) -> Dict[int, float]:
+    return {int(fields[0]): float(fields[1]) for fields in read_matrix_lines(path)}
+
+
+def find_witness(model_name: str, thresholds: List[float],
+                 prism_options: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Compute a deterministic strategy for a threshold vector and its exact impact vector.
+
+    PRISM 4.8 cannot export strategies of multi-objective queries, so the
+    witness is the strategy minimising the impacts weighted by the inverse of
+    their thresholds (a single-objective query on the exported model, see
+    model_store). That strategy is exported as its induced model, which is
+    then checked for the expected value of every impact. When the vector is
+    below the thresholds it witnesses them; satisfiable vectors that need a
+    randomised strategy get no witness.
+
+    Args:
+        model_name: Name of the model file (without extension)
+        thresholds: Threshold of every impact, in reward order (impact_0, impact_1, ...)
+        prism_options: Extra PRISM switches (memory options; the explicit engine is used)
+
+    Returns:
+        Dictionary with the impact 'vector' of the strategy, the 'weights' it
+        minimises, the induced model ('strategy', a .tra file kept with the
+        exported model) and 'witnesses' (vector <= thresholds), or None if
+        PRISM failed
+    """
+    model_path = os.path.join('models', f'{model_name}.nm')
+    out_dir = export_model(model_path)
+    if out_dir is None:
+        return None
+
+    srew_files = reward_files(out_dir, "srew")
+    if len(srew_files) != len(thresholds):
+        return None
+    rewards = [read_state_rewards(path) for path in srew_files]
+    weights = [1.0 / max(t, 1e-9) for t in thresholds]
+
+    witness_dir = os.path.join(out_dir, WITNESS_DIR)
+    os.makedirs(witness_dir, exist_ok=True)
+    key = hashlib.sha256(','.join(f'{w:.9g}' for w in weights).encode()).hexdigest()[:16]
+    strategy_path = os.path.abspath(os.path.join(witness_dir, f"{key}.tra"))
+
+    with open(os.path.join(out_dir, "model.tra"), 'r') as f:
+        num_states = int(next(line for line in f if not line.startswith('#')).split()[0])
+    tra_lines = read_matrix_lines(os.path.join(out_dir, "model.tra"))
+    rewarded = {s for reward in rewards for s, value in reward.items() if value != 0}
+    finished = finished_states(tra_lines, num_states, rewarded)
+    initial = read_initial_states(os.path.join(out_dir, "model.lab"))
+
+    work_dir = tempfile.mkdtemp(dir=witness_dir)
+    try:
+        # Strategy minimising the weighted impacts
+        shutil.copy(os.path.join(out_dir, "model.tra"), os.path.join(work_dir, "model.tra"))
+        write_witness_labels(os.path.join(work_dir, "model.lab"), initial, finished)
+        weighted = {s: sum(w * reward.get(s, 0.0) for w, reward in zip(weights, rewards)) for s in rewarded}
+        with open(os.path.join(work_dir, "model.srew"), 'w') as f:
+            f.write(f"{num_states} {len(weighted)}\n")
+            for s in sorted(weighted):
+                f.write(f"{s} {weighted[s]!r}\n")
+        run_prism(["-cuddmaxmem", "10g", "-javamaxmem", "2g", *(prism_options or []),
+                   "-importmodel", os.path.join(os.path.abspath(work_dir), "model.tra,lab,srew"),
+                   "-mdp", "-explicit",
+                   "-pf", f'R{{1}}min=? [F "{FINISHED_LABEL}"]',
+                   "-exportstrat", f"{strategy_path}:type=induced,mode=restrict"],
+                  check=True)
+
+        # Exact impacts of the strategy, on its induced model
+        os.remove(os.path.join(work_dir, "model.srew"))
+        shutil.copy(strategy_path, os.path.join(work_dir, "model.tra"))
+        for path in srew_files:
+            shutil.copy(path, os.path.join(work_dir, os.path.basename(path)))
+        properties = '\n'.join(f'R{{{k + 1}}}max=? [F "{FINISHED_LABEL}"]' for k in range(len(thresholds)))
+        with open(os.path.join(work_dir, "witness.props"), 'w') as f:
+            f.write(properties)
+        result = run_prism(["-cuddmaxmem", "10g", "-javamaxmem", "2g", *(prism_options or []),
+                            "-importmodel", os.path.join(os.path.abspath(work_dir), "model.tra,lab,srew"),
+                            "-mdp", "-explicit", os.path.join(os.path.abspath(work_dir), "witness.props")],
+                           check=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"Could not compute a witness for {model_name}: {e}")
+        return None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    values = parse_prism_output(result.stdout)['values']
+    vector = [safe_float_conversion(value) if value is not None else None for value in values]
+    if len(vector) != len(thresholds) or any(v is None for v in vector):
+        return None
+
+    return {
+        'vector': vector,
+        'weights': weights,
+        'strategy': strategy_path,
+        'witnesses': all(v <= t + 1e-6 * max(1.0, abs(t)) for v, t in zip(vector, thresholds))
+    }
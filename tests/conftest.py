@@ -0,0 +1,13 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# Modules are imported both as sources.X and, by the launcher and the encoding, bare (see run_benchmark.sh)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "sources")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+requires_prism = pytest.mark.skipif(shutil.which("prism") is None, reason="PRISM is not on the PATH")
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from sources.analysis import (generate_const_rewards_requirement, generate_multi_rewards_requirement,
+                              match_sweep_results, parse_prism_output, PrismOutputParser)
+
+
+def test_const_rewards_requirement_declares_one_constant_per_impact():
+    assert generate_const_rewards_requirement(2) == (
+        'const double t_0;\n'
+        'const double t_1;\n'
+        'multi(R{"impact_0"}<=t_0 [C], R{"impact_1"}<=t_1 [C])'
+    )
+
+
+def test_const_rewards_requirement_single_impact():
+    assert generate_const_rewards_requirement(1).splitlines() == [
+        'const double t_0;',
+        'multi(R{"impact_0"}<=t_0 [C])'
+    ]
+
+
+SWEEP_OUTPUT = """
+Model checking: multi(R{"impact_0"}<=t_0 [C], R{"impact_1"}<=t_1 [C])
+Property constants: t_0=0.5,t_1=2
+Result: false
+
+Model checking: multi(R{"impact_0"}<=t_0 [C], R{"impact_1"}<=t_1 [C])
+Property constants: t_0=0.75,t_1=2
+Result: true
+
+Model checking: multi(R{"impact_0"}<=t_0 [C], R{"impact_1"}<=t_1 [C])
+Property constants: t_0=1.000001,t_1=2
+Result: true
+"""
+
+
+def test_match_sweep_results_follows_the_batch_order():
+    # Impacts are numbered in sorted name order: "cost" is t_0, "time" is t_1
+    batch = [{"time": 2.0, "cost": 0.75}, {"time": 2.0, "cost": 0.5}, {"time": 2.0, "cost": 1.000001}]
+    assert match_sweep_results(batch, parse_prism_output(SWEEP_OUTPUT)) == [True, False, True]
+
+
+def test_match_sweep_results_tolerates_printed_rounding():
+    batch = [{"cost": 0.7500004, "time": 2.0}]
+    assert match_sweep_results(batch, parse_prism_output(SWEEP_OUTPUT)) == [True]
+
+
+def test_match_sweep_results_leaves_unchecked_vectors_undecided():
+    batch = [{"cost": 0.6, "time": 2.0}, {"cost": 0.5, "time": 3.0}]
+    assert match_sweep_results(batch, parse_prism_output(SWEEP_OUTPUT)) == [None, None]
+
+
+def test_match_sweep_results_skips_checks_that_failed():
+    output = SWEEP_OUTPUT.replace("Property constants: t_0=0.75,t_1=2\nResult: true",
+                                  "Property constants: t_0=0.75,t_1=2\nError: out of memory")
+    batch = [{"cost": 0.75, "time": 2.0}]
+    assert match_sweep_results(batch, parse_prism_output(output)) == [None]
+
+
+def recorded_output(name: str) -> str:
+    with open(os.path.join(os.path.dirname(__file__), "data", name), 'r') as f:
+        return f.read()
+
+
+def test_parser_reads_a_recorded_sweep():
+    # PRISM 4.8.1 on CPIs/choice.cpi: prism choice.nm p.pctl -const t_0=0:1:1,t_1=20 -verbose
+    parsed = parse_prism_output(recorded_output("choice_sweep.log"))
+
+    assert parsed['model_info']['version'] == "4.8.1"
+    assert parsed['model_info']['type'] == "MDP"
+    assert parsed['model_info']['modules'] == ["manager", "choice10", "task21", "task32"]
+    assert parsed['states_info'] == {'total': 86, 'initial': 1, 'transitions': 87, 'choices': 87}
+    assert parsed['timings']['model_construction'] == pytest.approx(0.068)
+    assert parsed['timings']['model_checking'] == pytest.approx(0.039 + 0.006)
+    assert parsed['results'] == [False, True]
+    assert parsed['values'] == ["false", "true"]
+    assert parsed['constants'] == [{'t_0': 0.0, 't_1': 20.0}, {'t_0': 1.0, 't_1': 20.0}]
+    assert len(parsed['warnings']) == 3
+
+
+def test_parser_keeps_partial_metrics_of_a_killed_run():
+    lines = recorded_output("choice_sweep.log").split('\n')
+    parser = PrismOutputParser()
+    for line in lines[:lines.index("Time for model checking: 0.039 seconds.")]:
+        parser.feed(line)
+    summary = parser.summary()
+
+    assert summary['states_info']['total'] == 86
+    assert summary['timings']['model_construction'] == pytest.approx(0.068)
+    assert summary['results'] == [None]
+
+
+def test_multi_rewards_thresholds_are_rounded_up():
+    # Exact witness impacts must not be checked against a slightly lower bound
+    assert generate_multi_rewards_requirement({"a": 1 / 3, "b": 2.007}) == (
+        'multi(R{"impact_0"}<=0.333334 [C], R{"impact_1"}<=2.007000 [C])'
+    )
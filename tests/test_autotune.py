@@ -0,0 +1,23 @@
+import json
+
+from sources.autotune import tuned_options
+
+
+def write_files(tmp_path):
+    model = tmp_path / "model.nm"
+    model.write_text("mdp\n\nmodule manager\n  s : [0..1] init 0;\nendmodule\n")
+    calibration = tmp_path / "prism_autotune.json"
+    calibration.write_text(json.dumps({"xs": {"options": ["-explicit", "-gs"], "speedup": 1.5}}))
+    return str(model), str(calibration)
+
+
+def test_tuned_options_of_the_size_class(tmp_path):
+    model, calibration = write_files(tmp_path)
+    assert tuned_options(model, calibration) == {'size_class': "xs", 'options': ["-explicit", "-gs"], 'speedup': 1.5}
+
+
+def test_tuning_is_skipped_when_the_caller_sets_the_engine(tmp_path):
+    model, calibration = write_files(tmp_path)
+    assert tuned_options(model, calibration, options=["-javamaxmem", "4g", "-sparse"]) is None
+    assert tuned_options(model, calibration, options=["-s"]) is None
+    assert tuned_options(model, calibration, options=["-javamaxmem", "4g"]) is not None
@@ -0,0 +1,145 @@
+import json
+import os
+
+import pytest
+
+from conftest import ROOT, requires_prism
+from cpi_to_mdp.cpitospin import CPIToSPINConverter, estimate_state_space
+from cpi_to_mdp.translation import SPINtoPRISM, TransitionType
+from sources.analysis import parse_prism_output, safe_float_conversion
+from sources.launcher import run_prism
+from sources.numeric import generate_range_requirements
+
+SMALL_CPIS = ["choice.cpi", "nature.cpi", "parallel.cpi", "sequential.cpi"]
+
+
+# Places of duration 0 in sequences, parallel regions and loops, which reduce_spin_model removes
+ZERO_DURATION_CPIS = {
+    "zeroseq": {"type": "sequence", "id": 1,
+                "head": {"type": "task", "id": 2, "duration": 0, "impacts": {"x": 1, "y": 0}},
+                "tail": {"type": "parallel", "id": 3,
+                         "first_split": {"type": "task", "id": 4, "duration": 2, "impacts": {"x": 0, "y": 1}},
+                         "second_split": {"type": "task", "id": 5, "duration": 0, "impacts": {"x": 1, "y": 1}}}},
+    "choiceloop": {"type": "choice", "id": 1,
+                   "true": {"type": "loop", "id": 2, "probability": 0.5,
+                            "child": {"type": "task", "id": 3, "duration": 1, "impacts": {"x": 1, "y": 0}}},
+                   "false": {"type": "sequence", "id": 4,
+                             "head": {"type": "task", "id": 5, "duration": 0, "impacts": {"x": 0, "y": 1}},
+                             "tail": {"type": "loop", "id": 6, "probability": 0.2,
+                                      "child": {"type": "task", "id": 7, "duration": 0,
+                                                "impacts": {"x": 0.5, "y": 0.5}}}}},
+}
+
+
+def load_cpi(name: str) -> dict:
+    if name in ZERO_DURATION_CPIS:
+        return ZERO_DURATION_CPIS[name]
+    with open(os.path.join(ROOT, "CPIs", name), 'r') as f:
+        return json.load(f)
+
+
+def impact_ranges(model_text: str, num_impacts: int, tmp_path) -> list:
+    """Minimum and maximum expected value of every impact, as computed by PRISM."""
+    model_path, props_path = tmp_path / "model.nm", tmp_path / "ranges.props"
+    model_path.write_text(model_text)
+    props_path.write_text('\n'.join(generate_range_requirements(num_impacts)))
+    parsed = parse_prism_output(run_prism([str(model_path), str(props_path)], check=True).stdout)
+    return [safe_float_conversion(value) for value in parsed['values']]
+
+
+@pytest.fixture(scope="module")
+def reference_ranges(tmp_path_factory):
+    """Impact ranges of the default SPIN encoding of a CPI, computed once per CPI."""
+    ranges = {}
+
+    def get(name: str) -> list:
+        if name not in ranges:
+            spin_model = CPIToSPINConverter().convert_cpi_to_spin(load_cpi(name))
+            ranges[name] = impact_ranges(spin_model.generate_prism_model(), spin_model.get_impact_dimensions(),
+                                         tmp_path_factory.mktemp("reference"))
+        return ranges[name]
+    return get
+
+
+def assert_same_ranges(model_text: str, num_impacts: int, expected: list, tmp_path):
+    ranges = impact_ranges(model_text, num_impacts, tmp_path)
+    assert len(ranges) == 2 * num_impacts and None not in ranges
+    assert ranges == pytest.approx(expected, rel=1e-6, abs=1e-9)
+
+
+def built_states(model_text: str, tmp_path) -> int:
+    model_path = tmp_path / "model.nm"
+    model_path.write_text(model_text)
+    parsed = parse_prism_output(run_prism([str(model_path)], check=True).stdout)
+    return parsed['states_info']['total']
+
+
+@requires_prism
+@pytest.mark.parametrize("name", SMALL_CPIS)
+def test_estimate_bounds_the_built_state_space(name, tmp_path):
+    cpi = load_cpi(name)
+    states = built_states(CPIToSPINConverter().convert_cpi_to_spin(cpi).generate_prism_model(), tmp_path)
+    assert states <= estimate_state_space(cpi, encoding="verbose")
+
+
+@requires_prism
+@pytest.mark.parametrize("name", SMALL_CPIS + ["test.cpi"])
+def test_estimate_bounds_the_lean_model(name, tmp_path):
+    cpi = load_cpi(name)
+    converter = CPIToSPINConverter()
+    converter.convert_cpi_to_spin(cpi)
+    lean_model = converter.reduce_spin_model().generate_prism_model(lean=True, synchronous_tick=True)
+    states = built_states(lean_model, tmp_path)
+    assert states <= estimate_state_space(cpi)
+
+
+@requires_prism
+@pytest.mark.parametrize("name", SMALL_CPIS)
+def test_synchronous_tick_keeps_the_impact_ranges(name, reference_ranges, tmp_path):
+    spin_model = CPIToSPINConverter().convert_cpi_to_spin(load_cpi(name))
+    for lean in (False, True):
+        assert_same_ranges(spin_model.generate_prism_model(lean=lean, synchronous_tick=True),
+                           spin_model.get_impact_dimensions(), reference_ranges(name), tmp_path)
+
+
+@requires_prism
+@pytest.mark.parametrize("name", SMALL_CPIS)
+def test_maximal_step_keeps_the_impact_ranges(name, reference_ranges, tmp_path):
+    spin_model = CPIToSPINConverter().convert_cpi_to_spin(load_cpi(name))
+    # Rewards are summed in another order, so the values may differ in the last digits
+    assert_same_ranges(spin_model.generate_prism_model(maximal_step=True),
+                       spin_model.get_impact_dimensions(), reference_ranges(name), tmp_path)
+
+
+def test_maximal_step_rejects_shared_input_places():
+    spin_model = SPINtoPRISM()
+    spin_model.add_place("start", 0, is_initial=True)
+    spin_model.add_place("left", 1)
+    spin_model.add_place("right", 1)
+    spin_model.add_transition("a", TransitionType.SINGLE, ["start"], ["left"])
+    spin_model.add_transition("b", TransitionType.SINGLE, ["start"], ["right"])
+
+    with pytest.raises(ValueError, match="conflict on place start"):
+        spin_model.generate_maximal_step_commands()
+    with pytest.raises(ValueError):
+        spin_model.generate_prism_model(maximal_step=True)
+
+
+@requires_prism
+@pytest.mark.parametrize("name", SMALL_CPIS + sorted(ZERO_DURATION_CPIS))
+def test_reduction_keeps_the_impact_ranges(name, reference_ranges, tmp_path):
+    converter = CPIToSPINConverter()
+    converter.convert_cpi_to_spin(load_cpi(name))
+    reduced = converter.reduce_spin_model()
+    # Verbose, and lean with the synchronous tick as etl.cpi_to_model writes it
+    for lean in (False, True):
+        assert_same_ranges(reduced.generate_prism_model(lean=lean, synchronous_tick=lean),
+                           reduced.get_impact_dimensions(), reference_ranges(name), tmp_path)
+
+
+@pytest.mark.parametrize("name", sorted(ZERO_DURATION_CPIS))
+def test_reduction_removes_zero_duration_places(name):
+    converter = CPIToSPINConverter()
+    spin_model = converter.convert_cpi_to_spin(load_cpi(name))
+    places = len(spin_model.places)
+    assert len(converter.reduce_spin_model().places) < places
@@ -0,0 +1,29 @@
+import pytest
+
+import sources.jprism as jprism
+from sources.jprism import InProcessPrism, PrismBackendUnavailable
+
+
+class MissingJVM:
+    """JPype on a machine without a usable JVM."""
+
+    class JVMNotFoundException(Exception):
+        pass
+
+    @staticmethod
+    def isJVMStarted():
+        return False
+
+    @classmethod
+    def startJVM(cls, *args, **kwargs):
+        raise cls.JVMNotFoundException("No JVM shared library file (libjvm.so) found")
+
+
+def test_a_jvm_that_cannot_start_makes_the_backend_unavailable(monkeypatch):
+    monkeypatch.setattr(jprism, "jpype", MissingJVM)
+    monkeypatch.setattr(jprism, "unavailable_reason", lambda lib_dir: None)
+    prism = InProcessPrism(prism_dir="prism")
+
+    with pytest.raises(PrismBackendUnavailable, match="libjvm.so"):
+        prism.start()
+    assert prism.prism is None
@@ -0,0 +1,38 @@
+import threading
+
+import pytest
+
+import sources.launcher as launcher
+from sources.launcher import memory_bytes, fits_nailgun
+
+
+def test_memory_bytes():
+    assert memory_bytes("2g") == 2 * 2**30
+    assert memory_bytes("512M") == 512 * 2**20
+    assert memory_bytes("1024") == 1024
+    assert memory_bytes("lots") is None
+
+
+def test_jobs_needing_a_larger_heap_bypass_nailgun():
+    # The servers run with NAILGUN_JAVAMAXMEM = "2g"
+    assert fits_nailgun(["model.nm", "props.pctl"])
+    assert fits_nailgun(["-javamaxmem", "2g", "model.nm"])
+    assert fits_nailgun(["-javamaxmem", "1024m", "model.nm"])
+    assert not fits_nailgun(["-javamaxmem", "2g", "model.nm", "-javamaxmem", "4g", "-sparse"])
+    assert not fits_nailgun(["-javamaxmem", "8g", "model.nm"])
+
+
+def test_a_failing_cds_command_releases_the_lock(monkeypatch):
+    class BrokenCDS:
+        lock = threading.Lock()
+
+        def command(self, args):
+            raise OSError("No space left on device: '.prism_cds'")
+
+    cds = BrokenCDS()
+    monkeypatch.setattr(launcher, "PRISM_BACKEND", "cds")
+    monkeypatch.setattr(launcher, "get_cds_launcher", lambda prism_exec: cds)
+
+    with pytest.raises(OSError):
+        launcher.stream_prism(["model.nm"])
+    assert not cds.lock.locked()
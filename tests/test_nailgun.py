@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+import sources.nailgun as nailgun
+from sources.nailgun import NailgunPool
+
+
+class FakeServer:
+    """Stands in for a nailgun JVM: starts, answers and dies on demand."""
+    starts = []
+
+    def __init__(self, prism_exec, ngprism_exec, port, javamaxmem, java_params=""):
+        self.running = False
+        self.healthy = True
+        self.restarts = 0
+        self.jobs = 0
+
+    def start(self):
+        self.running = FakeServer.starts.pop(0) if FakeServer.starts else True
+        return self.running
+
+    def restart(self):
+        self.restarts += 1
+        return self.start()
+
+    def is_running(self):
+        return self.running
+
+    def is_healthy(self):
+        return self.running and self.healthy
+
+    def kill(self):
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(nailgun, "NailgunServer", FakeServer)
+    monkeypatch.setattr(nailgun, "find_free_port", lambda: 0)
+    monkeypatch.setattr(NailgunPool, "_java_params", lambda self: "")
+    FakeServer.starts = []
+    return NailgunPool("prism", "ngprism", size=1, max_jobs=100, javamaxmem="1g")
+
+
+def test_a_waiting_job_gets_the_replacement_of_a_killed_server(pool):
+    leased, replaced = threading.Event(), []
+
+    def wait_for_server():
+        leased.wait()
+        with pool.lease() as server:
+            replaced.append(server)
+
+    waiter = threading.Thread(target=wait_for_server)
+    waiter.start()
+    with pool.lease() as first:
+        leased.set()
+        # A timed out job kills its server, as stream_prism does
+        first.kill()
+    waiter.join(timeout=5)
+
+    assert not waiter.is_alive()
+    assert replaced[0] is not None and replaced[0] is not first
+    assert pool.servers == pool.idle == [replaced[0]]
+
+
+def test_a_failed_start_backs_off_instead_of_disabling_the_pool(pool):
+    FakeServer.starts = [False]
+    with pool.lease() as server:
+        assert server is None
+    assert pool.servers == [] and pool.start_failures == 1
+
+    # Still backing off: the job falls back to a fresh JVM
+    with pool.lease() as server:
+        assert server is None
+
+    pool.retry_at = 0.0
+    with pool.lease() as server:
+        assert server is not None
+    assert pool.start_failures == 0
+
+
+def test_an_unresponsive_idle_server_is_restarted_before_the_job(pool):
+    with pool.lease() as server:
+        pass
+    server.healthy = False
+    with pool.lease() as again:
+        assert again is server and server.restarts == 1
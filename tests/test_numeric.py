@@ -0,0 +1,25 @@
+from sources.numeric import generate_numeric_requirement, generate_range_requirements
+
+
+def test_the_minimised_impact_comes_first_and_has_no_bound():
+    assert generate_numeric_requirement(1, [0.5, 9.0, 2.0]) == (
+        'multi(R{"impact_1"}min=? [C], R{"impact_0"}<=0.500000 [C], R{"impact_2"}<=2.000000 [C])'
+    )
+
+
+def test_bounds_are_rounded_up():
+    # Rounding to nearest would print 0.333333, below the bound PRISM found achievable
+    assert 'R{"impact_1"}<=0.333334 [C]' in generate_numeric_requirement(0, [0.0, 1 / 3])
+    assert 'R{"impact_1"}<=0.123457 [C]' in generate_numeric_requirement(0, [0.0, 0.1234561])
+
+
+def test_bounds_already_at_six_decimals_are_kept():
+    assert 'R{"impact_1"}<=0.250000 [C]' in generate_numeric_requirement(0, [0.0, 0.25])
+    assert 'R{"impact_1"}<=0.000000 [C]' in generate_numeric_requirement(0, [0.0, 0.0])
+
+
+def test_range_requirements_give_the_minima_then_the_maxima():
+    assert generate_range_requirements(2) == [
+        'multi(R{"impact_0"}min=? [C])', 'multi(R{"impact_1"}min=? [C])',
+        'R{"impact_0"}max=? [C]', 'R{"impact_1"}max=? [C]'
+    ]
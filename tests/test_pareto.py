@@ -0,0 +1,56 @@
+import pytest
+
+from sources.pareto import front_contains, lower_hull, parse_front, PARETO_EPSILON
+
+# Vertices of a 2-impact front: mixing (0, 4) and (4, 0) reaches (2, 2)
+FRONT = [[0.0, 4.0], [1.0, 2.0], [4.0, 0.0]]
+
+
+def test_vertices_and_dominating_vectors_are_achievable():
+    for vertex in FRONT:
+        assert front_contains(FRONT, vertex, tolerance=0.0)
+    assert front_contains(FRONT, [5.0, 5.0], tolerance=0.0)
+
+
+def test_mixtures_of_vertices_are_achievable():
+    # Midpoint of the segment from (1, 2) to (4, 0)
+    assert front_contains(FRONT, [2.5, 1.0], tolerance=0.0)
+    assert not front_contains(FRONT, [2.5, 0.99], tolerance=0.0)
+
+
+def test_vectors_left_of_the_front_are_not_achievable():
+    assert not front_contains(FRONT, [-0.1, 10.0], tolerance=0.0)
+
+
+def test_tolerance_is_relative_to_the_vector():
+    assert front_contains(FRONT, [1.0, 2.0 - PARETO_EPSILON])
+    assert not front_contains(FRONT, [1.0, 2.0 - 3 * PARETO_EPSILON])
+    # Large values get a proportionally larger slack
+    assert front_contains([[1000.0]], [1000.0 - 0.05], tolerance=1e-4)
+    assert not front_contains([[1000.0]], [1000.0 - 0.2], tolerance=1e-4)
+
+
+def test_single_impact_front_is_its_minimum():
+    assert front_contains([[0.3]], [0.3], tolerance=0.0)
+    assert not front_contains([[0.3]], [0.29], tolerance=0.0)
+
+
+def test_shorter_vectors_only_bound_the_first_impacts():
+    assert front_contains(FRONT, [0.0], tolerance=0.0)
+    assert not front_contains([[0.5, 0.0]], [0.4], tolerance=0.0)
+
+
+def test_points_above_the_hull_do_not_matter():
+    assert lower_hull(FRONT + [[2.0, 3.0]]) == FRONT
+
+
+def test_more_than_two_impacts_are_rejected():
+    with pytest.raises(ValueError):
+        front_contains([[0.0, 0.0, 0.0]], [1.0, 1.0, 1.0])
+
+
+def test_parse_front():
+    assert parse_front("[(0.5, 0.3), (0.4, 0.6)]", 2) == [[0.4, 0.6], [0.5, 0.3]]
+    assert parse_front("0.3", 1) == [[0.3]]
+    assert parse_front("[(0.5, 0.3, 0.1)]", 2) is None
+    assert parse_front("Error", 1) is None
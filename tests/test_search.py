@@ -0,0 +1,114 @@
+import pytest
+
+import sources.search as search
+from sources.search import SearchState, apply_probes, bisect, converge, search_ray
+
+# Achievable impacts of a model with a single Pareto optimal strategy
+MINIMUM = {'cost': 0.3, 'time': 0.4}
+
+
+@pytest.fixture
+def oracle(monkeypatch, tmp_path):
+    """analyze_bounds answered without PRISM: a vector is satisfied iff it is above MINIMUM."""
+    monkeypatch.chdir(tmp_path)
+    checked = []
+
+    def analyze_bounds(model_name, thresholds, check_timeout=None, prism_options=None, pctl_name=None):
+        batch = thresholds if isinstance(thresholds, list) else [thresholds]
+        checked.append(batch)
+        verdicts = [all(t[name] >= MINIMUM[name] - 1e-12 for name in MINIMUM) for t in batch]
+        if not isinstance(thresholds, list):
+            return {'result': verdicts[0], 'verdict_source': 'computed'}
+        return {'result': verdicts, 'verdict_source': ['computed'] * len(batch)}
+
+    monkeypatch.setattr(search, "analyze_bounds", analyze_bounds)
+    monkeypatch.setattr(search, "known_verdict", lambda model_name, cpi_key, thresholds: None)
+    return checked
+
+
+def search_state(num_refinements: int, **kwargs) -> SearchState:
+    return SearchState("model", {'cost': [0.0, 1.0], 'time': [0.0, 1.0]}, {'cost': 1.0, 'time': 1.0},
+                       {'prism_calls': 0, 'sequential_rounds': 0, 'witness': None}, num_refinements, **kwargs)
+
+
+def assert_brackets_minimum(state: SearchState, width: float):
+    for name, (lower, upper) in state.intervals.items():
+        assert lower <= MINIMUM[name] <= upper
+        assert upper - lower <= width
+
+
+def test_apply_probes_keeps_the_gap_around_the_first_satisfied_probe():
+    intervals = {'cost': [0.0, 1.0]}
+    tests = [{'cost': 0.25}, {'cost': 0.5}, {'cost': 0.75}]
+    assert apply_probes(intervals, 'cost', tests, [False, True, True]) == {'cost': 0.5}
+    assert intervals['cost'] == [0.25, 0.5]
+    assert apply_probes(intervals, 'cost', tests, [False, False, False]) is None
+    assert intervals['cost'] == [0.75, 0.5]
+
+
+def test_bisection_halves_every_interval_per_pass(oracle):
+    state = search_state(6)
+    bounds = bisect(state)
+
+    assert_brackets_minimum(state, 2 ** -6)
+    assert state.stats['prism_calls'] == 12 == len(oracle)
+    assert all(bounds[name] >= MINIMUM[name] for name in MINIMUM)
+
+
+def test_concurrent_bisection_checks_the_joint_bounds(oracle):
+    state = search_state(4, workers=2)
+    bounds = bisect(state)
+
+    assert_brackets_minimum(state, 2 ** -4)
+    # Both first splits are satisfied, so the joint vector is checked as well
+    assert [len(batch) for batch in oracle[:3]] == [1, 1, 1]
+    assert oracle[2] == [{'cost': 0.5, 'time': 0.5}]
+    assert all(bounds[name] >= MINIMUM[name] for name in MINIMUM)
+
+
+def test_probes_split_an_interval_into_k_plus_one_parts(oracle):
+    state = search_state(2, probes=3)
+    bisect(state)
+
+    assert_brackets_minimum(state, 4 ** -2)
+    assert all(len(batch) == 3 for batch in oracle)
+
+
+def test_convergence_stops_within_the_tolerance(oracle):
+    state = search_state(20, abs_tol=0.01)
+    bounds = converge(state)
+
+    assert state.stats['stopped'] == "converged"
+    assert_brackets_minimum(state, 0.01)
+    assert bounds == {'cost': pytest.approx(0.3, abs=0.01), 'time': pytest.approx(0.4, abs=0.01)}
+
+
+def test_ray_search_moves_every_impact_at_once(oracle):
+    state = search_state(8)
+    bounds = search_ray(state)
+
+    assert_brackets_minimum(state, 2 ** -8)
+    assert all(bounds[name] >= MINIMUM[name] for name in MINIMUM)
+    # The ray stops at the time bound; cost still has slack and is searched again on its own
+    assert set(state.done) == {'cost', 'time'}
+
+
+def test_convergence_caps_the_queries_of_every_impact(oracle):
+    state = search_state(3, abs_tol=1e-6)
+    state.intervals['time'] = [0.39, 1.0] # Tighter relative gap: the first queries all go to cost
+    converge(state)
+
+    assert state.stats['stopped'] == "iterations"
+    assert len(oracle) == 6
+    assert state.intervals['cost'][1] - state.intervals['cost'][0] == 2 ** -3
+
+
+def test_known_verdicts_are_only_looked_up_when_inferring(oracle, monkeypatch):
+    looked_up = []
+    monkeypatch.setattr(search, "known_verdict",
+                        lambda model_name, cpi_key, thresholds: looked_up.append(cpi_key))
+    bisect(search_state(2))
+    assert looked_up == []
+
+    bisect(search_state(2, infer=True, cpi_key="key"))
+    assert looked_up and set(looked_up) == {"key"}
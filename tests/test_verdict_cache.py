@@ -0,0 +1,68 @@
+import copy
+import sqlite3
+
+import pytest
+
+from sources.verdict_cache import VerdictCache, canonical_cpi, cpi_hash, encoding_fingerprint
+
+PARALLEL = {
+    "type": "parallel", "id": 0,
+    "first_split": {"type": "task", "id": 1, "duration": 3, "impacts": {"impact_1": 1.0}},
+    "second_split": {"type": "task", "id": 2, "duration": 4, "impacts": {"impact_1": 1.0}}
+}
+
+
+def test_canonical_cpi_drops_ids_and_metadata():
+    cpi = dict(copy.deepcopy(PARALLEL), metadata={"source": "bundle"})
+    canonical = canonical_cpi(cpi)
+    assert "id" not in canonical and "metadata" not in canonical
+    assert "id" not in canonical["first_split"]
+
+
+def test_parallel_branch_order_does_not_matter():
+    swapped = copy.deepcopy(PARALLEL)
+    swapped["first_split"], swapped["second_split"] = swapped["second_split"], swapped["first_split"]
+    renumbered = copy.deepcopy(PARALLEL)
+    renumbered["first_split"]["id"] = 7
+    assert canonical_cpi(swapped) == canonical_cpi(PARALLEL)
+    assert cpi_hash(swapped) == cpi_hash(renumbered) == cpi_hash(PARALLEL)
+
+
+def test_sequence_order_matters():
+    sequence = {"type": "sequence", "id": 0, "head": PARALLEL["first_split"], "tail": PARALLEL["second_split"]}
+    reversed_sequence = dict(sequence, head=sequence["tail"], tail=sequence["head"])
+    assert cpi_hash(sequence) != cpi_hash(reversed_sequence)
+
+
+def test_different_processes_get_different_hashes():
+    longer = copy.deepcopy(PARALLEL)
+    longer["first_split"]["duration"] = 5
+    assert cpi_hash(longer) != cpi_hash(PARALLEL)
+
+
+def test_encoding_fingerprint_is_stable():
+    fingerprint = encoding_fingerprint()
+    encoding_fingerprint.cache_clear()
+    assert encoding_fingerprint() == fingerprint
+    assert len(fingerprint) == 16
+
+
+def test_cache_round_trip_closes_its_connections(tmp_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(sqlite3, "connect", tracking_connect)
+    cache = VerdictCache(str(tmp_path / "verdicts.sqlite"))
+    assert cache.get("cpi", [1.0, 2.0], "enc") is None
+    cache.put("cpi", [1.0, 2.0], "enc", {'result': True})
+    assert cache.get("cpi", [1.0, 2.0], "enc") == {'result': True}
+    assert cache.verdicts("cpi", "enc") == [([1.0, 2.0], True)]
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
@@ -0,0 +1,44 @@
+from sources.verdict_store import MonotoneVerdicts, dominates
+
+
+def test_dominates():
+    assert dominates([2.0, 3.0], [1.0, 3.0])
+    assert not dominates([2.0, 1.0], [1.0, 3.0])
+    assert not dominates([2.0], [1.0, 3.0])
+
+
+def test_satisfied_vectors_imply_every_larger_one():
+    store = MonotoneVerdicts()
+    store.add([1.0, 2.0], True)
+    assert store.infer([1.0, 2.0]) == (True, [1.0, 2.0])
+    assert store.infer([1.5, 2.0]) == (True, [1.0, 2.0])
+    assert store.infer([0.5, 3.0]) is None
+
+
+def test_unsatisfied_vectors_imply_every_smaller_one():
+    store = MonotoneVerdicts()
+    store.add([1.0, 2.0], False)
+    assert store.infer([0.5, 2.0]) == (False, [1.0, 2.0])
+    assert store.infer([1.5, 1.0]) is None
+
+
+def test_only_the_frontier_vectors_are_kept():
+    store = MonotoneVerdicts()
+    store.add([2.0, 2.0], True)
+    store.add([1.0, 2.0], True) # Implies [2.0, 2.0]
+    store.add([3.0, 3.0], True) # Implied by [1.0, 2.0]
+    store.add([0.5, 0.5], False)
+    store.add([0.8, 0.5], False) # Implies [0.5, 0.5]
+    store.add([0.2, 0.2], False)
+    assert store.satisfied == [[1.0, 2.0]]
+    assert store.unsatisfied == [[0.8, 0.5]]
+    assert len(store) == 2
+
+
+def test_incomparable_vectors_are_all_kept():
+    store = MonotoneVerdicts()
+    store.add([1.0, 3.0], True)
+    store.add([3.0, 1.0], True)
+    assert store.infer([2.0, 2.0]) is None
+    assert store.infer([3.0, 3.0]) == (True, [1.0, 3.0])
+    assert len(store) == 2